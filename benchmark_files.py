@@ -0,0 +1,91 @@
+"""Benchmark the CPU time per GB served by files routes: `bottle.static_file()` vs `files.send()`.
+
+Requests are served by a minimal WSGI server, sending file-like responses with `sendfile()`, like production servers do:
+
+    $ python benchmark_files.py [SIZE_IN_MB] [REQUESTS]
+"""
+
+import os
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+
+import bottle
+
+from src import files
+
+GB = 1024**3
+MB = 1024**2
+
+
+class SendfileWrapper:
+    """`wsgi.file_wrapper` of the benchmark server."""
+
+    def __init__(self, filelike: Any, block_size: int = 8192) -> None:  # noqa: ANN401
+        self.filelike = filelike
+        self.block_size = block_size
+
+    def __iter__(self) -> Any:  # noqa: ANN401
+        yield from iter(lambda: self.filelike.read(self.block_size), b"")
+
+
+def serve(app: Callable, environ: dict[str, Any], sink: int) -> int:
+    """Serve a request, and return the number of bytes sent to the `sink` file descriptor."""
+    response: dict[str, str] = {}
+    body = app(environ, lambda _status, headers, _exc_info=None: response.update(headers))
+    sent = 0
+    try:
+        if isinstance(body, SendfileWrapper):
+            # Like Gunicorn: from the file position, up to the response length
+            fileno = body.filelike.fileno()
+            offset, remaining = os.lseek(fileno, 0, os.SEEK_CUR), int(response["Content-Length"])
+            while remaining and (count := os.sendfile(sink, fileno, offset + sent, remaining)):
+                sent += count
+                remaining -= count
+        else:
+            for chunk in body:
+                sent += os.write(sink, chunk)
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+    return sent
+
+
+def benchmark(app: Callable, path: str, headers: dict[str, str], requests: int, sink: int) -> float:
+    """Return the CPU time, in seconds, per GB served."""
+    environ = {"REQUEST_METHOD": "GET", "PATH_INFO": path, "wsgi.file_wrapper": SendfileWrapper}
+    environ |= {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()}
+
+    sent = 0
+    start = time.process_time()
+    for _ in range(requests):
+        sent += serve(app, environ.copy(), sink)
+    return (time.process_time() - start) / (sent / GB)
+
+
+def main(size: int, requests: int) -> None:
+    app = bottle.Bottle()
+    with TemporaryDirectory() as tmp_dir, Path(os.devnull).open(mode="wb") as sink:
+        root = Path(tmp_dir)
+        (root / "dictionary.zip").write_bytes(os.urandom(size * MB))
+
+        @app.get("/static_file/<name>")
+        def static_file(name: str) -> bottle.HTTPResponse:
+            return bottle.static_file(name, root=str(root), download=True)
+
+        @app.get("/files.send/<name>")
+        def send(name: str) -> bottle.HTTPResponse:
+            return files.send(name, root, download=True)
+
+        print(f"CPU seconds per GB served ({size} MB file, {requests} requests)")
+        for scenario, headers in [("whole file", {}), ("range (second half)", {"Range": f"bytes={size * MB // 2}-"})]:
+            before = benchmark(app, "/static_file/dictionary.zip", headers, requests, sink.fileno())
+            after = benchmark(app, "/files.send/dictionary.zip", headers, requests, sink.fileno())
+            print(f"{scenario:<20} static_file: {before:.4f}  files.send: {after:.4f}  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
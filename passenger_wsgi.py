@@ -3,7 +3,7 @@ import logging
 
 import sentry_sdk
 
-from src import __version__, constants, server
+from src import __version__, assets, constants, server, templates
 
 logging.basicConfig(
     datefmt="%Y-%m-%dT%H:%M:%SZ",
@@ -14,4 +14,8 @@ logging.basicConfig(
 logging.getLogger("urllib3.connectionpool").setLevel(logging.ERROR)
 sentry_sdk.init(constants.SENTRY_DSN_BACKEND, environment="production", release=__version__)
 
-application = server.app
+# Do not let the first request pay the templates compilation, nor assets minification
+templates.warm_up()
+assets.warm_up()
+
+application = server.application
@@ -0,0 +1,68 @@
+"""Pre-render pages that only depend on templates, and data files, to be served as-is (see `src/prerendered.py`).
+
+To run after each deploy, and after each catalog update:
+
+    $ python prerender.py
+"""
+
+import inspect
+import logging
+from collections.abc import Callable
+from typing import Any
+
+import bottle
+
+from src import catalog, compression, constants, prerendered, server, utils
+
+log = logging.getLogger(__name__)
+
+# (URL path, route, data files the page depends on, does the page depend on the catalog?)
+# `/sponsors` is not there: monthly sponsors amounts grow with the current date.
+PAGES: list[tuple[str, Callable, list[str], bool]] = [
+    ("/enjoy", server.enjoy, [], False),
+    ("/hall-of-fame", server.hall_of_fame, [], False),
+    ("/legal-mentions", server.legal_mentions, [], False),
+    ("/list", server.list_all, [], True),
+]
+
+
+def render(path: str, route: Callable, **kwargs: Any) -> str:  # noqa: ANN401
+    """Render a page outside of any request, bypassing the route decorators (caches, and pre-rendered pages)."""
+    bottle.request.bind(
+        {
+            "HTTP_HOST": f"www.{constants.WWW}",
+            "PATH_INFO": path,
+            "REQUEST_METHOD": "GET",
+            "wsgi.url_scheme": "https",
+        }
+    )
+    content = inspect.unwrap(route)(**kwargs)
+    return content if isinstance(content, str) else "".join(content)
+
+
+def prerender() -> dict[str, tuple[str, prerendered.Page]]:
+    digest = catalog.snapshot().digest
+    pages: dict[str, tuple[str, prerendered.Page]] = {}
+
+    for path, route, data, depends_on_catalog in PAGES:
+        mtimes = prerendered.data_files_mtimes(data)
+        html = render(path, route)
+        page = prerendered.Page(compression.content_hash(html.encode()), digest if depends_on_catalog else "", mtimes)
+        pages[path] = (html, page)
+
+    dictionaries = utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_MINIMAL)
+    for lang in sorted(lang for lang, langs_dst in dictionaries.items() if lang in langs_dst):
+        path = f"/download/{lang}"
+        # The page shows the StarDict file modification time
+        entry = utils.get_stardict_file(lang, lang)
+        files = {f"{lang}/{lang}/{entry.path.name}": entry.mtime}
+        html = render(path, server.downloads_monolingual, lang=lang)
+        pages[path] = (html, prerendered.Page(compression.content_hash(html.encode()), digest, files=files))
+
+    prerendered.write(constants.STATIC, pages)
+    log.info("Pre-rendered %d page(s) into %s", len(pages), constants.STATIC)
+    return pages
+
+
+if __name__ == "__main__":
+    print("\n".join(prerender()))
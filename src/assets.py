@@ -0,0 +1,146 @@
+"""Assets fingerprints, so that assets URLs only change when their content does.
+
+The manifest (asset path -> content hash) is built at deploy:
+
+    $ python -m src.assets
+
+Stylesheets, and scripts, are minified, and compressed, once per fingerprint, and kept in memory.
+"""
+
+import json
+import logging
+from collections.abc import Callable
+from pathlib import Path
+
+import bottle
+import rcssmin
+import rjsmin
+
+from src import compression, constants
+
+log = logging.getLogger(__name__)
+
+# Assets URLs never change for a given content, they can be cached forever
+CACHE_CONTROL_IMMUTABLE = "public, max-age=31536000, immutable"
+# The asset was requested with an outdated fingerprint (like from an old cached page)
+CACHE_CONTROL_OUTDATED = "public, no-cache"
+
+# Assets kind -> (minifier, content type)
+MINIFIED: dict[str, tuple[Callable[[str], str], str]] = {
+    "script": (rjsmin.jsmin, "text/javascript; charset=UTF-8"),
+    "style": (rcssmin.cssmin, "text/css; charset=UTF-8"),
+}
+
+
+def fingerprint(file: Path) -> str:
+    return compression.content_hash(file.read_bytes())[:12]
+
+
+def build(root: Path) -> dict[str, str]:
+    return {file.relative_to(root).as_posix(): fingerprint(file) for file in sorted(root.rglob("*")) if file.is_file()}
+
+
+class Fingerprints:
+    def __init__(self, root: Path, manifest: Path) -> None:
+        self.root = root
+        self.manifest = manifest
+        try:
+            self.fingerprints: dict[str, str] = json.loads(manifest.read_text(encoding=constants.ENCODING))
+        except FileNotFoundError:
+            log.warning("The assets manifest %s is missing, fingerprints are computed at runtime.", manifest)
+            self.fingerprints = build(root)
+        self.digest = compression.content_hash(json.dumps(self.fingerprints, sort_keys=True).encode())
+        # Asset path -> (fingerprint, minified content variants)
+        self.minified: dict[str, tuple[str, compression.Variants]] = {}
+
+    def get(self, path: str) -> str:
+        """Return the fingerprint of an asset, or an empty string if it does not exist."""
+        if bottle.DEBUG or (value := self.fingerprints.get(path)) is None:
+            # Assets are edited live in debug mode, or the asset was added after the manifest was built
+            try:
+                value = fingerprint(self.root / path)
+            except FileNotFoundError:
+                return ""
+            if not bottle.DEBUG:
+                self.fingerprints[path] = value
+        return value
+
+    def minify(self, path: str) -> compression.Variants | None:
+        """Return the minified asset, or `None` if it does not exist. It is minified again only when it changed."""
+        if not (value := self.get(path)):
+            return None
+        if (minified := self.minified.get(path)) is None or minified[0] != value:
+            minifier, _ = MINIFIED[path.split("/", 1)[0]]
+            try:
+                content = (self.root / path).read_text(encoding=constants.ENCODING)
+            except FileNotFoundError:
+                return None
+            minified = self.minified[path] = (value, compression.Variants(minifier(content).encode()))
+        return minified[1]
+
+
+_FINGERPRINTS: Fingerprints | None = None
+
+
+def get() -> Fingerprints:
+    global _FINGERPRINTS  # noqa: PLW0603
+
+    if _FINGERPRINTS is None or _FINGERPRINTS.manifest != constants.ASSETS_MANIFEST:
+        _FINGERPRINTS = Fingerprints(constants.ASSET, constants.ASSETS_MANIFEST)
+    return _FINGERPRINTS
+
+
+def digest() -> str:
+    """Hash of all fingerprints: rendered pages change when it changes."""
+    return get().digest
+
+
+def url(path: str) -> str:
+    """Template helper: the URL of an asset (like `style/common.css`), with its fingerprint."""
+    return f"/asset/{path}?v={value}" if (value := get().get(path)) else f"/asset/{path}"
+
+
+def cache_control(path: str, version: str) -> str:
+    return CACHE_CONTROL_IMMUTABLE if version == get().get(path) else CACHE_CONTROL_OUTDATED
+
+
+def send_minified(kind: str, file: str) -> bytes:
+    """Send a minified stylesheet, or script, from memory."""
+    path = f"{kind}/{file}"
+    if not (variants := get().minify(path)):
+        raise bottle.HTTPError(status=404)
+
+    body = compression.send(variants, MINIFIED[kind][1])
+    bottle.response.set_header("Cache-Control", cache_control(path, bottle.request.query.get("v", "")))
+    return body
+
+
+def warm_up() -> list[str]:
+    """Minify all stylesheets, and scripts, so that no request pays for it."""
+    fingerprints = get()
+    paths = [
+        file.relative_to(fingerprints.root).as_posix()
+        for kind in MINIFIED
+        for file in sorted((fingerprints.root / kind).glob("*"))
+        if file.is_file()
+    ]
+    for path in paths:
+        fingerprints.minify(path)
+    log.info("Warmed up %d minified assets", len(paths))
+    return paths
+
+
+def save_manifest() -> dict[str, str]:
+    """Build the manifest from current assets."""
+    fingerprints = build(constants.ASSET)
+    manifest = constants.ASSETS_MANIFEST
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = manifest.with_suffix(f"{manifest.suffix}.tmp")
+    tmp_file.write_text(json.dumps(fingerprints, indent=4), encoding=constants.ENCODING)
+    tmp_file.replace(manifest)
+    return fingerprints
+
+
+if __name__ == "__main__":
+    for path, value in save_manifest().items():
+        print(value, path)
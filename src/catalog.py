@@ -0,0 +1,482 @@
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass, field
+from functools import cached_property
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from src import compression, constants
+from src.models import Dictionaries, Dictionary
+
+log = logging.getLogger(__name__)
+
+# (mtime in ns, size, inode) of the catalog file
+Signature = tuple[int, int, int]
+
+
+def is_dict_enabled(dictionary: Dictionary) -> bool:
+    return (
+        int(dictionary["words"]) >= constants.MINIMUM_REQUIRED_WORDS
+        and bool(dictionary.get("formats", ""))
+        and bool(dictionary.get("uid", ""))
+    )
+
+
+def signature(stat: os.stat_result) -> Signature:
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def project(lang_src: str, lang_dst: str, details: Dictionary, keys: list[str]) -> Dictionary:
+    return {key: value for key, value in details.items() if key in keys} | (
+        {"name": f"{lang_src}-{lang_dst}"} if "name" in keys else {}
+    )
+
+
+#
+# Generations history
+#
+
+
+@dataclass
+class Generation:
+    """A catalog save, and pairs of the minimal projection that changed since the previous one."""
+
+    generation: int
+    digest: str  # Of the minimal projection
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def read_history(file: Path) -> list[Generation]:
+    try:
+        return [Generation(**entry) for entry in json.loads(file.read_text(encoding=constants.ENCODING))]
+    except FileNotFoundError:
+        return []
+    except (TypeError, ValueError):
+        log.exception("The catalog history %s is invalid", file)
+        return []
+
+
+def write_history(file: Path, history: list[Generation]) -> None:
+    tmp_file = file.with_suffix(f"{file.suffix}.tmp")
+    tmp_file.write_text(json.dumps([asdict(entry) for entry in history], indent=4), encoding=constants.ENCODING)
+    tmp_file.replace(file)
+
+
+#
+# Binary catalog
+#
+# The catalog file is compiled into a compact binary file, that processes map (`mmap`): all workers share the same
+# pages, and only decode the records they look up. It is bound to the catalog file signature, and written by
+# `utils.save_dictionaries()`, or by the first process finding it missing, or out of sync.
+#
+# Layout (unsigned 32-bit integers, in the native byte order, as the file is only read where it was written):
+#   - the header (see `BINARY_HEADER`);
+#   - fields names, as string IDs;
+#   - fixed-width records, sorted by languages pair: lang_src, lang_dst, and one value per field, as string IDs;
+#   - per field, an index: the field values of all records, sorted (missing values last), followed by the related
+#     records indexes;
+#   - the interned strings table: offsets (strings count + 1), followed by UTF-8 data.
+# Strings are sorted, so that comparing string IDs is comparing strings. Field values are JSON-encoded, so that their
+# type is kept.
+#
+
+# Magic, version, fields count, records count, strings count, and the catalog file signature
+BINARY_HEADER = struct.Struct("=4sHHIIQQQ")
+BINARY_MAGIC = b"RDCT"
+BINARY_VERSION = 2
+BINARY_MISSING = 0xFFFFFFFF
+
+
+def encode_value(value: object) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def decode_value(text: str) -> float | str:
+    """Reverse `encode_value()`, skipping the JSON decoder for plain strings, and integers."""
+    if text[0] == '"' and "\\" not in text:
+        return text[1:-1]
+    return int(text) if text.isdigit() else json.loads(text)
+
+
+def encode(dictionaries: Dictionaries, sig: Signature) -> bytes:
+    """Compile `dictionaries` into the binary catalog. `sig` is the signature of the related catalog file."""
+    fields = sorted({key for langs in dictionaries.values() for details in langs.values() for key in details})
+    rows = [
+        (lang_src, lang_dst, [encode_value(details[key]) if key in details else None for key in fields])
+        for lang_src, langs in dictionaries.items()
+        for lang_dst, details in langs.items()
+    ]
+    strings = sorted(
+        {
+            *fields,
+            *(
+                text
+                for lang_src, lang_dst, values in rows
+                for text in (lang_src, lang_dst, *values)
+                if text is not None
+            ),
+        }
+    )
+    ids = {text: idx for idx, text in enumerate(strings)}
+    records = sorted(
+        [ids[lang_src], ids[lang_dst], *(BINARY_MISSING if value is None else ids[value] for value in values)]
+        for lang_src, lang_dst, values in rows
+    )
+
+    ints = array("I", (ids[key] for key in fields))
+    for record in records:
+        ints.extend(record)
+    for column in range(2, 2 + len(fields)):
+        index = sorted((record[column], idx) for idx, record in enumerate(records))
+        ints.extend(value_id for value_id, _ in index)
+        ints.extend(idx for _, idx in index)
+    data = [text.encode() for text in strings]
+    ints.append(0)
+    for chunk in data:
+        ints.append(ints[-1] + len(chunk))
+
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(fields), len(records), len(strings), *sig)
+    return b"".join([header, ints.tobytes(), *data])
+
+
+class Snapshot:
+    """Immutable view of the catalog at a given time, backed by the binary catalog (see `encode()`).
+
+    Records are decoded on lookup, nothing is parsed ahead: the memory used does not depend on the catalog size.
+    """
+
+    def __init__(self, buffer: bytes | mmap.mmap, history: list[Generation] | None = None) -> None:
+        if len(buffer) < BINARY_HEADER.size:
+            msg = "Truncated binary catalog"
+            raise ValueError(msg)
+        magic, version, fields_count, records_count, strings_count, *sig = BINARY_HEADER.unpack_from(buffer)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            msg = "Not a binary catalog"
+            raise ValueError(msg)
+
+        self.signature: Signature = (sig[0], sig[1], sig[2])
+        self.records_count = records_count
+        self.strings_count = strings_count
+        self.width = 2 + fields_count
+        # Offsets in `ints` of each section
+        self.records_at = fields_count
+        self.indexes_at = self.records_at + records_count * self.width
+        self.strings_at = self.indexes_at + 2 * records_count * fields_count
+        size = self.strings_at + strings_count + 1
+
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+        self.data_at = BINARY_HEADER.size + 4 * size
+        if len(self.view) < self.data_at:
+            msg = "Truncated binary catalog"
+            raise ValueError(msg)
+        self.ints = self.view[BINARY_HEADER.size : self.data_at].cast("I")
+        if len(self.view) != self.data_at + self.ints[-1]:
+            msg = "Truncated binary catalog"
+            raise ValueError(msg)
+        self.fields = [self.string(self.ints[idx]) for idx in range(fields_count)]
+
+        self.history = history or []
+        self.deltas: dict[int, compression.Variants] = {}
+
+    @classmethod
+    def from_dictionaries(cls, dictionaries: Dictionaries, history: list[Generation] | None = None) -> "Snapshot":
+        return cls(encode(dictionaries, (0, 0, 0)), history=history)
+
+    def raw_string(self, string_id: int) -> bytes:
+        start, end = self.ints[self.strings_at + string_id], self.ints[self.strings_at + string_id + 1]
+        return self.buffer[self.data_at + start : self.data_at + end]
+
+    def string(self, string_id: int) -> str:
+        return str(self.raw_string(string_id), constants.ENCODING)
+
+    def string_id(self, text: str) -> int | None:
+        # UTF-8 keeps the code points order: no need to decode strings to compare them
+        raw = text.encode(constants.ENCODING)
+        idx = bisect.bisect_left(range(self.strings_count), raw, key=self.raw_string)
+        return idx if idx < self.strings_count and self.raw_string(idx) == raw else None
+
+    def decode(self, record: int, values: dict[int, Any] | None = None) -> tuple[str, str, Dictionary]:
+        """Decode a record, `values` being decoded values already known (string ID -> value)."""
+        values = {} if values is None else values
+        start = self.records_at + record * self.width
+        src_id, dst_id, *value_ids = self.ints[start : start + self.width].tolist()
+        details: Dictionary = {}
+        for key, value_id in zip(self.fields, value_ids, strict=True):
+            if value_id == BINARY_MISSING:
+                continue
+            if value_id not in values:
+                values[value_id] = decode_value(self.string(value_id))
+            details[key] = values[value_id]
+        return self.string(src_id), self.string(dst_id), details
+
+    def records(self) -> Iterator[tuple[str, str, Dictionary]]:
+        """Decode public-ready dictionaries, in languages pairs order."""
+        values: dict[int, Any] = {}
+        for record in range(self.records_count):
+            lang_src, lang_dst, details = self.decode(record, values)
+            if is_dict_enabled(details):
+                yield lang_src, lang_dst, details
+
+    def dictionaries(self, keys: list[str]) -> Dictionaries:
+        """Return the projection for the given `keys`, safe to alter by the caller."""
+        dictionaries: Dictionaries = {}
+        for lang_src, lang_dst, details in self.records():
+            dictionaries.setdefault(lang_src, {})[lang_dst] = project(lang_src, lang_dst, details, keys)
+        return dictionaries
+
+    @cached_property
+    def api_content(self) -> bytes:
+        """The minimal projection, serialized once for the dictionaries API."""
+        return json.dumps(
+            self.dictionaries(constants.DICTIONARY_KEYS_MINIMAL),
+            check_circular=False,
+            separators=(",", ":"),
+        ).encode()
+
+    @cached_property
+    def api_payload(self) -> compression.Variants:
+        return compression.Variants(self.api_content)
+
+    @cached_property
+    def digest(self) -> str:
+        return compression.content_hash(self.api_content)
+
+    @cached_property
+    def generation(self) -> int:
+        """The most recent generation having the same content, 0 when unknown."""
+        return next((entry.generation for entry in reversed(self.history) if entry.digest == self.digest), 0)
+
+    def delta(self, since: int) -> compression.Variants | None:
+        """Pairs of the minimal projection added, changed, and removed since the `since` generation.
+
+        Return `None` when the `since` generation is out of the known history.
+        """
+        if not self.generation or not self.history or not self.history[0].generation <= since <= self.generation:
+            return None
+
+        if (cached := self.deltas.get(since)) is None:
+            first_seen: dict[str, bool] = {}  # Pair -> was added
+            for entry in self.history:
+                if since < entry.generation <= self.generation:
+                    for name in [*entry.added, *entry.changed, *entry.removed]:
+                        first_seen.setdefault(name, name in entry.added)
+
+            delta: dict[str, Any] = {"generation": self.generation, "since": since, "added": {}, "changed": {}}
+            removed = []
+            for name, was_added in sorted(first_seen.items()):
+                lang_src, lang_dst = name.split("-", 1)
+                if not (details := self.get(lang_src, lang_dst, keys=constants.DICTIONARY_KEYS_MINIMAL)):
+                    removed.append(name)
+                else:
+                    delta["added" if was_added else "changed"].setdefault(lang_src, {})[lang_dst] = details
+            delta["removed"] = removed
+
+            content = json.dumps(delta, check_circular=False, separators=(",", ":")).encode()
+            cached = self.deltas[since] = compression.Variants(content)
+        return cached
+
+    def get(self, lang_src: str, lang_dst: str, *, keys: list[str] = constants.DICTIONARY_KEYS_ALL) -> Dictionary:
+        if (src_id := self.string_id(lang_src)) is None or (dst_id := self.string_id(lang_dst)) is None:
+            return {}
+        # Strided views of the languages columns, records being sorted by them
+        sources = self.ints[self.records_at : self.indexes_at : self.width]
+        targets = self.ints[self.records_at + 1 : self.indexes_at : self.width]
+        low = bisect.bisect_left(sources, src_id)
+        high = bisect.bisect_right(sources, src_id, low)
+        record = bisect.bisect_left(targets, dst_id, low, high)
+        if record == high or targets[record] != dst_id:
+            return {}
+        _, _, details = self.decode(record)
+        return project(lang_src, lang_dst, details, keys) if is_dict_enabled(details) else {}
+
+    def find(self, key: str, value: str, *, keys: list[str] = constants.DICTIONARY_KEYS_ALL) -> Dictionary:
+        """Find the dictionary having the given `value` for `key`, using the field index. The first dictionary wins."""
+        if key == "name":
+            return self.get(*value.split("-", 1), keys=keys) if "-" in value else {}
+        if key not in self.fields or (value_id := self.string_id(encode_value(value))) is None:
+            return {}
+
+        index = self.indexes_at + 2 * self.fields.index(key) * self.records_count
+        values = self.ints[index : index + self.records_count]
+        records = self.ints[index + self.records_count : index + 2 * self.records_count]
+        for idx in range(bisect.bisect_left(values, value_id), self.records_count):
+            if values[idx] != value_id:
+                break
+            lang_src, lang_dst, details = self.decode(records[idx])
+            if is_dict_enabled(details):
+                return project(lang_src, lang_dst, details, keys)
+        return {}
+
+
+@dataclass(frozen=True)
+class Changes:
+    """Languages pairs (`lang_src-lang_dst`) that changed between two catalog snapshots."""
+
+    added: set[str] = field(default_factory=set)
+    changed: dict[str, set[str]] = field(default_factory=dict)  # Pair -> changed keys
+    removed: set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def affected(self, keys: list[str]) -> set[str]:
+        """Return pairs whose projection on `keys` is different."""
+        wanted = set(keys)
+        return self.added | self.removed | {name for name, changed in self.changed.items() if changed & wanted}
+
+
+def diff(previous: Snapshot, current: Snapshot) -> Changes:
+    """Compare public-ready dictionaries of two snapshots."""
+    changes = Changes()
+    old = {f"{src}-{dst}": details for src, dst, details in previous.records()}
+    new = {f"{src}-{dst}": details for src, dst, details in current.records()}
+    changes.added.update(new.keys() - old.keys())
+    changes.removed.update(old.keys() - new.keys())
+    for name in old.keys() & new.keys():
+        before, after = old[name], new[name]
+        if changed := {key for key in before.keys() | after.keys() if before.get(key) != after.get(key)}:
+            changes.changed[name] = changed
+    return changes
+
+
+# Callbacks called with changes, every time a process reloads the catalog
+LISTENERS: list[Callable[[Changes], None]] = []
+
+
+def on_change(callback: Callable[[Changes], None]) -> Callable[[Changes], None]:
+    """Decorator to register a catalog change listener."""
+    LISTENERS.append(callback)
+    return callback
+
+
+def notify(changes: Changes) -> None:
+    log.info(
+        "Catalog changes: %d added, %d changed, %d removed",
+        len(changes.added),
+        len(changes.changed),
+        len(changes.removed),
+    )
+    for callback in LISTENERS:
+        try:
+            callback(changes)
+        except Exception:
+            log.exception("Catalog change listener %r failed", callback)
+
+
+class DictionaryCatalog:
+    """Map the binary catalog once, and revalidate it cheaply using the catalog file signature."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path_binary = path.with_suffix(".bin")
+        self.path_history = path.with_name(f"{path.stem}-history.json")
+        self._lock = Lock()
+        self._snapshot: Snapshot | None = None
+        self._stale = False
+
+    def invalidate(self) -> None:
+        """Force a reload on next access, listeners will be notified of changes."""
+        self._stale = True
+
+    def map(self, sig: Signature, history: list[Generation]) -> Snapshot:
+        """Map the binary catalog, if it is the one of the catalog file with the `sig` signature."""
+        with self.path_binary.open(mode="rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        snapshot = Snapshot(mapped, history=history)
+        if snapshot.signature != sig:
+            msg = "The binary catalog is out of sync"
+            raise ValueError(msg)
+        return snapshot
+
+    def load(self) -> Snapshot:
+        history = read_history(self.path_history)
+        sig = signature(self.path.stat())
+        try:
+            snapshot = self.map(sig, history)
+        except (FileNotFoundError, ValueError):
+            pass
+        else:
+            log.debug("Mapped the dictionaries catalog %s (signature %s)", self.path_binary, sig)
+            return snapshot
+
+        # Missing, invalid, or out of sync: compile it from the catalog file
+        with self.path.open(encoding=constants.ENCODING) as fh:
+            sig = signature(os.fstat(fh.fileno()))
+            content = encode(json.load(fh), sig)
+        self.save_binary(content)
+        log.debug("Compiled the dictionaries catalog %s (signature %s)", self.path, sig)
+        try:
+            return self.map(sig, history)
+        except (FileNotFoundError, ValueError):
+            # Replaced in between by another process, for another catalog file
+            return Snapshot(content, history=history)
+
+    def save_binary(self, content: bytes) -> None:
+        tmp_file = self.path_binary.with_name(f"{self.path_binary.name}.{os.getpid()}.tmp")
+        tmp_file.write_bytes(content)
+        tmp_file.replace(self.path_binary)
+
+    def save_history(self, dictionaries: Dictionaries) -> None:
+        """Record a new generation for `dictionaries`. To call *before* saving the catalog file.
+
+        This way, processes loading the new catalog file will always find its generation.
+        """
+        history = read_history(self.path_history)
+        new = Snapshot.from_dictionaries(dictionaries)
+        entry = Generation(history[-1].generation + 1 if history else 1, new.digest)
+
+        try:
+            previous = self.snapshot()
+        except FileNotFoundError:
+            previous = None
+
+        if previous and history and previous.generation == history[-1].generation:
+            changes = diff(previous, new)
+            entry.added = sorted(changes.added)
+            entry.changed = sorted(
+                name for name, keys in changes.changed.items() if keys & set(constants.DICTIONARY_KEYS_MINIMAL)
+            )
+            entry.removed = sorted(changes.removed)
+            history.append(entry)
+        else:
+            # The chain is broken (first save, or the catalog was altered by other means): restart from scratch
+            history = [entry]
+
+        write_history(self.path_history, history[-constants.CATALOG_HISTORY_SIZE :])
+
+    def snapshot(self) -> Snapshot:
+        sig = signature(self.path.stat())
+        if (current := self._snapshot) is None or self._stale or current.signature != sig:
+            with self._lock:
+                if (current := self._snapshot) is None or self._stale or current.signature != sig:
+                    self._stale = False
+                    previous, current = current, self.load()
+                    self._snapshot = current
+                    if previous and (changes := diff(previous, current)):
+                        notify(changes)
+        return current
+
+
+_CATALOG: DictionaryCatalog | None = None
+
+
+def get() -> DictionaryCatalog:
+    global _CATALOG  # noqa: PLW0603
+
+    if _CATALOG is None or _CATALOG.path != constants.DICTIONARIES:
+        _CATALOG = DictionaryCatalog(constants.DICTIONARIES)
+    return _CATALOG
+
+
+def snapshot() -> Snapshot:
+    return get().snapshot()
@@ -0,0 +1,217 @@
+import gzip
+import hashlib
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+import bottle
+import brotli
+
+from src import constants
+
+# The order matters: the first encoding accepted by the client wins
+ENCODERS: dict[str, Callable[[bytes], bytes]] = {
+    "br": lambda content: brotli.compress(content, quality=11),
+    "gzip": lambda content: gzip.compress(content, compresslevel=9, mtime=0),
+}
+
+# Precompressed variants files suffixes
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Content types worth compressing (prefixes)
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Parse the `Accept-Encoding` header value, ignoring explicitly refused encodings (`q=0`)."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        encoding, _, params = part.partition(";")
+        if params.replace(" ", "") in {"q=0", "q=0.0", "q=0.00", "q=0.000"}:
+            continue
+        if encoding := encoding.strip():
+            accepted.add(encoding)
+    return accepted
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:32]
+
+
+class Variants:
+    """A response body, and all its precompressed variants, computed once."""
+
+    def __init__(self, content: bytes, *, encoded: dict[str, bytes] | None = None) -> None:
+        self.content = content
+        self.digest = content_hash(content)
+        self.encoded = {name: encoder(content) for name, encoder in ENCODERS.items()} if encoded is None else encoded
+
+    def etag(self, encoding: str = "") -> str:
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def is_fresh(self, if_none_match: str) -> bool:
+        """Check `If-None-Match` header value against ETags of any variant (weak comparison)."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return any(
+            tag.strip().removeprefix("W/").strip('"').split("-", 1)[0] == self.digest
+            for tag in if_none_match.split(",")
+        )
+
+    def negotiate(self, accept_encoding: str) -> tuple[str, bytes]:
+        """Return the best `(encoding, body)` couple for the given `Accept-Encoding` header value."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ENCODERS:
+            if (
+                encoding in accepted
+                and encoding in self.encoded
+                and len(body := self.encoded[encoding]) < len(self.content)
+            ):
+                return encoding, body
+        return "", self.content
+
+
+def text_variants(content: str) -> Variants:
+    """Variants of a text file, to be cached per file modification (see `utils.load_data_file()`)."""
+    return Variants(content.encode())
+
+
+def stored_variants(file: Path, content: bytes) -> Variants:
+    """Variants of a cache entry, stored next to its `file` once per content version.
+
+    Variants files are named after the content digest, those of previous versions are removed when they are stored.
+    """
+    digest = content_hash(content)
+    files = {encoding: file.with_name(f"{file.name}.{digest}{suffix}") for encoding, suffix in SUFFIXES.items()}
+    try:
+        return Variants(content, encoded={encoding: path.read_bytes() for encoding, path in files.items()})
+    except FileNotFoundError:
+        pass
+
+    variants = Variants(content)
+    for encoding, suffix in SUFFIXES.items():
+        for old in file.parent.glob(f"{file.name}.*{suffix}"):
+            old.unlink(missing_ok=True)
+        tmp_file = files[encoding].with_name(f"{files[encoding].name}.tmp")
+        tmp_file.write_bytes(variants.encoded[encoding])
+        tmp_file.replace(files[encoding])
+    return variants
+
+
+def send(variants: Variants, content_type: str) -> bytes:
+    """Send the best precompressed variant, or an empty 304 response if the client already has it."""
+    encoding, body = variants.negotiate(bottle.request.get_header("Accept-Encoding", ""))
+    response = bottle.response
+    response.set_header("ETag", variants.etag(encoding))
+    response.set_header("Vary", "Accept-Encoding")
+    if variants.is_fresh(bottle.request.get_header("If-None-Match", "")):
+        response.status = 304
+        return b""
+
+    response.content_type = content_type
+    if encoding:
+        response.set_header("Content-Encoding", encoding)
+    return body
+
+
+def stream_encoder(encoding: str) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """Incremental encoder, for streamed responses: `(compress and flush a chunk, finish)` callables.
+
+    A faster compression level is used, as the content cannot be compressed ahead.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        return lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+    compressobj = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # `16 +` for the gzip container
+    return lambda chunk: compressobj.compress(chunk) + compressobj.flush(zlib.Z_SYNC_FLUSH), compressobj.flush
+
+
+def tag_etag(etag: str, encoding: str) -> str:
+    """Distinct ETag for an encoded variant: `"tag"` -> `"tag-br"` (Bottle static files ETags are not quoted)."""
+    tag, quote = (etag[:-1], '"') if etag.endswith('"') else (etag, "")
+    return f"{tag}-{encoding}{quote}"
+
+
+def untag_etags(if_none_match: str) -> str:
+    """Revert `tag_etag()` in the `If-None-Match` header value, for the application to recognize its own ETags."""
+    tags = []
+    for etag in if_none_match.split(","):
+        tag, quote = (etag.strip()[:-1], '"') if etag.strip().endswith('"') else (etag.strip(), "")
+        for encoding in ENCODERS:
+            tag = tag.removesuffix(f"-{encoding}")
+        tags.append(f"{tag}{quote}")
+    return ", ".join(tags)
+
+
+class Middleware:
+    """WSGI middleware compressing responses, according to the `Accept-Encoding` request header.
+
+    Responses are compressed on the fly, with the faster levels of `stream_encoder()`: the highest levels are kept for
+    precompressed content, compressed once (see `Variants`), like cached pages, assets, and text files. Responses
+    already negotiated by the application (see `send()`), and files handed to the WSGI server (`wsgi.file_wrapper`,
+    maybe sent with `sendfile()`), are left untouched.
+    """
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    def __call__(self, environ: dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        if if_none_match := environ.get("HTTP_IF_NONE_MATCH"):
+            environ["HTTP_IF_NONE_MATCH"] = untag_etags(if_none_match)
+
+        response: list = []
+        app_iter = self.app(environ, lambda *args: response.extend(args))
+        status, headers, *exc_info = response
+        headers_dict = {key.lower(): value for key, value in headers}
+
+        if self.is_file(environ, app_iter) or not self.is_compressible(environ, status, headers_dict):
+            start_response(status, headers, *exc_info)
+            return app_iter
+
+        accept_encoding = environ.get("HTTP_ACCEPT_ENCODING", "")
+        encoding = next((name for name in ENCODERS if name in accepted_encodings(accept_encoding)), "")
+        drop = {"vary", *(("content-length", "etag") if encoding else ())}
+        headers = [(key, value) for key, value in headers if key.lower() not in drop]
+        vary = headers_dict.get("vary")
+        headers.append(("Vary", f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"))
+        if encoding:
+            headers.append(("Content-Encoding", encoding))
+            if etag := headers_dict.get("etag"):
+                headers.append(("ETag", tag_etag(etag, encoding)))
+        start_response(status, headers, *exc_info)
+        return self.stream(app_iter, encoding) if encoding else app_iter
+
+    @staticmethod
+    def is_file(environ: dict[str, Any], app_iter: Iterable[bytes]) -> bool:
+        wrappers = tuple(
+            wrapper
+            for wrapper in (environ.get("wsgi.file_wrapper"), bottle.WSGIFileWrapper)
+            if isinstance(wrapper, type)
+        )
+        return isinstance(app_iter, wrappers)
+
+    @staticmethod
+    def is_compressible(environ: dict[str, Any], status: str, headers: dict[str, str]) -> bool:
+        return (
+            environ["REQUEST_METHOD"] == "GET"
+            and status.startswith("200 ")
+            and "content-encoding" not in headers
+            and "accept-encoding" not in headers.get("vary", "").lower()
+            and headers.get("content-type", "").startswith(COMPRESSIBLE)
+            and int(headers.get("content-length", constants.COMPRESSION_MIN_SIZE)) >= constants.COMPRESSION_MIN_SIZE
+        )
+
+    @staticmethod
+    def stream(app_iter: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        compress, finish = stream_encoder(encoding)
+        try:
+            for chunk in app_iter:
+                if chunk:
+                    yield compress(chunk)
+            yield finish()
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
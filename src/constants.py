@@ -15,12 +15,16 @@ REVIEWS = DATA / "reviews.json"
 FAQ = ASSET / "faq.json"
 FILES = ROOT / "file"
 FILES_CACHE = ROOT / "cache"
+TEMPLATES_CACHE = FILES_CACHE / "templates"
+ASSETS_MANIFEST = FILES_CACHE / "assets.json"
+STYLES_MANIFEST = FILES_CACHE / "styles.json"
 CERTS = FILES / "certificates"
 EMAILS = DATA / "emails"
 LOGS = ROOT / "logs.log"
 METRICS = DATA / "metrics.json"
 ORDERS = DATA / "orders.json"
 SPONSORS = DATA / "sponsors.json"
+STATIC = ROOT / "static"
 VIEW = HERE / "view"
 
 DICTIONARY_KEYS_MINIMAL = ["formats", "updated", "words"]
@@ -41,10 +45,36 @@ DICTIONARY_FORMATS = {
     "dictorg": ("DICT.org", "dictorg-{lang_src}-{lang_dst}{etym_suffix}.zip"),
     "df": ("DictFile", "dict-{lang_src}-{lang_dst}{etym_suffix}.df.bz2"),
 }
+# All formats of a dictionary in one ZIP file, generated while it is sent (see `zipstream.py`)
+DICTIONARY_BUNDLE = ("All formats", "all-formats-{lang_src}-{lang_dst}{etym_suffix}.zip")
+DICTIONARY_BUNDLE_FORMAT = "bundle"
 
 # Download links availability
 DELAY_BEFORE_EXPIRATION_IN_SEC = 10 * 60
 
+# Dictionary files are looked up from memory, and the files manifest is refreshed at most every:
+FILES_MANIFEST_TTL_IN_SEC = 60
+
+# Dictionary files sent by the front server (see `files.send_download()`): "x-accel-redirect" (nginx), "x-sendfile"
+# (Apache, lighttpd), or "" to send them from workers
+FILES_OFFLOAD = os.environ.get("FILES_OFFLOAD", "")
+# nginx `internal` location aliased to `FILES` (X-Accel-Redirect only)
+FILES_OFFLOAD_LOCATION = os.environ.get("FILES_OFFLOAD_LOCATION", "/protected-files")
+
+# Downloads governor (see `governor.py`): concurrent transfers overall, and per client IP, and the bandwidth budget
+# of all transfers, in bytes per second (0 for no limit). Offloaded files are left to the front server.
+DOWNLOADS_MAX = int(os.environ.get("DOWNLOADS_MAX", "16"))
+DOWNLOADS_MAX_PER_IP = int(os.environ.get("DOWNLOADS_MAX_PER_IP", "4"))
+DOWNLOADS_RATE = int(os.environ.get("DOWNLOADS_RATE", "0"))
+DOWNLOADS_RETRY_AFTER_IN_SEC = 30
+# Reverse proxies in front of workers, each one appending its peer address to `X-Forwarded-For` (0 for none)
+DOWNLOADS_TRUSTED_PROXIES = int(os.environ.get("DOWNLOADS_TRUSTED_PROXIES", "0"))
+
+# HTTP cache policies (see `server.CACHE_POLICIES`)
+HTTP_CACHE_PAGES_MAX_AGE_IN_SEC = 5 * 60
+HTTP_CACHE_STALE_IN_SEC = 24 * 60 * 60
+HTTP_CACHE_TEXT_FILES_MAX_AGE_IN_SEC = 24 * 60 * 60
+
 HOST = "0.0.0.0"  # noqa: S104
 SERVER = "wsgiref"
 PORT = 1024
@@ -150,3 +180,12 @@ ENCODING = "utf-8"
 
 # Dictionaries with less than this count of words are disabled
 MINIMUM_REQUIRED_WORDS = 100
+
+# Count of catalog generations kept to serve deltas (`?since=<generation>`)
+CATALOG_HISTORY_SIZE = 24
+
+# Responses compression: smaller responses are sent as-is
+COMPRESSION_MIN_SIZE = 1024
+
+# Count of home page variants, each one with its own reviews, served at random
+HOME_VARIANTS = 8
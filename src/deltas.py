@@ -0,0 +1,156 @@
+"""Binary patches between dictionary files generations, so that returning users only download what changed.
+
+At release, once new files are in place (`FILES/<lang_src>/<lang_dst>/`), and before they are used:
+
+    $ python -m src.deltas
+
+For each file, the previous generation kept in `deltas/previous/` is diffed with the current one, the patch is written
+to `deltas/<file>.<previous sha256>.patch.zst`, then the current generation replaces the previous one. Patches leading
+to another generation are removed. Files routes send patches with a `from=<sha256>` parameter, to clients stating they
+apply them with an `A-IM: zstd-patch` header (see `files.send_delta()`).
+
+Patches are the ones of `zstd --patch-from`: the current generation compressed with the previous one as a raw content
+dictionary. Clients apply them with the standard `zstd` tool (the window may be larger than the default limit):
+
+    $ zstd -d --long=31 --patch-from=dicthtml-eo-fr.zip dicthtml-eo-fr.zip.<sha256>.patch.zst -o dicthtml-eo-fr.new.zip
+
+The checksum of the generation a patch leads to is kept in its `.sha256` sidecar file.
+
+Only Kobo files are patched: they are ZIP files of independently compressed HTML files, most of them unchanged between
+generations. Other formats are a single compressed stream (StarDict, and DICT.org, `.dict.dz`, Kindle, and DictFile),
+where any change shifts all following bytes, and a patch would be about as large as the file.
+"""
+
+import fnmatch
+import hashlib
+import logging
+import shutil
+from pathlib import Path
+
+import zstandard
+
+from src import constants, manifest
+
+log = logging.getLogger(__name__)
+
+DELTAS = "deltas"
+PREVIOUS = "previous"
+SUFFIX = ".patch.zst"
+# Instance manipulation of responses (RFC 3229)
+IM = "zstd-patch"
+FORMATS = ["kobo"]
+LEVEL = 19
+# Patches not saving at least half of the file are not kept
+MAX_RATIO = 0.5
+
+
+def delta_name(file_name: str, base: str) -> str:
+    return f"{file_name}.{base}{SUFFIX}"
+
+
+def sidecar(patch: Path) -> Path:
+    return patch.with_name(f"{patch.name}.sha256")
+
+
+def file_sha256(file: Path) -> str:
+    with file.open(mode="rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
+def is_patched(file_name: str) -> bool:
+    """Whether a dictionary file is in a format worth patching."""
+    patterns = (
+        constants.DICTIONARY_FORMATS[fmt][1].format(lang_src="*", lang_dst="*", etym_suffix="*") for fmt in FORMATS
+    )
+    return any(fnmatch.fnmatchcase(file_name, pattern) for pattern in patterns)
+
+
+def dictionary(old: Path) -> zstandard.ZstdCompressionDict:
+    return zstandard.ZstdCompressionDict(old.read_bytes(), dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+
+
+def diff(old: Path, new: Path, patch: Path) -> None:
+    """Write the patch from `old` to `new`, and its sidecar file."""
+    old_size, new_size = old.stat().st_size, new.stat().st_size
+    # Like `zstd --patch-from`: the whole previous generation is within the window, and long matches are searched
+    window_log = min(max((old_size + new_size).bit_length(), zstandard.WINDOWLOG_MIN), zstandard.WINDOWLOG_MAX)
+    params = zstandard.ZstdCompressionParameters.from_level(
+        LEVEL,
+        source_size=new_size,
+        dict_size=old_size,
+        window_log=window_log,
+        enable_ldm=True,
+        write_checksum=True,
+        write_content_size=True,
+    )
+    compressor = zstandard.ZstdCompressor(dict_data=dictionary(old), compression_params=params)
+    with new.open(mode="rb") as src, patch.open(mode="wb") as dst:
+        compressor.copy_stream(src, dst, size=new_size)
+    sidecar(patch).write_text(f"{file_sha256(new)}  {new.name}\n", encoding=constants.ENCODING)
+
+
+def target(patch: Path) -> str:
+    """SHA-256 of the file a patch leads to."""
+    return manifest.read_checksum(sidecar(patch))
+
+
+def apply(old: Path, patch: Path, output: Path) -> None:
+    """Rebuild the new generation of a file from its `old` generation, and a patch. The result is verified."""
+    decompressor = zstandard.ZstdDecompressor(dict_data=dictionary(old), max_window_size=2**zstandard.WINDOWLOG_MAX)
+    try:
+        with patch.open(mode="rb") as src, output.open(mode="wb") as dst:
+            decompressor.copy_stream(src, dst)
+    except zstandard.ZstdError as exc:
+        msg = f"{patch} is not a patch of {old}"
+        raise ValueError(msg) from exc
+
+    if file_sha256(output) != target(patch):
+        msg = f"{output} does not match the patch target"
+        raise ValueError(msg)
+
+
+def remove(patch: Path) -> None:
+    patch.unlink()
+    sidecar(patch).unlink(missing_ok=True)
+
+
+def release(folder: Path) -> list[Path]:
+    """Create patches from previous generations of files of a dictionary folder, and return them."""
+    deltas = folder / DELTAS
+    previous = deltas / PREVIOUS
+    previous.mkdir(parents=True, exist_ok=True)
+
+    created = []
+    for file_name, entry in sorted(manifest.scan_folder(folder).items()):
+        if not is_patched(file_name):
+            continue
+
+        current = file_sha256(entry.path)
+        old = previous / file_name
+        if old.is_file() and (base := file_sha256(old)) != current:
+            patch = deltas / delta_name(file_name, base)
+            diff(old, entry.path, patch)
+            if patch.stat().st_size > entry.size * MAX_RATIO:
+                log.info("The patch of %s from %s is not worth it", file_name, base)
+                remove(patch)
+            else:
+                created.append(patch)
+
+        for patch in deltas.glob(delta_name(file_name, "*")):
+            if target(patch) != current:
+                remove(patch)
+
+        tmp_file = old.with_name(f"{old.name}.tmp")
+        shutil.copy2(entry.path, tmp_file)
+        tmp_file.replace(old)
+    return created
+
+
+def build() -> list[Path]:
+    """Create patches of all dictionaries."""
+    return [patch for folder in sorted(constants.FILES.glob("*/*")) if folder.is_dir() for patch in release(folder)]
+
+
+if __name__ == "__main__":
+    for patch in build():
+        print(patch.stat().st_size, patch.relative_to(constants.FILES))
@@ -0,0 +1,286 @@
+"""Files responses, with a file-like body so that it is handed to the WSGI server `wsgi.file_wrapper`.
+
+Servers supporting it send the file with `sendfile()`, without any Python-level read/write loop.
+Bottle already does it for whole files, but `Range` requests are sent with a Python generator:
+a file-like object limited to the requested range is used instead.
+
+Dictionary files can also be offloaded to the front server (see `constants.FILES_OFFLOAD`),
+the worker only answering with an internal redirect header. For instance, with nginx:
+
+    location /protected-files/ {
+        internal;
+        alias /path/to/file/;
+    }
+
+Text files, and SVG images, are rather sent with their precompressed variants, computed once per file modification.
+
+Several files can also be sent in one ZIP file, generated while it is sent (see `zipstream.py`).
+
+When a file has a `.sha256` sidecar, its checksum is the strong `ETag` of the file, and its `Repr-Digest` (RFC 9530).
+Clients can then revalidate (`If-None-Match`), and resume (`If-Range`), downloads safely. Given the checksum of their
+copy, they get the patch to the current file when there is one (see `deltas.py`).
+"""
+
+import base64
+import logging
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, BinaryIO
+from urllib.parse import quote
+
+import bottle
+
+from src import compression, constants, deltas, governor, http_cache, manifest, utils, zipstream
+
+log = logging.getLogger(__name__)
+
+# `constants.FILES_OFFLOAD` -> response header
+OFFLOAD_HEADERS = {"x-accel-redirect": "X-Accel-Redirect", "x-sendfile": "X-Sendfile"}
+RE_SHA256 = re.compile(r"[0-9a-f]{64}")
+# Files sent with precompressed variants (see `send_compressed()`)
+COMPRESSED_SUFFIXES = {".svg", ".txt", ".xml"}
+
+
+class FileRange:
+    """A file-like object limited to a range of the file.
+
+    The file position is set at the range start: `sendfile()` implementations start from it,
+    and stop at the response `Content-Length`. Others read until `read()` returns nothing.
+    """
+
+    def __init__(self, file: BinaryIO, offset: int, length: int) -> None:
+        file.seek(offset)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def send(file_name: str, root: Path, **kwargs: Any) -> bottle.HTTPResponse:  # noqa: ANN401
+    """Same as `bottle.static_file()`, but a partial response body is a file-like object too."""
+    response = bottle.static_file(file_name, root=str(root), **kwargs)
+    if response.status_code != 206 or not response.body:
+        return response
+
+    response.body.close()
+    # Like "bytes 0-1023/4096"
+    offset, end = map(int, response.get_header("Content-Range").split(" ", 1)[1].split("/", 1)[0].split("-"))
+    # The path was checked, and found, by `bottle.static_file()`
+    response.body = FileRange((root.absolute() / file_name.strip("/\\")).open(mode="rb"), offset, end - offset + 1)
+    return response
+
+
+def send_compressed(file_name: str, root: Path) -> bytes:
+    """Send a text file with its best precompressed variant (see `compression.send()`)."""
+    root = root.resolve()
+    file = (root / file_name).resolve()
+    if not file.is_relative_to(root):
+        raise bottle.HTTPError(status=403)
+    try:
+        variants = utils.load_data_file(file, compression.text_variants)
+    except FileNotFoundError:
+        raise bottle.HTTPError(status=404) from None
+
+    mimetype = content_type(file_name)
+    return compression.send(variants, f"{mimetype}; charset=UTF-8" if mimetype.startswith("text/") else mimetype)
+
+
+def content_type(file_name: str) -> str:
+    """Same as `bottle.static_file()`."""
+    mimetype, encoding = mimetypes.guess_type(file_name)
+    if encoding == "gzip":
+        return "application/gzip"
+    if encoding:
+        return f"application/x-{encoding}"
+    return mimetype or "application/octet-stream"
+
+
+def validators(sha256: str) -> dict[str, str]:
+    """Strong `ETag`, and `Repr-Digest`, headers from a SHA-256 checksum (none if it is not a valid one)."""
+    if not RE_SHA256.fullmatch(sha256):
+        return {}
+    digest = base64.b64encode(bytes.fromhex(sha256)).decode()
+    return {"ETag": f'"{sha256}"', "Repr-Digest": f"sha-256=:{digest}:"}
+
+
+def checked_validators(entry: manifest.Entry, stat: os.stat_result) -> dict[str, str]:
+    """Strong validators of a file, only if the manifest entry is still the one of the file opened.
+
+    The manifest is refreshed periodically: the file, and its sidecar, may have been replaced in between.
+    """
+    if (stat.st_size, stat.st_mtime) != (entry.size, entry.mtime):
+        log.info("The files manifest is outdated for %s, validators are not sent", entry.path)
+        manifest.get().invalidate()
+        return {}
+    return validators(entry.sha256)
+
+
+def send_opened(fh: BinaryIO, stat: os.stat_result, headers: dict[str, str]) -> bottle.HTTPResponse:
+    """Like `bottle.static_file()`, for an opened file, so that headers describe the bytes actually sent."""
+    size = stat.st_size
+    headers = headers | {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(size),
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+    }
+    body: BinaryIO | FileRange = fh
+    status = 200
+    if range_header := bottle.request.environ.get("HTTP_RANGE"):
+        if not (ranges := list(bottle.parse_range_header(range_header, size))):
+            fh.close()
+            return bottle.HTTPError(status=416, body="Requested Range Not Satisfiable")
+        offset, end = ranges[0]
+        headers |= {"Content-Range": f"bytes {offset}-{end - 1}/{size}", "Content-Length": str(end - offset)}
+        body, status = FileRange(fh, offset, end - offset), 206
+
+    if bottle.request.method == "HEAD":
+        body.close()
+        return bottle.HTTPResponse("", status=status, headers=headers)
+    return bottle.HTTPResponse(body, status=status, headers=headers)
+
+
+def offload(entry: manifest.Entry, header: str, headers: dict[str, str]) -> bottle.HTTPResponse:
+    """Answer with the internal redirect header to the file, for the front server to send it."""
+    folder = constants.FILES.resolve()
+    file = entry.path.resolve()
+    if not file.is_relative_to(folder):
+        raise bottle.HTTPError(status=403)
+
+    if header == "X-Sendfile":
+        value = str(file)
+    else:
+        value = quote(f"{constants.FILES_OFFLOAD_LOCATION.rstrip('/')}/{file.relative_to(folder).as_posix()}")
+    return bottle.HTTPResponse(status=200, headers=headers | {header: value})
+
+
+def send_download(entry: manifest.Entry, headers: dict[str, str] | None = None, base: str = "") -> bottle.HTTPResponse:
+    """Send a dictionary file as an attachment, offloaded to the front server if configured.
+
+    Conditional requests are evaluated here, with the strong validators of the file, when they are the ones of the
+    bytes sent: `If-Modified-Since` is ignored along with `If-None-Match`, and the `Range` is ignored when `If-Range`
+    is not the current strong `ETag`. When offloaded, the front server still evaluates `If-Range` on its own.
+    Otherwise, the file is sent from the descriptor it was checked with, and transfers are governed.
+
+    With the `base` checksum of a previous generation of the file, and `A-IM: zstd-patch`, its patch is sent instead,
+    if there is one leading to the current file.
+    """
+    file_name = entry.path.name
+    header = OFFLOAD_HEADERS.get(constants.FILES_OFFLOAD)
+    try:
+        fh = None if header else entry.path.open(mode="rb")
+        stat = os.fstat(fh.fileno()) if fh else entry.path.stat()
+    except FileNotFoundError:
+        manifest.get().invalidate()
+        raise bottle.HTTPError(status=404) from None
+
+    download = file_name.replace('"', "")
+    headers = (headers or {}) | checked_validators(entry, stat)
+    etag = headers.get("ETag", "")
+    environ = bottle.request.environ
+    conditions = (environ.get("HTTP_IF_NONE_MATCH", ""), environ.get("HTTP_IF_MODIFIED_SINCE", ""))
+    if http_cache.Validators(etag, stat.st_mtime).is_fresh(*conditions):
+        if fh:
+            fh.close()
+        return bottle.HTTPResponse(status=304, headers=headers)
+    if (if_range := environ.get("HTTP_IF_RANGE")) is not None and (not etag or if_range != etag):
+        environ.pop("HTTP_RANGE", None)
+    if etag and find_delta(entry, base):
+        if fh:
+            fh.close()
+        return send_delta(file_name, entry.path.parent, base, headers)
+
+    headers |= {
+        "Content-Type": content_type(file_name),
+        "Content-Disposition": f'attachment; filename="{download}"',
+    }
+    if header or not fh:
+        return offload(entry, header or "", headers)
+
+    try:
+        slots = governor.admit()
+    except bottle.HTTPError:
+        fh.close()
+        raise
+    return governor.govern(send_opened(fh, stat, headers), slots)
+
+
+def accepts_delta() -> bool:
+    """Whether the client applies patches, as stated by its RFC 3229 `A-IM` header."""
+    instances = bottle.request.get_header("A-IM", "").split(",")
+    return deltas.IM in {instance.split(";", 1)[0].strip().lower() for instance in instances}
+
+
+def find_delta(entry: manifest.Entry, base: str) -> Path | None:
+    """The patch from the `base` generation of a file, if the client applies it, and it leads to the current file."""
+    if not RE_SHA256.fullmatch(base) or not accepts_delta():
+        return None
+    patch = entry.path.parent / deltas.DELTAS / deltas.delta_name(entry.path.name, base)
+    if not patch.is_file() or deltas.target(patch) != entry.sha256:
+        return None
+    return patch
+
+
+def send_delta(file_name: str, root: Path, base: str, headers: dict[str, str]) -> bottle.HTTPResponse:
+    """Send the patch to a file from a previous generation, as a RFC 3229 `226 IM Used` response, always from workers.
+
+    The `ETag` is still the one of the current file, and the `Delta-Base` the one of the previous generation.
+    """
+    headers = {name: value for name, value in headers.items() if name != "Repr-Digest"}
+    headers |= {"Delta-Base": f'"{base}"', "IM": deltas.IM}
+    slots = governor.admit()
+    response = send(
+        deltas.delta_name(file_name, base),
+        root / deltas.DELTAS,
+        download=f"{file_name}{deltas.SUFFIX}",
+        headers=headers,
+        etag=headers["ETag"],
+        mimetype="application/zstd",
+    )
+    if response.status_code == 200:
+        response.status = 226
+    return governor.govern(response, slots)
+
+
+def send_bundle(
+    file_name: str, entries: list[manifest.Entry], headers: dict[str, str] | None = None
+) -> bottle.HTTPResponse:
+    """Send files in a ZIP file, as an attachment, always from workers. Ranges are not supported."""
+    try:
+        members = zipstream.open_members(entries)
+    except FileNotFoundError:
+        manifest.get().invalidate()
+        raise bottle.HTTPError(status=404) from None
+    if (length := zipstream.size(members)) > zipstream.LIMIT:
+        zipstream.close(members)
+        log.error("The %s bundle is too large for a ZIP file without ZIP64 extensions", file_name)
+        raise bottle.HTTPError(status=404)
+
+    try:
+        slots = governor.admit()
+    except bottle.HTTPError:
+        zipstream.close(members)
+        raise
+    download = file_name.replace('"', "")
+    headers = (headers or {}) | {
+        "Accept-Ranges": "none",
+        "Content-Disposition": f'attachment; filename="{download}"',
+        "Content-Length": str(length),
+        "Content-Type": content_type(file_name),
+    }
+    if bottle.request.method == "HEAD":
+        zipstream.close(members)
+        return governor.govern(bottle.HTTPResponse("", status=200, headers=headers), slots)
+    return governor.govern(bottle.HTTPResponse(zipstream.ZipStream(members), status=200, headers=headers), slots)
@@ -0,0 +1,168 @@
+"""Downloads governor, shared by all workers processes, so that downloads cannot starve pages, and webhooks.
+
+A transfer holds a slot among `DOWNLOADS_MAX` ones overall, and among `DOWNLOADS_MAX_PER_IP` ones of its client.
+Slots are files locked with `flock()`: the lock is released when the transfer closes, or when its process dies.
+Without a free slot, the request is answered right away with a `503`, and a `Retry-After` header. `HEAD` requests
+transfer nothing, and take no slot.
+
+Clients are told apart by the peer address (`REMOTE_ADDR`), or, behind `DOWNLOADS_TRUSTED_PROXIES` reverse proxies, by
+the `X-Forwarded-For` entry appended by the outermost one: entries before it are set by the client.
+
+With a `DOWNLOADS_RATE` budget, transfers are paced by a token bucket shared by processes. Their body is then read
+from Python (without `sendfile()`), which is not a concern as their rate is limited anyway. Each transfer takes
+tokens by `QUANTUM` bytes, so that the shared bucket is locked once per quantum, not once per read.
+"""
+
+import fcntl
+import hashlib
+import io
+import random
+import struct
+import time
+from pathlib import Path
+from typing import IO, Protocol
+
+import bottle
+
+from src import constants
+
+SLOTS = "downloads"
+BUDGET = "budget"
+# Clients are spread over that many buckets of slots, so that files count is bounded
+BUCKETS = 4096
+# Bytes taken at once from the shared budget
+QUANTUM = 256 * 1024
+
+
+def folder() -> Path:
+    path = constants.FILES_CACHE / SLOTS
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def lock(names: list[str]) -> IO[bytes] | None:
+    """Lock the first free slot, starting from a random one, among the given files."""
+    start = random.randrange(len(names))  # noqa: S311
+    for name in names[start:] + names[:start]:
+        fh = (folder() / name).open(mode="ab")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.close()
+        else:
+            return fh
+    return None
+
+
+def bucket(client: str) -> int:
+    return int(hashlib.md5(client.encode(), usedforsecurity=False).hexdigest(), 16) % BUCKETS
+
+
+def client() -> str:
+    """Address of the client of the current request, as seen by the trusted server closest to it."""
+    environ = bottle.request.environ
+    if (proxies := constants.DOWNLOADS_TRUSTED_PROXIES) > 0:
+        hops = [hop.strip() for hop in environ.get("HTTP_X_FORWARDED_FOR", "").split(",") if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return environ.get("REMOTE_ADDR") or "unknown"
+
+
+def acquire(client: str) -> list[IO[bytes]]:
+    """Acquire slots for a transfer to the `client` IP, or raise a `503` error if there are none."""
+    slots: list[IO[bytes]] = []
+    limits = [
+        ("all", constants.DOWNLOADS_MAX),
+        (f"ip-{bucket(client)}", constants.DOWNLOADS_MAX_PER_IP),
+    ]
+    for prefix, count in limits:
+        if count <= 0:
+            continue
+        if (slot := lock([f"{prefix}-{idx}.lock" for idx in range(count)])) is None:
+            release(slots)
+            raise bottle.HTTPError(
+                status=503,
+                headers={"Retry-After": str(constants.DOWNLOADS_RETRY_AFTER_IN_SEC)},
+            )
+        slots.append(slot)
+    return slots
+
+
+def admit() -> list[IO[bytes]]:
+    """Acquire slots for the current request, if it transfers a body."""
+    if bottle.request.method == "HEAD":
+        return []
+    return acquire(client())
+
+
+def release(slots: list[IO[bytes]]) -> None:
+    for slot in slots:
+        slot.close()
+
+
+def take(size: int, rate: int) -> float:
+    """Take `size` bytes from the shared budget of `rate` bytes per second, and return the delay to wait for them.
+
+    The bucket state is the time at which the budget is free again, stored in a locked file.
+    """
+    with (folder() / BUDGET).open(mode="a+b") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        fh.seek(0)
+        content = fh.read(8)
+        free_at = struct.unpack("d", content)[0] if len(content) == 8 else 0.0
+        now = time.time()
+        start = max(free_at, now)
+        fh.truncate(0)
+        fh.write(struct.pack("d", start + size / rate))
+    return start - now
+
+
+class Body(Protocol):
+    """Transferred bodies: files, file ranges (`files.FileRange`), or archives (`zipstream.ZipStream`)."""
+
+    def read(self, size: int = -1, /) -> bytes: ...
+
+    def close(self) -> None: ...
+
+
+class Transfer:
+    """A file-like response body holding slots until it is closed."""
+
+    def __init__(self, body: Body, slots: list[IO[bytes]]) -> None:
+        self.body = body
+        self.slots = slots
+        self.rate = constants.DOWNLOADS_RATE
+        # Bytes taken from the shared budget, and not read yet
+        self.credit = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.body.read(size)
+        if self.rate > 0 and data:
+            self.credit -= len(data)
+            if self.credit < 0:
+                quantum = max(QUANTUM, -self.credit)
+                if (delay := take(quantum, self.rate)) > 0:
+                    time.sleep(delay)
+                self.credit += quantum
+        return data
+
+    def fileno(self) -> int:
+        # Prevent `sendfile()` when it would not be paced, or when the body is not a file (like a `ZipStream`)
+        if self.rate > 0 or (fileno := getattr(self.body, "fileno", None)) is None:
+            raise io.UnsupportedOperation
+        return fileno()
+
+    def close(self) -> None:
+        try:
+            self.body.close()
+        finally:
+            release(self.slots)
+
+
+def govern(response: bottle.HTTPResponse, slots: list[IO[bytes]]) -> bottle.HTTPResponse:
+    """Hand the slots to the response body, or release them if there is nothing to transfer."""
+    if hasattr(response.body, "read"):
+        response.body = Transfer(response.body, slots)
+    else:
+        release(slots)
+    return response
@@ -0,0 +1,150 @@
+"""HTTP cache policies, declared per route, and applied by a Bottle plugin.
+
+Validators of a page are computed from what it is rendered from (code, templates, catalog, and data files),
+so that conditional requests are answered with a 304 before any rendering happens. Validators do not tell whether
+the page of a route with parameters exists: such routes declare an `exists` check, done before answering a 304.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import formatdate
+from functools import cache, wraps
+from pathlib import Path
+from typing import Any
+
+import bottle
+
+from src import __version__, assets, catalog, compression, constants, templates
+
+# Special dependencies, other ones are `constants` data files names (like "SPONSORS")
+CATALOG = "catalog"
+TEMPLATES = "templates"
+# The current date, for pages computed from it (like monthly sponsors amounts)
+TODAY = "today"
+
+
+@cache
+def deployed_at() -> float:
+    """Most recent modification time of the code. Computed once per process, as the code only changes on deploy."""
+    return max(file.stat().st_mtime for file in Path(__file__).parent.glob("*.py"))
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: float
+
+    def is_fresh(self, if_none_match: str, if_modified_since: str) -> bool:
+        """Evaluate conditional request headers (`If-Modified-Since` only counts without `If-None-Match`)."""
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag.removeprefix("W/") in tags
+        if if_modified_since:
+            date = bottle.parse_date(if_modified_since.split(";", 1)[0].strip())
+            return date is not None and date >= int(self.last_modified)
+        return False
+
+
+@dataclass(frozen=True)
+class Policy:
+    max_age: int
+    stale_while_revalidate: int = 0
+    private: bool = False
+    depends_on: tuple[str, ...] = ()
+    # Whether the page exists, called with the route parameters
+    exists: Callable[..., bool] | None = None
+
+    @property
+    def cache_control(self) -> str:
+        value = f"{'private' if self.private else 'public'}, max-age={self.max_age}"
+        if self.stale_while_revalidate:
+            value += f", stale-while-revalidate={self.stale_while_revalidate}"
+        return value
+
+    def validators(self) -> Validators | None:
+        """Compute validators of the current request page, without rendering it."""
+        if not self.depends_on:
+            return None
+
+        parts = [__version__, bottle.request.path, bottle.request.query_string]
+        mtimes = [deployed_at()]
+        try:
+            for dependency in self.depends_on:
+                if dependency == CATALOG:
+                    parts.append(catalog.snapshot().digest)
+                    mtimes.append(constants.DICTIONARIES.stat().st_mtime)
+                elif dependency == TEMPLATES:
+                    parts.extend((templates.digest(), assets.digest()))
+                    mtimes.append(templates.last_modified())
+                elif dependency == TODAY:
+                    today = datetime.now(tz=UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+                    parts.append(today.date().isoformat())
+                    mtimes.append(today.timestamp())
+                else:
+                    stat = getattr(constants, dependency).stat()
+                    parts.append(str(stat.st_mtime_ns))
+                    mtimes.append(stat.st_mtime)
+        except FileNotFoundError:
+            return None
+
+        # Weak: several representations can share validators (like home page variants)
+        etag = f'W/"{compression.content_hash("|".join(parts).encode())}"'
+        return Validators(etag, max(mtimes))
+
+    def headers(self, validators: Validators | None) -> dict[str, str]:
+        headers = {"Cache-Control": self.cache_control}
+        if validators:
+            headers["ETag"] = validators.etag
+            headers["Last-Modified"] = formatdate(validators.last_modified, usegmt=True)
+        return headers
+
+
+def page(*depends_on: str, exists: Callable[..., bool] | None = None) -> Policy:
+    """Policy of a rendered page: fresh for a short time, then served stale while revalidated in the background."""
+    return Policy(
+        max_age=constants.HTTP_CACHE_PAGES_MAX_AGE_IN_SEC,
+        stale_while_revalidate=constants.HTTP_CACHE_STALE_IN_SEC,
+        depends_on=(TEMPLATES, *depends_on),
+        exists=exists,
+    )
+
+
+class Plugin:
+    """Apply the cache policy of each route, if any. Routes without policy are left untouched."""
+
+    name = "http_cache"
+    api = 2
+
+    def __init__(self, policies: dict[str, Policy]) -> None:
+        self.policies = policies
+
+    def apply(self, callback: Callable, route: bottle.Route) -> Callable:
+        if not (policy := self.policies.get(route.rule)):
+            return callback
+
+        @wraps(callback)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            if bottle.DEBUG:
+                return callback(*args, **kwargs)
+
+            validators = policy.validators()
+            headers = policy.headers(validators)
+            request = bottle.request
+            if (
+                validators
+                and validators.is_fresh(
+                    request.get_header("If-None-Match", ""), request.get_header("If-Modified-Since", "")
+                )
+                and (not policy.exists or policy.exists(**kwargs))
+            ):
+                raise bottle.HTTPResponse(status=304, headers=headers)
+
+            result = callback(*args, **kwargs)
+            response = result if isinstance(result, bottle.HTTPResponse) else bottle.response
+            if response.status_code in {200, 304}:
+                for name, value in headers.items():
+                    response.set_header(name, value)
+            return result
+
+        return wrapper
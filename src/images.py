@@ -0,0 +1,239 @@
+"""Offline images pipeline, to run when images change (outputs are committed along with sources):
+
+    $ python -m src.images
+
+- SVG images are optimized in place: editor metadata, unused IDs, and whitespace, are removed, and numbers rounded.
+- Brands logos are packed into one SVG sprite (`brands.svg`), a `<symbol>` per logo.
+- Screenshots get resized variants, in their format, and in lossless WebP, for `srcset` (requires Pillow, skipped
+  otherwise). Files are only written when their content changed.
+
+Pages use them with the `{{ picture(...) }}`, and `{{ brand(...) }}`, template helpers.
+"""
+
+import io
+import logging
+import re
+import struct
+import xml.etree.ElementTree as ET
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from src import assets, constants
+
+log = logging.getLogger(__name__)
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+EDITORS_NS = (
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+    "http://purl.org/dc/elements/1.1/",
+    "http://creativecommons.org/ns#",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+)
+ET.register_namespace("", SVG_NS)
+ET.register_namespace("xlink", XLINK_NS)
+
+BRANDS = ["amazon-kindle", "koreader", "onyx-boox", "pocketbook", "rakuten-kobo", "vivlio"]
+SPRITE = "brands.svg"
+# Screenshots, and the widths of their variants (twice their displayed widths, for high density screens)
+SCREENSHOTS = ["showcase.png", "showcase-dark.png"]
+WIDTHS = (280, 736)
+PRECISION = 3
+
+RE_NUMBER = re.compile(r"-?\d*\.\d+")
+RE_REFERENCE = re.compile(r"url\(#([^)]+)\)")
+RE_SEPARATOR_NEGATIVE = re.compile(r"[ ,]+-")
+RE_PATH_COMMAND = re.compile(r" ?([a-zA-Z]) ?")
+NUMERIC_ATTRIBUTES = {"d", "points", "transform", "x", "y", "x1", "y1", "x2", "y2", "cx", "cy", "r", "rx", "ry"}
+
+
+def compact(value: str, *, path: bool = False) -> str:
+    """Round numbers, and, in path data, remove separators not needed (around commands, and before negative numbers)."""
+
+    def shorten(match: re.Match) -> str:
+        number = f"{float(match[0]):.{PRECISION}f}".rstrip("0").rstrip(".")
+        return number.replace("0.", ".", 1) if number.startswith(("0.", "-0.")) else number or "0"
+
+    value = re.sub(r"\s+", " ", RE_NUMBER.sub(shorten, value)).strip()
+    return RE_PATH_COMMAND.sub(r"\1", RE_SEPARATOR_NEGATIVE.sub("-", value)) if path else value
+
+
+def references(root: ET.Element) -> set[str]:
+    """IDs referenced in the document (`url(#id)`, and `href="#id"`)."""
+    found = set()
+    for element in root.iter():
+        for value in [*element.attrib.values(), element.text or ""]:
+            found.update(RE_REFERENCE.findall(value))
+            if value.startswith("#"):
+                found.add(value[1:])
+    return found
+
+
+def is_editor_tag(name: str) -> bool:
+    return name.startswith(tuple(f"{{{namespace}}}" for namespace in EDITORS_NS)) or name == f"{{{SVG_NS}}}metadata"
+
+
+def serialize(root: ET.Element) -> str:
+    return ET.tostring(root, encoding="unicode").replace(" />", "/>")
+
+
+def optimize(source: str) -> str:
+    root = ET.fromstring(source)  # noqa: S314 (trusted assets)
+    used = references(root)
+    for parent in list(root.iter()):
+        for child in list(parent):
+            if is_editor_tag(child.tag) or (child.tag == f"{{{SVG_NS}}}defs" and not len(child) and not child.text):
+                parent.remove(child)
+
+    for element in root.iter():
+        for name in list(element.attrib):
+            if (name.startswith("{") and not name.startswith(f"{{{XLINK_NS}}}")) or (
+                name == "id" and element.attrib[name] not in used
+            ):
+                del element.attrib[name]
+            elif name in NUMERIC_ATTRIBUTES:
+                element.attrib[name] = compact(element.attrib[name], path=name == "d")
+        element.attrib.pop("version", None)
+        if element.text and not element.text.strip():
+            element.text = None
+        if element.tail and not element.tail.strip():
+            element.tail = None
+    return serialize(root)
+
+
+def sprite(logos: dict[str, str]) -> str:
+    """Pack SVG images (name -> source) into one sprite, a `<symbol>` per image, with IDs prefixed by its name."""
+    root = ET.Element(f"{{{SVG_NS}}}svg")
+    for name, source in logos.items():
+        image = ET.fromstring(source)  # noqa: S314 (trusted assets)
+        symbol = ET.SubElement(root, f"{{{SVG_NS}}}symbol", id=name)
+        symbol.set("viewBox", image.get("viewBox") or f"0 0 {image.get('width')} {image.get('height')}")
+        if fill := image.get("fill"):
+            symbol.set("fill", fill)
+        for element in image.iter():
+            for attribute, value in element.attrib.items():
+                if attribute == "id":
+                    element.set(attribute, f"{name}-{value}")
+                else:
+                    element.set(attribute, RE_REFERENCE.sub(rf"url(#{name}-\1)", value))
+        symbol.extend(image)
+    return serialize(root)
+
+
+def png_size(file: Path) -> tuple[int, int]:
+    """Width, and height, of a PNG image, from its header."""
+    with file.open(mode="rb") as fh:
+        width, height = struct.unpack(">II", fh.read(24)[16:24])
+    return width, height
+
+
+def variant(path: str, width: int, suffix: str) -> str:
+    """Path of a resized variant, like `img/showcase-736.webp` (the same size, when `width` is 0)."""
+    stem = path.rsplit(".", 1)[0]
+    return f"{stem}-{width}{suffix}" if width else f"{stem}{suffix}"
+
+
+def save(image: Any, output: Path, **options: Any) -> bool:  # noqa: ANN401
+    """Save an image, unless the file has the same content already. Return whether it was written."""
+    data = io.BytesIO()
+    image.save(data, format=output.suffix.lstrip(".").upper(), **options)
+    if output.is_file() and output.read_bytes() == data.getvalue():
+        return False
+    output.write_bytes(data.getvalue())
+    return True
+
+
+def resize(file: Path) -> list[Path]:
+    """Create resized variants of a screenshot, and their (lossless) WebP versions. It requires Pillow."""
+    try:
+        from PIL import Image  # noqa: PLC0415
+    except ImportError:
+        log.warning("Pillow is not installed, variants of %s are not created.", file.name)
+        return []
+
+    formats: list[tuple[str, dict[str, Any]]] = [
+        (file.suffix, {"optimize": True}),
+        (".webp", {"lossless": True, "method": 6}),
+    ]
+    written = []
+    with Image.open(file) as image:
+        source = image.convert("RGB")
+        for width in [0, *(width for width in WIDTHS if width < image.width)]:
+            resized = image
+            if width:
+                resized = source.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+                if image.mode == "P":
+                    # Screenshots have few colors: keep a palette, like the source
+                    resized = resized.quantize(256, method=Image.Quantize.FASTOCTREE)
+            for suffix, options in formats:
+                if not width and suffix == file.suffix:
+                    continue
+                output = constants.ASSET / variant(f"img/{file.name}", width, suffix)
+                if save(resized, output, **options):
+                    written.append(output)
+    return written
+
+
+def build() -> list[Path]:
+    """Run the whole pipeline, and return written files."""
+    folder = constants.ASSET / "img"
+    written = []
+    for file in sorted(folder.glob("*.svg")):
+        if file.name == SPRITE:
+            continue
+        source = file.read_text(encoding=constants.ENCODING)
+        if (optimized := optimize(source)) != source:
+            file.write_text(optimized, encoding=constants.ENCODING)
+            written.append(file)
+
+    logos = {name: (folder / f"{name}.svg").read_text(encoding=constants.ENCODING) for name in BRANDS}
+    (folder / SPRITE).write_text(sprite(logos), encoding=constants.ENCODING)
+    written.append(folder / SPRITE)
+
+    for name in SCREENSHOTS:
+        written.extend(resize(folder / name))
+    return written
+
+
+@cache
+def intrinsic_width(path: str) -> int:
+    return png_size(constants.ASSET / path)[0]
+
+
+def srcset(path: str, suffix: str) -> str:
+    """Candidates of an image, and its variants, in the given format: the ones that exist."""
+    candidates = [(variant(path, width, suffix), width) for width in WIDTHS]
+    candidates.append((path if path.endswith(suffix) else variant(path, 0, suffix), intrinsic_width(path)))
+    return ", ".join(f"{assets.url(file)} {width}w" for file, width in candidates if assets.get().get(file))
+
+
+def picture(path: str, *, dark: str = "", sizes: str = "100vw", alt: str = "") -> str:
+    """Template helper: a `<picture>` with WebP, and resized, variants, and a dark mode version."""
+    sources = []
+    for image, media in [(dark, ' media="(prefers-color-scheme: dark)"'), (path, "")]:
+        if not image:
+            continue
+        if webp := srcset(image, ".webp"):
+            sources.append(f'<source type="image/webp" srcset="{webp}" sizes="{sizes}"{media}>')
+        if media:
+            sources.append(f'<source srcset="{srcset(image, Path(image).suffix)}" sizes="{sizes}"{media}>')
+    return (
+        f"<picture>{''.join(sources)}"
+        f'<img src="{assets.url(path)}" srcset="{srcset(path, Path(path).suffix)}" sizes="{sizes}"'
+        f' loading="lazy" alt="{alt}"/></picture>'
+    )
+
+
+def brand(name: str, width: int, height: int, *, alt: str, title: str) -> str:
+    """Template helper: a brand logo, from the sprite."""
+    return (
+        f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" role="img" aria-label="{alt}">'
+        f'<title>{title}</title><use href="{assets.url(f"img/{SPRITE}")}#{name}"/></svg>'
+    )
+
+
+if __name__ == "__main__":
+    for file in build():
+        print(file.stat().st_size, file.relative_to(constants.ASSET))
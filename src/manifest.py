@@ -0,0 +1,124 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+
+from src import catalog, constants
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Entry:
+    path: Path
+    size: int
+    mtime: float
+    sha256: str = ""  # From the `.sha256` sidecar file, if any
+
+
+# (mtime in ns, entries by file name)
+Folder = tuple[int, dict[str, Entry]]
+
+
+def read_checksum(file: Path) -> str:
+    """Read a `.sha256` sidecar file, either a bare checksum, or the `sha256sum` output."""
+    try:
+        content = file.read_text(encoding=constants.ENCODING).split()
+    except FileNotFoundError:
+        return ""
+    return content[0].lower() if content else ""
+
+
+def scan_folder(folder: Path) -> dict[str, Entry]:
+    entries: dict[str, Entry] = {}
+    with os.scandir(folder) as it:
+        files = [entry for entry in it if entry.is_file()]
+    names = {entry.name for entry in files}
+    for entry in files:
+        if entry.name.endswith(".sha256"):
+            continue
+        stat = entry.stat()
+        sidecar = f"{entry.name}.sha256"
+        entries[entry.name] = Entry(
+            Path(entry.path),
+            stat.st_size,
+            stat.st_mtime,
+            sha256=read_checksum(folder / sidecar) if sidecar in names else "",
+        )
+    return entries
+
+
+class FileManifest:
+    """In-memory index of dictionary files (`FILES/<lang_src>/<lang_dst>/<file>`).
+
+    It is refreshed at most every `FILES_MANIFEST_TTL_IN_SEC`, and only folders whose mtime changed are scanned again.
+    Files are expected to be replaced atomically (like `rsync` does), so that their folder mtime changes.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.folders: dict[tuple[str, str], Folder] = {}
+        self.refreshed_at = float("-inf")
+        self._lock = Lock()
+
+    def invalidate(self) -> None:
+        """Force a full scan on next access."""
+        self.folders = {}
+        self.refreshed_at = float("-inf")
+
+    def is_outdated(self) -> bool:
+        return time.monotonic() - self.refreshed_at >= constants.FILES_MANIFEST_TTL_IN_SEC
+
+    def refresh(self) -> None:
+        folders: dict[tuple[str, str], Folder] = {}
+        scanned = 0
+        with os.scandir(self.root) as langs_src:
+            for lang_src in langs_src:
+                if not lang_src.is_dir():
+                    continue
+                with os.scandir(lang_src.path) as langs_dst:
+                    for lang_dst in langs_dst:
+                        if not lang_dst.is_dir():
+                            continue
+                        key = (lang_src.name, lang_dst.name)
+                        mtime = lang_dst.stat().st_mtime_ns
+                        if (known := self.folders.get(key)) and known[0] == mtime:
+                            folders[key] = known
+                        else:
+                            folders[key] = (mtime, scan_folder(Path(lang_dst.path)))
+                            scanned += 1
+        self.folders = folders
+        self.refreshed_at = time.monotonic()
+        log.debug("Refreshed the files manifest of %s (%d folder(s) scanned)", self.root, scanned)
+
+    def get(self, lang_src: str, lang_dst: str, file_name: str) -> Entry | None:
+        if self.is_outdated():
+            with self._lock:
+                if self.is_outdated():
+                    self.refresh()
+        if folder := self.folders.get((lang_src, lang_dst)):
+            return folder[1].get(file_name)
+        return None
+
+
+_MANIFEST: FileManifest | None = None
+
+
+def get() -> FileManifest:
+    global _MANIFEST  # noqa: PLW0603
+
+    if _MANIFEST is None or _MANIFEST.root != constants.FILES:
+        _MANIFEST = FileManifest(constants.FILES)
+    return _MANIFEST
+
+
+def lookup(lang_src: str, lang_dst: str, file_name: str) -> Entry | None:
+    return get().get(lang_src, lang_dst, file_name)
+
+
+@catalog.on_change
+def invalidate_manifest(changes: catalog.Changes) -> None:  # noqa: ARG001
+    """A catalog update comes with new dictionary files."""
+    get().invalidate()
@@ -0,0 +1,160 @@
+"""Pages rendered, minified, and compressed at release time (see `prerender.py`).
+
+The store lives in `STATIC`: a `manifest.json` file mapping URL paths to pages,
+and pages content, named by their digest, with their `.br`, and `.gz`, variants.
+"""
+
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import wraps
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+import bottle
+
+from src import assets, catalog, compression, constants, manifest, templates
+
+log = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+
+@dataclass
+class Page:
+    digest: str
+    catalog: str = ""  # Digest of the catalog the page was rendered from, if it depends on it
+    data: dict[str, int] = field(default_factory=dict)  # Data files the page depends on (`constants` name -> mtime)
+    # Dictionary files the page depends on ("<lang_src>/<lang_dst>/<file>" -> mtime, from the files manifest)
+    files: dict[str, float] = field(default_factory=dict)
+
+    def is_fresh(self) -> bool:
+        if self.catalog and self.catalog != catalog.snapshot().digest:
+            return False
+        for key, mtime in self.files.items():
+            lang_src, lang_dst, file_name = key.split("/", 2)
+            if not (entry := manifest.lookup(lang_src, lang_dst, file_name)) or entry.mtime != mtime:
+                return False
+        for name, mtime in self.data.items():
+            try:
+                if getattr(constants, name).stat().st_mtime_ns != mtime:
+                    return False
+            except FileNotFoundError:
+                return False
+        return True
+
+
+def page_file(root: Path, digest: str) -> Path:
+    return root / f"{digest}.html"
+
+
+def data_files_mtimes(names: list[str]) -> dict[str, int]:
+    return {name: getattr(constants, name).stat().st_mtime_ns for name in names}
+
+
+class Store:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.manifest = root / MANIFEST
+        self.pages: dict[str, Page] = {}
+        self.variants: dict[str, compression.Variants] = {}
+        self._mtime = 0
+        self._lock = Lock()
+
+    def reload(self) -> None:
+        """Reload the manifest if it changed. Pages built from other templates, or assets, are ignored."""
+        try:
+            mtime = self.manifest.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.pages, self._mtime = {}, 0
+            return
+
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            content = json.loads(self.manifest.read_text(encoding=constants.ENCODING))
+            if content["templates"] == templates.digest() and content["assets"] == assets.digest():
+                self.pages = {path: Page(**page) for path, page in content["pages"].items()}
+            else:
+                log.warning("Pre-rendered pages were built from other templates, or assets, they are ignored.")
+                self.pages = {}
+            self.variants = {digest: variants for digest, variants in self.variants.items() if digest in self.pages}
+            self._mtime = mtime
+
+    def load(self, digest: str) -> compression.Variants:
+        if (variants := self.variants.get(digest)) is None:
+            file = page_file(self.root, digest)
+            encoded = {
+                encoding: file.with_name(f"{file.name}{suffix}").read_bytes()
+                for encoding, suffix in compression.SUFFIXES.items()
+            }
+            variants = self.variants[digest] = compression.Variants(file.read_bytes(), encoded=encoded)
+        return variants
+
+    def get(self, path: str) -> compression.Variants | None:
+        """Return the pre-rendered page for the given URL `path`, if any, and still fresh."""
+        self.reload()
+        if not (page := self.pages.get(path)) or not page.is_fresh():
+            return None
+        try:
+            return self.load(page.digest)
+        except FileNotFoundError:
+            # The store was rebuilt in between
+            return None
+
+
+_STORE: Store | None = None
+
+
+def get() -> Store:
+    global _STORE  # noqa: PLW0603
+
+    if _STORE is None or _STORE.root != constants.STATIC:
+        _STORE = Store(constants.STATIC)
+    return _STORE
+
+
+def serve(func: Callable) -> Callable:
+    """Decorator to serve the pre-rendered version of a page, when available. Otherwise, the page is rendered."""
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> bytes | str:  # noqa: ANN401
+        if not bottle.DEBUG and (variants := get().get(bottle.request.path)):
+            return compression.send(variants, "text/html; charset=UTF-8")
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def write(root: Path, pages: dict[str, tuple[str, Page]]) -> None:
+    """Write pages (URL path -> (HTML, page details)), then atomically replace the manifest. Stale files are removed."""
+    root.mkdir(parents=True, exist_ok=True)
+    for html, page in pages.values():
+        variants = compression.Variants(html.encode())
+        file = page_file(root, page.digest)
+        file.write_bytes(variants.content)
+        for encoding, suffix in compression.SUFFIXES.items():
+            file.with_name(f"{file.name}{suffix}").write_bytes(variants.encoded[encoding])
+
+    manifest = root / MANIFEST
+    tmp_file = manifest.with_suffix(f"{manifest.suffix}.tmp")
+    tmp_file.write_text(
+        json.dumps(
+            {
+                "templates": templates.digest(),
+                "assets": assets.digest(),
+                "pages": {path: vars(page) for path, (_, page) in sorted(pages.items())},
+            },
+            indent=4,
+        ),
+        encoding=constants.ENCODING,
+    )
+    tmp_file.replace(manifest)
+
+    digests = {page.digest for _, page in pages.values()}
+    for file in root.glob("*.html*"):
+        if file.name.split(".", 1)[0] not in digests:
+            file.unlink()
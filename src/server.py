@@ -1,28 +1,75 @@
 import json
 import logging
-import uuid
+import random
+from collections.abc import Callable, Iterator
+from contextlib import suppress
 from datetime import UTC, datetime
+from functools import lru_cache, wraps
+from pathlib import Path
 from typing import Any
 
 import bottle
 import bottle_file_cache
 import minify_html
-import rcssmin
-import rjsmin
 import secure
 import ulid
 
-from src import __version__, cache, constants, handlers, metrics, utils
+from src import (
+    assets,
+    catalog,
+    compression,
+    constants,
+    files,
+    handlers,
+    http_cache,
+    manifest,
+    metrics,
+    prerendered,
+    styles,
+    templates,
+    tokens,
+    utils,
+)
+from src.models import Dictionary, Link
 
 log = logging.getLogger(__name__)
 app = bottle.default_app()
+application = compression.Middleware(app)
+
+
+def dictionary_exists(lang_src: str, lang_dst: str) -> bool:
+    return bool(utils.get_dictionary_metadata(lang_src, lang_dst, keys=constants.DICTIONARY_KEYS_DOWNLOAD))
+
+
+TEXT_FILES_POLICY = http_cache.Policy(max_age=constants.HTTP_CACHE_TEXT_FILES_MAX_AGE_IN_SEC)
+CACHE_POLICIES = {
+    "/": http_cache.page(http_cache.CATALOG, "FAQ", "REVIEWS"),
+    "/download/<lang>": http_cache.page(http_cache.CATALOG, exists=lambda lang: dictionary_exists(lang, lang)),
+    "/download/<lang_src>/<lang_dst>": http_cache.Policy(max_age=0, private=True),
+    "/enjoy": http_cache.page(),
+    "/get/<lang_src>/<lang_dst>": http_cache.page(http_cache.CATALOG, exists=dictionary_exists),
+    "/hall-of-fame": http_cache.page(),
+    "/legal-mentions": http_cache.page(),
+    "/list": http_cache.page(http_cache.CATALOG),
+    "/sponsors": http_cache.page("SPONSORS", http_cache.TODAY),
+    "/ads.txt": TEXT_FILES_POLICY,
+    "/humans.txt": TEXT_FILES_POLICY,
+    "/robots.txt": TEXT_FILES_POLICY,
+    "/.well-known/security.txt": TEXT_FILES_POLICY,
+    "/sitemap.xml": TEXT_FILES_POLICY,
+    constants.ROUTE_API_DICT: http_cache.Policy(
+        max_age=constants.HTTP_CACHE_PAGES_MAX_AGE_IN_SEC,
+        stale_while_revalidate=constants.HTTP_CACHE_STALE_IN_SEC,
+    ),
+}
+app.install(http_cache.Plugin(CACHE_POLICIES))
 CSP_NONCE = str(ulid.ULID())
 
-# Inspired from `secure.Preset.STRICT` + tweaks for inline font
+# Inspired from `secure.Preset.STRICT` + tweaks for inline font, and inline critical styles (allowed by their hash)
 secure_headers = secure.Secure(
     coep=secure.CrossOriginEmbedderPolicy().unsafe_none(),
     coop=secure.CrossOriginOpenerPolicy().same_origin_allow_popups(),
-    csp=secure.ContentSecurityPolicy().style_src("'self'"),
+    csp=secure.ContentSecurityPolicy().style_src("'self'", *styles.get().csp_sources()),
     hsts=secure.StrictTransportSecurity().max_age(63072000).include_subdomains().preload(),
     permissions=secure.PermissionsPolicy().geolocation().microphone().camera(),
     referrer=secure.ReferrerPolicy().strict_origin_when_cross_origin(),
@@ -36,23 +83,154 @@ YEAR = datetime.now(tz=UTC).year
 SUPPORTED_LOCALES = ["ca", "da", "de", "el", "en", "eo", "es", "fr", "it", "no", "pt", "ro", "ru", "sv", "zh"]
 LOCALES = rf"({'|'.join(SUPPORTED_LOCALES)})"
 
+# Stands for the links block of the download page layout, replaced on each request (see `render_download()`)
+DOWNLOAD_LINKS = "__DOWNLOAD_LINKS__"
+
+
+def send_text_file(name: str) -> bytes:
+    return files.send_compressed(name, constants.ASSET)
+
 
 def client_ip() -> str:
     return bottle.request.remote_addr or "unknown"
 
 
-def render(tpl: str, **kwargs: Any) -> str:  # noqa: ANN401
-    """Call the renderer with several common variables."""
-    variables = {
+def common_variables() -> dict[str, Any]:
+    return {
         "constants": constants,
         "debug": bottle.DEBUG,
         "title": constants.HEADER_SLOGAN,
         "language": utils.language,
         "url_pure": bottle.request.url.split("?", 1)[0],
-        "version": uuid.uuid4() if bottle.DEBUG else __version__,
         "year": YEAR,
-    } | kwargs
-    return minify_html.minify(bottle.jinja2_template(tpl, template_lookup=[constants.VIEW], **variables))
+    }
+
+
+def render(tpl: str, **kwargs: Any) -> str:  # noqa: ANN401
+    """Call the renderer with several common variables."""
+    return minify_html.minify(templates.render(tpl, reload=bottle.DEBUG, **(common_variables() | kwargs)))
+
+
+def render_stream(tpl: str, **kwargs: Any) -> Iterator[str]:  # noqa: ANN401
+    """Same as `render()`, but minified parts are sent as soon as rendered (the `<head>` first)."""
+    for part in templates.stream(tpl, reload=bottle.DEBUG, **(common_variables() | kwargs)):
+        yield minify_html.minify(part)
+
+
+def send_cached(key: str, content: str) -> bytes:
+    """Send a cached page with its precompressed variants, stored next to the cache entry."""
+    variants = compression.stored_variants(bottle_file_cache.get_file(key), content.encode())
+    return compression.send(variants, "text/html; charset=UTF-8")
+
+
+def cache_page(**cache_kwargs: list[str]) -> Callable:
+    """Same as `bottle_file_cache.cache()`, sending the page with its stored variants (see `send_cached()`)."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> str | bytes:  # noqa: ANN401
+            if bottle.DEBUG or bottle.request.method not in bottle_file_cache.CONFIG.http_methods:
+                return func(*args, **kwargs)
+
+            # The same key as `bottle_file_cache.cache()`, so that `invalidate_cached_pages()` finds it
+            text = bottle.request.path
+            for attr, values in cache_kwargs.items():
+                req_attr = getattr(bottle.request, attr)
+                text += "".join(f"-{req_attr.get(value, '')}" for value in values)
+            key = bottle_file_cache.compute_key(text)
+            content = bottle_file_cache.read(key) or bottle_file_cache.create(key, func(*args, **kwargs))
+            return send_cached(key, content)
+
+        return wrapper
+
+    return decorator
+
+
+def stream_cached(text: str, render_parts: Callable[[], Iterator[str]]) -> bytes | Iterator[str]:
+    """Send the page cached under the `text` key, else stream it from `render_parts()`, and store it once fully sent."""
+    if bottle.DEBUG:
+        return render_parts()
+
+    key = bottle_file_cache.compute_key(text)
+    if (content := bottle_file_cache.read(key)) is not None:
+        return send_cached(key, content)
+
+    def tee(parts: Iterator[str]) -> Iterator[str]:
+        sent = []
+        for part in parts:
+            sent.append(part)
+            yield part
+        bottle_file_cache.create(key, "".join(sent))
+
+    return tee(render_parts())
+
+
+def cache_stream(func: Callable) -> Callable:
+    """Same as `cache_page()`, for streamed routes."""
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> bytes | Iterator[str]:  # noqa: ANN401
+        return stream_cached(bottle.request.path, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+def home_cache_key(variant: int) -> str:
+    return f"/-{variant}"
+
+
+@lru_cache(maxsize=512)
+def render_download_layout(url_pure: str, title: str, name: str, words: int, last_updated: str) -> tuple[str, str]:
+    """Render the download page of a dictionary, split around its links block.
+
+    Only order links change from one customer to another, everything else is rendered once per dictionary update.
+    """
+    page = render(
+        "download",
+        dictionary={"name": name, "words": words},
+        last_updated=last_updated,
+        links=DOWNLOAD_LINKS,
+        title=title,
+        url_pure=url_pure,
+    )
+    before, _, after = page.partition(DOWNLOAD_LINKS)
+    return before, after
+
+
+def render_download(dictionary: Dictionary, links: dict[str, Link], title: str, bundle: Link | None = None) -> str:
+    """Render the download page: a cached layout, and the links block."""
+    layout = render_download_layout.__wrapped__ if bottle.DEBUG else render_download_layout
+    before, after = layout(
+        bottle.request.url.split("?", 1)[0],
+        title,
+        str(dictionary["name"]),
+        int(dictionary["words"]),
+        utils.get_last_modification_time(dictionary),
+    )
+    fragment = minify_html.minify(templates.render("download-links", reload=bottle.DEBUG, links=links, bundle=bundle))
+    return f"{before}{fragment}{after}"
+
+
+@catalog.on_change
+def invalidate_cached_pages(changes: catalog.Changes) -> None:
+    """Drop cached pages depending on changed dictionaries, other pages are kept warm."""
+    paths = {"/", "/list"} if changes.added or changes.removed else set()
+    for name in changes.affected(constants.DICTIONARY_KEYS_DOWNLOAD):
+        lang_src, lang_dst = name.split("-", 1)
+        paths.add(f"/download/{lang_src}" if lang_src == lang_dst else f"/get/{lang_src}/{lang_dst}")
+
+    for path in sorted(paths):
+        texts = [home_cache_key(variant) for variant in range(constants.HOME_VARIANTS)] if path == "/" else [path]
+        for text in texts:
+            bottle_file_cache.delete(bottle_file_cache.compute_key(text))
+    log.info("Invalidated %d cached page(s): %s", len(paths), ", ".join(sorted(paths)))
+
+
+@app.hook("before_request")
+def revalidate_catalog() -> None:
+    """Catch catalog changes before any cached page is served."""
+    with suppress(FileNotFoundError):
+        catalog.snapshot()
 
 
 @app.hook("after_request")
@@ -65,6 +243,7 @@ def add_security_headers() -> None:
 @app.error(403)
 @app.error(404)
 @app.error(410)
+@app.error(503)
 def custom_error(error: bottle.HTTPError) -> str:
     match error.status_code:
         case 400:
@@ -73,20 +252,21 @@ def custom_error(error: bottle.HTTPError) -> str:
             msg = "This link does not grant access to that dictionary."
         case 410:
             msg = "The link to the file you requested has either expired, or never existed."
+        case 503:
+            msg = "Too many downloads are running at the moment, please retry in a minute."
         case _:  # 404, and others
             msg = "The page you are looking for does not exist."
     return render("error", title="Error", msg=msg)
 
 
 @app.get(constants.ROUTE_API_DICT)
-@bottle_file_cache.cache()
-def api_dictionary_get() -> str:
-    bottle.response.content_type = "application/json"
-    return json.dumps(
-        utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_MINIMAL),
-        check_circular=False,
-        separators=(",", ":"),
-    )
+def api_dictionary_get() -> bytes:
+    snapshot = catalog.snapshot()
+    bottle.response.set_header("Catalog-Generation", str(snapshot.generation))
+    if (since := bottle.request.query.get("since", "")).isdigit() and (delta := snapshot.delta(int(since))):
+        bottle.response.set_header("Catalog-Delta", since)
+        return compression.send(delta, "application/json")
+    return compression.send(snapshot.api_payload, "application/json")
 
 
 @app.get(f"{constants.ROUTE_API_PRE_ORDER}/<lang_src>/<lang_dst>")
@@ -120,42 +300,50 @@ def api_webhook(source: str) -> str:
 
 
 @app.get(r"/asset/style/<file:re:\w+\.css>")
-# @bottle_file_cache.cache(params=["v"])
-def asset_css(file: str) -> bottle.HTTPResponse:
-    try:
-        content = (constants.ASSET / "style" / file).read_text(encoding=constants.ENCODING)
-    except FileNotFoundError:
-        raise bottle.HTTPError(status=404) from None
+def asset_css(file: str) -> bytes:
+    return assets.send_minified("style", file)
 
-    cache_file = constants.FILES_CACHE / f"{file}.min.css"
-    cache_file.write_text(rcssmin.cssmin(content), encoding=constants.ENCODING)
 
-    response = bottle.static_file(cache_file.name, root=constants.FILES_CACHE)
-    response.set_header("Cache-Control", "public, max-age=31536000, immutable")
-    return response
+@app.get(r"/asset/bundle/<name:re:\w+>.css")
+def asset_bundle(name: str) -> bytes:
+    if not (bundle := styles.get().get(name)):
+        raise bottle.HTTPError(status=404)
+
+    body = compression.send(bundle.variants, "text/css; charset=UTF-8")
+    version = bottle.request.query.get("v", "")
+    bottle.response.set_header(
+        "Cache-Control",
+        assets.CACHE_CONTROL_IMMUTABLE if version == bundle.fingerprint else assets.CACHE_CONTROL_OUTDATED,
+    )
+    return body
 
 
 @app.get(r"/asset/script/<file:re:\w+\.js>")
-# @bottle_file_cache.cache(params=["v"])
-def asset_js(file: str) -> bottle.HTTPResponse:
-    try:
-        content = (constants.ASSET / "script" / file).read_text(encoding=constants.ENCODING)
-    except FileNotFoundError:
-        raise bottle.HTTPError(status=404) from None
+def asset_js(file: str) -> bytes:
+    return assets.send_minified("script", file)
 
-    cache_file = constants.FILES_CACHE / f"{file}.min.js"
-    cache_file.write_text(rjsmin.jsmin(content), encoding=constants.ENCODING)
 
-    response = bottle.static_file(cache_file.name, root=constants.FILES_CACHE)
-    response.set_header("Cache-Control", "public, max-age=31536000, immutable")
+@app.get("/asset/<kind>/<file>")
+def asset(kind: str, file: str) -> bytes | bottle.HTTPResponse:
+    cache_control = assets.cache_control(f"{kind}/{file}", bottle.request.query.get("v", ""))
+    if Path(file).suffix in files.COMPRESSED_SUFFIXES:
+        body = files.send_compressed(file, constants.ASSET / kind)
+        bottle.response.set_header("Cache-Control", cache_control)
+        return body
+
+    response = files.send(file, constants.ASSET / kind)
+    response.set_header("Cache-Control", cache_control)
     return response
 
 
-@app.get("/asset/<kind>/<file>")
-def asset(kind: str, file: str) -> bottle.HTTPResponse:
-    response = bottle.static_file(file, root=constants.ASSET / kind)
-    response.set_header("Cache-Control", "public, max-age=31536000, immutable")
-    return response
+def send_bundle(
+    lang_src: str, lang_dst: str, file_name: str, headers: dict[str, str] | None = None
+) -> bottle.HTTPResponse:
+    """Send files of a dictionary in one ZIP file: all available formats, or the ones in the `formats` parameter."""
+    formats = [fmt for fmt in bottle.request.query.get("formats", "").split(",") if fmt]
+    if not (entries := utils.get_bundle_files(lang_src, lang_dst, file_name, formats)):
+        raise bottle.HTTPError(status=404) from None
+    return files.send_bundle(file_name, entries, headers=headers)
 
 
 @app.get("/file/<lang>/<file_name>")
@@ -165,25 +353,33 @@ def download_monolingual(lang: str, file_name: str) -> bottle.HTTPResponse:
     except FileNotFoundError:
         raise bottle.HTTPError(status=404) from None
 
-    if not (constants.FILES / lang / lang / file_name).is_file():
+    if fmt == constants.DICTIONARY_BUNDLE_FORMAT:
+        response = send_bundle(lang, lang, file_name)
+    elif entry := manifest.lookup(lang, lang, file_name):
+        response = files.send_download(entry, base=bottle.request.query.get("from", ""))
+    else:
         raise bottle.HTTPError(status=404) from None
 
     etym = "noetym" if "noetym" in file_name else "full"
     metrics.plus_one(f"{lang}-{lang}", fmt, etym)
-    return bottle.static_file(file_name, root=constants.FILES / lang / lang, download=True)
+    return response
 
 
 @app.get("/file/<uid>")
 def download_bilingual(uid: str) -> bottle.HTTPResponse:
     try:
-        order_type, order_id, lang_src, lang_dst, file_name, fmt = cache.get(uid)
-    except cache.CacheError:
-        log.warning("File cache expired, or inexistant: %s", uid)
+        order_type, order_id, lang_src, lang_dst, file_name, fmt = tokens.verify(uid)
+    except tokens.TokenError:
+        log.warning("File link expired, or invalid: %s", uid)
         raise bottle.HTTPError(status=410) from None
 
-    folder = constants.FILES / lang_src / lang_dst
+    headers = {"File-Source": order_type}
 
-    if not (folder / file_name).is_file():
+    if fmt == constants.DICTIONARY_BUNDLE_FORMAT:
+        response = send_bundle(lang_src, lang_dst, file_name, headers=headers)
+    elif entry := manifest.lookup(lang_src, lang_dst, file_name):
+        response = files.send_download(entry, headers=headers, base=bottle.request.query.get("from", ""))
+    else:
         log.critical("A file is missing in the %s-%s dictionary: %s", lang_src, lang_dst, file_name)
         raise bottle.HTTPError(status=404) from None
 
@@ -192,34 +388,24 @@ def download_bilingual(uid: str) -> bottle.HTTPResponse:
     etym = "noetym" if "noetym" in file_name else "full"
     metrics.plus_one(f"{lang_src}-{lang_dst}", fmt, etym)
 
-    headers = {"File-Source": order_type}
-    return bottle.static_file(file_name, root=folder, download=True, headers=headers)
+    return response
 
 
 @app.get("/download/<lang>")
-@bottle_file_cache.cache()
+@prerendered.serve
+@cache_page()
 def downloads_monolingual(lang: str) -> str:
-    try:
-        dictionary = utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_DOWNLOAD)[lang][lang]
-    except KeyError:
-        log.error(  # noqa: TRY400
-            "[/download monolingual] The dictionary %s-%s does not exist, or is disabled", lang, lang
-        )
+    if not (dictionary := utils.get_dictionary_metadata(lang, lang, keys=constants.DICTIONARY_KEYS_DOWNLOAD)):
+        log.error("[/download monolingual] The dictionary %s-%s does not exist, or is disabled", lang, lang)
         raise bottle.HTTPError(status=404) from None
 
     links = utils.craft_downloads_url(dictionary)
-    last_updated = utils.get_last_modification_time(dictionary)
-    return render(
-        "download",
-        dictionary=dictionary,
-        last_updated=last_updated,
-        links=links,
-        title=f"{utils.language(lang)} monolingual dictionary",
-    )
+    bundle = utils.craft_bundle_url(dictionary)
+    return render_download(dictionary, links, f"{utils.language(lang)} monolingual dictionary", bundle=bundle)
 
 
 @app.get("/download/<lang_src>/<lang_dst>")
-@bottle_file_cache.cache(params=["order", "checkpoint", "subscription"])
+@cache_page(params=["order", "checkpoint", "subscription"])
 def downloads_bilingual(lang_src: str, lang_dst: str) -> str:
     params = bottle.request.params
     ip_addr = client_ip()
@@ -267,6 +453,7 @@ def downloads_bilingual(lang_src: str, lang_dst: str) -> str:
         raise bottle.HTTPError(status=403) from None
 
     links = utils.craft_downloads_url(dictionary, order_type=order.type, order_id=order.id)
+    bundle = utils.craft_bundle_url(dictionary, order_type=order.type, order_id=order.id)
     localized_dst = utils.language(lang_dst)
     localized_src = utils.language(lang_src)
     title = (
@@ -274,19 +461,15 @@ def downloads_bilingual(lang_src: str, lang_dst: str) -> str:
         if lang_src == "all"
         else f"{localized_src} - {localized_dst} bilingual dictionary"
     )
-    last_updated = utils.get_last_modification_time(dictionary)
-    return render("download", dictionary=dictionary, last_updated=last_updated, links=links, title=title)
+    return render_download(dictionary, links, title, bundle=bundle)
 
 
 @app.get("/get/<lang_src>/<lang_dst>")
-@bottle_file_cache.cache()
+@cache_page()
 def landing_page_bilingual(lang_src: str, lang_dst: str) -> str:
-    try:
-        dictionary = utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_DOWNLOAD)[lang_src][lang_dst]
-    except KeyError:
-        log.error(  # noqa: TRY400
-            "[/get bilingual] The dictionary %s-%s does not exist, or is disabled", lang_src, lang_dst
-        )
+    dictionary = utils.get_dictionary_metadata(lang_src, lang_dst, keys=constants.DICTIONARY_KEYS_DOWNLOAD)
+    if not dictionary:
+        log.error("[/get bilingual] The dictionary %s-%s does not exist, or is disabled", lang_src, lang_dst)
         raise bottle.HTTPError(status=404) from None
 
     localized_dst = utils.language(lang_dst)
@@ -300,72 +483,80 @@ def landing_page_bilingual(lang_src: str, lang_dst: str) -> str:
 
 
 @app.get("/enjoy")
-@bottle_file_cache.cache()
+@prerendered.serve
+@cache_page()
 def enjoy() -> str:
     return render("enjoy")
 
 
 @app.get("/hall-of-fame")
-@bottle_file_cache.cache()
+@prerendered.serve
+@cache_page()
 def hall_of_fame() -> str:
     return render("hall-of-fame", title="Hall of Fame")
 
 
 @app.get("/")
-@bottle_file_cache.cache()
-def home() -> str:
-    return render(
-        "home",
-        dictionaries=utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_MINIMAL),
-        faq_json=utils.get_faq(),
-        reviews=utils.create_dictionary_links(utils.random_reviews(2)),
+def home() -> bytes | Iterator[str]:
+    # Each variant shows its own reviews, and is cached on its own
+    variant = random.randrange(constants.HOME_VARIANTS)  # noqa: S311
+    return stream_cached(
+        home_cache_key(variant),
+        lambda: render_stream(
+            "home",
+            dictionaries=utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_MINIMAL),
+            faq_json=utils.get_faq(),
+            reviews=utils.random_reviews(2, seed=variant),
+        ),
     )
 
 
 @app.get("/legal-mentions")
-@bottle_file_cache.cache()
+@prerendered.serve
+@cache_page()
 def legal_mentions() -> str:
     return render("legal-mentions")
 
 
 @app.get("/list")
-@bottle_file_cache.cache()
-def list_all() -> str:
-    return render(
+@prerendered.serve
+@cache_stream
+def list_all() -> Iterator[str]:
+    return render_stream(
         "list",
         dictionaries=utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_MINIMAL),
     )
 
 
 @app.get("/sponsors")
-@bottle_file_cache.cache()
+@cache_page()
 def sponsors() -> str:
     return render("sponsor", sponsors=utils.load_sponsors())
 
 
 @app.get("/ads.txt")
-def ads() -> bottle.HTTPResponse:
-    return bottle.static_file("ads.txt", root=constants.ASSET)
+def ads() -> bytes:
+    return send_text_file("ads.txt")
 
 
 @app.get("/humans.txt")
-def humans() -> bottle.HTTPResponse:
-    return bottle.static_file("humans.txt", root=constants.ASSET)
+def humans() -> bytes:
+    return send_text_file("humans.txt")
 
 
 @app.get("/robots.txt")
-def robots() -> bottle.HTTPResponse:
-    return bottle.static_file("robots.txt", root=constants.ASSET)
+def robots() -> bytes:
+    return send_text_file("robots.txt")
 
 
 @app.get("/.well-known/security.txt")
-def security() -> bottle.HTTPResponse:
-    return bottle.static_file("security.txt", root=constants.ASSET)
+def security() -> bytes:
+    return send_text_file("security.txt")
 
 
 @app.get("/sitemap.xml")
-def sitemap() -> bottle.HTTPResponse:
-    return bottle.static_file("sitemap.xml", root=constants.ASSET)
+def sitemap() -> bytes:
+    return send_text_file("sitemap.xml")
 
 
 def main() -> None:  # pragma: nocover
@@ -376,7 +567,9 @@ def main() -> None:  # pragma: nocover
         level=logging.DEBUG,
     )
 
-    bottle.run(server=constants.SERVER, host=constants.HOST, port=constants.PORT, debug=True, reloader=True)
+    bottle.run(
+        app=application, server=constants.SERVER, host=constants.HOST, port=constants.PORT, debug=True, reloader=True
+    )
 
 
 #
@@ -0,0 +1,232 @@
+"""Stylesheets bundled per template, with their critical part inlined in pages.
+
+The critical part of a stylesheet is made of rules that can apply above the fold: the `<head>`, and the header,
+of `base.tpl`, then the page content up to its first `{{ flush }}`. It is inlined in a `<style>` element, allowed
+by its hash in the CSP, so that the first paint only needs the HTML. The whole bundle is loaded without blocking.
+
+Bundles are built at deploy:
+
+    $ python -m src.styles
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+
+import bottle
+import jinja2
+import rcssmin
+
+from src import compression, constants
+
+log = logging.getLogger(__name__)
+
+BASE = "base.tpl"
+DEFAULT = "common"
+# Bundle name -> stylesheets it is made of
+BUNDLES = {
+    DEFAULT: ["common.css"],
+    "download": ["common.css", "download.css"],
+    "home": ["common.css", "home.css"],
+    "sponsor": ["common.css", "sponsor.css"],
+}
+# Template -> bundle name (templates not listed use the default bundle)
+PAGES = {"download.tpl": "download", "home.tpl": "home", "sponsor.tpl": "sponsor"}
+# Selectors always matching, whatever the page
+ALWAYS = {"*", "html", "body"}
+# Template helpers -> tags they emit (unseen in templates sources)
+HELPERS_TAGS = {"brand": {"svg", "title", "use"}, "picture": {"picture", "source", "img"}}
+
+FOLD_BASE_END = "{%- block content -%}"
+FOLD_END = "{{ flush }}"
+RE_CLASSES = re.compile(r'\bclass="([^"]*)"')
+RE_IDS = re.compile(r'\bid="([^"{]+)"')
+RE_TAGS = re.compile(r"<([a-zA-Z][\w-]*)")
+RE_JINJA = re.compile(r"{[{%].*?[%}]}")
+RE_HELPERS = re.compile(r"{{\s*(\w+)\(")
+RE_SELECTOR_IGNORED = re.compile(r"::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?|\[[^\]]*\]")
+RE_SELECTOR_TOKENS = re.compile(r"[.#]?-?[a-zA-Z_][\w-]*")
+RE_URL_RELATIVE = re.compile(r"url\((['\"]?)\.\./")
+
+
+@dataclass(frozen=True)
+class Bundle:
+    name: str
+    css: str
+
+    @property
+    def fingerprint(self) -> str:
+        return compression.content_hash(self.css.encode())[:12]
+
+    @property
+    def url(self) -> str:
+        return f"/asset/bundle/{self.name}.css?v={self.fingerprint}"
+
+    @cached_property
+    def variants(self) -> compression.Variants:
+        return compression.Variants(self.css.encode())
+
+
+def csp_source(css: str) -> str:
+    """CSP source allowing an inline `<style>` element with the given content."""
+    return f"'sha256-{base64.b64encode(hashlib.sha256(css.encode()).digest()).decode()}'"
+
+
+def bundle(files: list[str]) -> str:
+    """Concatenate, and minify, stylesheets. Relative URLs are made absolute, as the CSS may be inlined in pages."""
+    content = "\n".join((constants.ASSET / "style" / file).read_text(encoding=constants.ENCODING) for file in files)
+    return RE_URL_RELATIVE.sub(r"url(\1/asset/", rcssmin.cssmin(content))
+
+
+def bundle_name(template: str) -> str:
+    return PAGES.get(template, DEFAULT)
+
+
+def fold(template: str) -> str:
+    """Source of what is above the fold for the given template."""
+    base = (constants.VIEW / BASE).read_text(encoding=constants.ENCODING)
+    source = (constants.VIEW / template).read_text(encoding=constants.ENCODING)
+    return base.split(FOLD_BASE_END, 1)[0] + source.split(FOLD_END, 1)[0]
+
+
+def tokens(html: str) -> set[str]:
+    """Tags names, `.classes`, and `#ids`, used in the given (template) HTML."""
+    found = {tag for helper in RE_HELPERS.findall(html) for tag in HELPERS_TAGS.get(helper, ())} | ALWAYS
+    html = RE_JINJA.sub(" ", html)
+    found.update(tag.lower() for tag in RE_TAGS.findall(html))
+    found.update(f".{name}" for classes in RE_CLASSES.findall(html) for name in classes.split())
+    found.update(f"#{name.strip()}" for name in RE_IDS.findall(html))
+    return found
+
+
+def split(css: str, separator: str = ",") -> Iterator[str]:
+    """Split at the top-level `separator`, or at the end of each top-level rule when `separator` is `}`."""
+    depth, start = 0, 0
+    for idx, char in enumerate(css):
+        if char in "({":
+            depth += 1
+        elif char in ")}":
+            depth -= 1
+        if depth == 0 and char == separator:
+            yield css[start : idx + (separator == "}")]
+            start = idx + 1
+    if rest := css[start:].strip():
+        yield rest
+
+
+def matches(selector: str, found: set[str]) -> bool:
+    return all(token in found for token in RE_SELECTOR_TOKENS.findall(RE_SELECTOR_IGNORED.sub(" ", selector)))
+
+
+def critical(css: str, found: set[str]) -> str:
+    """Keep rules of the minified `css` that can match the `found` tokens.
+
+    Fonts embedded as data URIs are left to the deferred bundle, as they would weigh more than all other rules.
+    """
+    rules = []
+    for rule in split(css, "}"):
+        prelude, _, body = rule.partition("{")
+        body = body.removesuffix("}")
+        if prelude.startswith(("@media", "@supports")):
+            if inner := critical(body, found):
+                rules.append(f"{prelude}{{{inner}}}")
+        elif prelude == "@font-face":
+            if "data:" not in body:
+                rules.append(rule)
+        elif prelude.startswith("@"):
+            continue
+        elif selectors := [selector for selector in split(prelude) if matches(selector, found)]:
+            rules.append(f"{','.join(selectors)}{{{body}}}")
+    return "".join(rules)
+
+
+def templates() -> list[str]:
+    """Templates rendering a whole page."""
+    return sorted(
+        file.name
+        for file in constants.VIEW.glob("*.tpl")
+        if file.name == BASE or f'extends "{BASE}"' in file.read_text(encoding=constants.ENCODING)
+    )
+
+
+def build() -> dict[str, dict[str, str]]:
+    bundles = {name: bundle(files) for name, files in BUNDLES.items()}
+    inlined = {template: critical(bundles[bundle_name(template)], tokens(fold(template))) for template in templates()}
+    return {"bundles": bundles, "critical": inlined}
+
+
+class Styles:
+    def __init__(self, manifest: Path) -> None:
+        self.manifest = manifest
+        try:
+            content = json.loads(manifest.read_text(encoding=constants.ENCODING))
+        except FileNotFoundError:
+            log.warning("The styles manifest %s is missing, bundles are built at runtime.", manifest)
+            content = build()
+        self.bundles = {name: Bundle(name, css) for name, css in content["bundles"].items()}
+        self.critical: dict[str, str] = content["critical"]
+
+    def get(self, name: str) -> Bundle | None:
+        """Return a bundle, or `None` if it does not exist."""
+        if bottle.DEBUG and name in BUNDLES:
+            # Stylesheets are edited live in debug mode
+            return Bundle(name, bundle(BUNDLES[name]))
+        return self.bundles.get(name)
+
+    def csp_sources(self) -> list[str]:
+        return sorted({csp_source(css) for css in self.critical.values()})
+
+
+_STYLES: Styles | None = None
+
+
+def get() -> Styles:
+    global _STYLES  # noqa: PLW0603
+
+    if _STYLES is None or _STYLES.manifest != constants.STYLES_MANIFEST:
+        _STYLES = Styles(constants.STYLES_MANIFEST)
+    return _STYLES
+
+
+@jinja2.pass_context
+def stylesheet(context: jinja2.runtime.Context) -> str:
+    """Template helper: the stylesheet of the page being rendered, its critical part inlined, the rest deferred.
+
+    In debug mode, stylesheets are edited live: the bundle is linked as a regular stylesheet.
+    """
+    template = context.name or BASE
+    if bottle.DEBUG:
+        return f'<link rel="stylesheet" href="/asset/bundle/{bundle_name(template)}.css" />'
+
+    styles = get()
+    url = styles.bundles[bundle_name(template)].url
+    if (inlined := styles.critical.get(template)) is None:
+        # The template was added after the manifest was built
+        return f'<link rel="stylesheet" href="{url}" />'
+    return (
+        f"<style>{inlined}</style>"
+        f'<link rel="preload" href="{url}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        f'<noscript><link rel="stylesheet" href="{url}" /></noscript>'
+    )
+
+
+def save_manifest() -> dict[str, dict[str, str]]:
+    """Build bundles from current stylesheets, and templates."""
+    content = build()
+    manifest = constants.STYLES_MANIFEST
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = manifest.with_suffix(f"{manifest.suffix}.tmp")
+    tmp_file.write_text(json.dumps(content, indent=4), encoding=constants.ENCODING)
+    tmp_file.replace(manifest)
+    return content
+
+
+if __name__ == "__main__":
+    for template, css in save_manifest()["critical"].items():
+        print(f"{len(css):>6} {template}")
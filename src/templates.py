@@ -0,0 +1,98 @@
+"""Jinja2 templates environment, shared by all renders, and backed by a persistent bytecode cache.
+
+Assets URLs are emitted with `{{ asset('img/logo.svg') }}` (see `assets.url()`), and stylesheets with
+`{{ stylesheet() }}` (see `styles.stylesheet()`). Images have their helpers too (see `images.py`).
+Templates mark with `{{ flush }}` the points where a streamed render can send what it has so far (see `stream()`).
+
+Templates can be compiled ahead of time, at deploy:
+
+    $ python -m src.templates
+"""
+
+import hashlib
+import logging
+from collections.abc import Iterator
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+import jinja2
+
+from src import assets, constants, images, styles
+
+log = logging.getLogger(__name__)
+EXTENSION = ".tpl"
+FLUSH = "<!-- flush -->"
+
+
+def get() -> jinja2.Environment:
+    return create_env(constants.TEMPLATES_CACHE)
+
+
+@cache
+def create_env(cache_dir: Path) -> jinja2.Environment:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    env = jinja2.Environment(
+        # Same as Bottle: no autoescape, templates embed trusted HTML
+        autoescape=False,  # noqa: S701
+        loader=jinja2.FileSystemLoader(constants.VIEW, encoding=constants.ENCODING),
+        bytecode_cache=jinja2.FileSystemBytecodeCache(str(cache_dir)),
+        # Templates only change on deploy, which restarts workers
+        auto_reload=False,
+    )
+    env.globals["asset"] = assets.url
+    env.globals["stylesheet"] = styles.stylesheet
+    env.globals["picture"] = images.picture
+    env.globals["brand"] = images.brand
+    return env
+
+
+@cache
+def digest() -> str:
+    """Hash of all templates sources. Computed once per process, as templates only change on deploy."""
+    checksum = hashlib.sha256()
+    for file in sorted(constants.VIEW.glob(f"*{EXTENSION}")):
+        checksum.update(file.name.encode())
+        checksum.update(file.read_bytes())
+    return checksum.hexdigest()[:32]
+
+
+def get_template(name: str, *, reload: bool = False) -> jinja2.Template:
+    env = get()
+    if reload:
+        env.cache.clear()
+    return env.get_template(f"{name}{EXTENSION}")
+
+
+@cache
+def last_modified() -> float:
+    """Most recent modification time of templates. Computed once per process, as templates only change on deploy."""
+    return max(file.stat().st_mtime for file in constants.VIEW.glob(f"*{EXTENSION}"))
+
+
+def render(name: str, *, reload: bool = False, **variables: Any) -> str:  # noqa: ANN401
+    return get_template(name, reload=reload).render(flush="", **variables)
+
+
+def stream(name: str, *, reload: bool = False, **variables: Any) -> Iterator[str]:  # noqa: ANN401
+    """Render a template part by part, a part ending at each flush point."""
+    pending = ""
+    for chunk in get_template(name, reload=reload).generate(flush=FLUSH, **variables):
+        *parts, pending = (pending + chunk).split(FLUSH)
+        yield from filter(None, parts)
+    if pending:
+        yield pending
+
+
+def warm_up() -> list[str]:
+    """Load all templates, compiling only those missing from the bytecode cache."""
+    env = get()
+    names = env.list_templates(extensions=[EXTENSION.lstrip(".")])
+    for name in names:
+        env.get_template(name)
+    log.info("Warmed up %d templates", len(names))
+    return names
+
+
+if __name__ == "__main__":
+    print("\n".join(warm_up()))
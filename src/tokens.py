@@ -0,0 +1,63 @@
+"""Download links tokens: what to download, and until when, signed with HMAC-SHA256.
+
+Tokens are verified without any state: creating, or checking, one is pure CPU work.
+They are made of the URL-safe base64 encoded payload, and signature, separated by a dot.
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+
+from src import constants
+
+SEPARATOR = "|"
+# Keys derived from the pepper are specific to their usage
+KEY_USAGE = b"download-links"
+
+
+class TokenError(Exception):
+    pass
+
+
+class TokenExpiredError(TokenError):
+    pass
+
+
+class TokenInvalidError(TokenError):
+    pass
+
+
+def encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(f"{data}{'=' * (-len(data) % 4)}")
+
+
+def sign(payload: bytes) -> bytes:
+    key = hmac.digest(constants.PEPPER.encode(), KEY_USAGE, hashlib.sha256)
+    return hmac.digest(key, payload, hashlib.sha256)
+
+
+def create(order_type: str, order_id: str, lang_src: str, lang_dst: str, file_name: str, fmt: str) -> str:  # noqa: PLR0913
+    expiration = int(time.time()) + constants.DELAY_BEFORE_EXPIRATION_IN_SEC
+    payload = SEPARATOR.join([order_type, order_id, lang_src, lang_dst, file_name, fmt, str(expiration)]).encode()
+    return f"{encode(payload)}.{encode(sign(payload))}"
+
+
+def verify(token: str) -> list[str]:
+    """Return the token fields (order type, order ID, languages, file name, and format), if it is valid."""
+    try:
+        payload, signature = (decode(part) for part in token.split(".", 1))
+    except (ValueError, binascii.Error):
+        raise TokenInvalidError from None
+    if not hmac.compare_digest(sign(payload), signature):
+        raise TokenInvalidError
+
+    *fields, expiration = payload.decode().split(SEPARATOR)
+    if int(expiration) <= time.time():
+        raise TokenExpiredError
+    return fields
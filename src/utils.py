@@ -9,38 +9,76 @@ from datetime import UTC, datetime
 from email.headerregistry import Address
 from email.message import EmailMessage
 from email.utils import make_msgid
-from random import sample
+from pathlib import Path
+from random import Random
 from typing import Any
 
-from src import cache, constants, languages
+from src import catalog, constants, languages, manifest, tokens
 from src.models import Dictionaries, Dictionary, Link, Order, Reviews, Sponsor, Sponsors
 
 log = logging.getLogger(__name__)
 
+# Parsed data files: (file, parser) -> (mtime, data)
+_DATA_FILES: dict[tuple[Path, Callable], tuple[int, Any]] = {}
+
+
+def craft_link(  # noqa: PLR0913
+    lang_src: str,
+    lang_dst: str,
+    fmt: str,
+    pretty_fmt: str,
+    pattern: str,
+    *,
+    order_type: str = "",
+    order_id: str = "",
+) -> Link:
+    file_name_full = pattern.format(lang_src=lang_src, lang_dst=lang_dst, etym_suffix="")
+    file_name_noetym = pattern.format(lang_src=lang_src, lang_dst=lang_dst, etym_suffix="-noetym")
+    if not order_id and lang_src == lang_dst:
+        link_full = f"{lang_src}/{file_name_full}"
+        link_noetym = f"{lang_src}/{file_name_noetym}"
+    else:
+        link_full = tokens.create(order_type, order_id, lang_src, lang_dst, file_name_full, fmt)
+        link_noetym = tokens.create(order_type, order_id, lang_src, lang_dst, file_name_noetym, fmt)
+    return pretty_fmt, file_name_full, file_name_noetym, link_full, link_noetym
+
 
 def craft_downloads_url(dictionary: Dictionary, *, order_type: str = "", order_id: str = "") -> dict[str, Link]:
     lang_src, lang_dst = str(dictionary["name"]).split("-", 1)
-    mono = lang_src == lang_dst
     available_formats = str(dictionary["formats"]).split(",")
     links: dict[str, Link] = {}
 
     for fmt, (pretty_fmt, pattern) in constants.DICTIONARY_FORMATS.items():
         if fmt not in available_formats:
             continue
-
-        file_name_full = pattern.format(lang_src=lang_src, lang_dst=lang_dst, etym_suffix="")
-        file_name_noetym = pattern.format(lang_src=lang_src, lang_dst=lang_dst, etym_suffix="-noetym")
-        if not order_id and mono:
-            link_full = f"{lang_src}/{file_name_full}"
-            link_noetym = f"{lang_src}/{file_name_noetym}"
-        else:
-            link_full = cache.add(order_type, order_id, lang_src, lang_dst, file_name_full, fmt)
-            link_noetym = cache.add(order_type, order_id, lang_src, lang_dst, file_name_noetym, fmt)
-        links[fmt] = (pretty_fmt, file_name_full, file_name_noetym, link_full, link_noetym)
+        links[fmt] = craft_link(lang_src, lang_dst, fmt, pretty_fmt, pattern, order_type=order_type, order_id=order_id)
 
     return links
 
 
+def craft_bundle_url(dictionary: Dictionary, *, order_type: str = "", order_id: str = "") -> Link | None:
+    """Link to the ZIP file of all formats of a dictionary, if it has several."""
+    if len(str(dictionary["formats"]).split(",")) < 2:
+        return None
+    lang_src, lang_dst = str(dictionary["name"]).split("-", 1)
+    pretty_fmt, pattern = constants.DICTIONARY_BUNDLE
+    fmt = constants.DICTIONARY_BUNDLE_FORMAT
+    return craft_link(lang_src, lang_dst, fmt, pretty_fmt, pattern, order_type=order_type, order_id=order_id)
+
+
+def get_bundle_files(lang_src: str, lang_dst: str, file_name: str, formats: list[str]) -> list[manifest.Entry]:
+    """Files of a bundle, in the given formats (all of them if empty), that exist."""
+    etym_suffix = "-noetym" if "noetym" in file_name else ""
+    entries = []
+    for fmt, (_, pattern) in constants.DICTIONARY_FORMATS.items():
+        if formats and fmt not in formats:
+            continue
+        name = pattern.format(lang_src=lang_src, lang_dst=lang_dst, etym_suffix=etym_suffix)
+        if entry := manifest.lookup(lang_src, lang_dst, name):
+            entries.append(entry)
+    return entries
+
+
 def create_dictionary_links(reviews: list[dict]) -> list[dict]:
     for review in reviews:
         dictionaries = []
@@ -57,7 +95,8 @@ def create_dictionary_links(reviews: list[dict]) -> list[dict]:
 
 
 def get_format_from_file_name(lang: str, name: str) -> str:
-    for fmt, (_, pattern) in constants.DICTIONARY_FORMATS.items():
+    patterns = {**constants.DICTIONARY_FORMATS, constants.DICTIONARY_BUNDLE_FORMAT: constants.DICTIONARY_BUNDLE}
+    for fmt, (_, pattern) in patterns.items():
         if (
             pattern.format(lang_src=lang, lang_dst=lang, etym_suffix="") == name
             or pattern.format(lang_src=lang, lang_dst=lang, etym_suffix="-noetym") == name
@@ -72,11 +111,7 @@ def get_dictionaries() -> Dictionaries:
 
 def get_dictionary_from_key(key: str, value: str) -> Dictionary:
     """Find the dictionary related to the given `key`."""
-    for langs in load_dictionaries().values():
-        for details in langs.values():
-            if details[key] == value:
-                return details
-    return {}
+    return catalog.snapshot().find(key, value)
 
 
 def get_dictionary_from_langs(langs_pair: str) -> Dictionary:
@@ -85,29 +120,43 @@ def get_dictionary_from_langs(langs_pair: str) -> Dictionary:
         return {}
 
     lang_src, lang_dst = langs_pair.split("-", 1)
-    try:
-        return load_dictionaries()[lang_src][lang_dst]
-    except KeyError:
-        return {}
+    return catalog.snapshot().get(lang_src, lang_dst)
 
 
-def get_dictionary_metadata(lang_src: str, lang_dst: str) -> Dictionary:
-    try:
-        return load_dictionaries()[lang_src][lang_dst]
-    except KeyError:
-        return {}
+def get_dictionary_metadata(
+    lang_src: str, lang_dst: str, *, keys: list[str] = constants.DICTIONARY_KEYS_ALL
+) -> Dictionary:
+    return catalog.snapshot().get(lang_src, lang_dst, keys=keys)
+
+
+def load_data_file(file: Path, parse: Callable[[str], Any] = json.loads) -> Any:  # noqa: ANN401
+    """Parse a data file, only again when it changed. The result is shared, it must not be modified."""
+    mtime = file.stat().st_mtime_ns
+    key = (file, parse)
+    if (loaded := _DATA_FILES.get(key)) and loaded[0] == mtime:
+        return loaded[1]
+
+    data = parse(file.read_text(encoding=constants.ENCODING))
+    _DATA_FILES[key] = (mtime, data)
+    return data
 
 
 def get_faq() -> dict[str, str]:
-    return json.loads(constants.FAQ.read_text(encoding=constants.ENCODING))
+    return load_data_file(constants.FAQ)
+
+
+def get_stardict_file(lang_src: str, lang_dst: str) -> manifest.Entry:
+    """Return the StarDict file of a dictionary, whose modification time is the dictionary one."""
+    stardict = constants.DICTIONARY_FORMATS["stardict"][1].format(lang_src=lang_src, lang_dst=lang_dst, etym_suffix="")
+    if not (entry := manifest.lookup(lang_src, lang_dst, stardict)):
+        raise FileNotFoundError(constants.FILES / lang_src / lang_dst / stardict)
+    return entry
 
 
 def get_last_modification_time(dictionary: Dictionary) -> str:
     """Return the last modified time of the given `dictionary` StarDict file."""
-    lang_src, lang_dst = str(dictionary["name"]).split("-", 1)
-    stardict = constants.DICTIONARY_FORMATS["stardict"][1].format(lang_src=lang_src, lang_dst=lang_dst, etym_suffix="")
-    file = constants.FILES / lang_src / lang_dst / stardict
-    return datetime.fromtimestamp(file.stat().st_mtime, tz=UTC).strftime("%Y-%m-%d %H:%M UTC")
+    entry = get_stardict_file(*str(dictionary["name"]).split("-", 1))
+    return datetime.fromtimestamp(entry.mtime, tz=UTC).strftime("%Y-%m-%d %H:%M UTC")
 
 
 def get_sponsors() -> Sponsors:
@@ -127,40 +176,37 @@ def is_checkpoint(checkpoint: str) -> bool:
     return True
 
 
-def is_dict_enabled(dictionary: Dictionary) -> bool:
-    return (
-        int(dictionary["words"]) >= constants.MINIMUM_REQUIRED_WORDS
-        and bool(dictionary.get("formats", ""))
-        and bool(dictionary.get("uid", ""))
-    )
-
-
 def load_dictionaries(*, keys: list[str] = constants.DICTIONARY_KEYS_ALL) -> Dictionaries:
-    """Load public-ready dictionaries."""
-    name_wanted = "name" in keys
-    return {
-        lang_src: {
-            lang_dst: {k: v for k, v in dictionary.items() if k in keys}
-            | ({"name": f"{lang_src}-{lang_dst}"} if name_wanted else {})
-            for lang_dst, dictionary in langs.items()
-            if is_dict_enabled(dictionary)
-        }
-        for lang_src, langs in get_dictionaries().items()
-        if any(is_dict_enabled(dictionary) for dictionary in langs.values())
-    }
+    """Load public-ready dictionaries, from the in-process catalog snapshot."""
+    return catalog.snapshot().dictionaries(keys)
 
 
 def save_dictionaries(dictionaries: Dictionaries) -> None:
-    """Save dictionaries."""
-    constants.DICTIONARIES.write_text(
+    """Save dictionaries.
+
+    The file is atomically replaced so that concurrent readers never see a partial content,
+    and so that its inode changes, which is part of the catalog signature.
+    Each save is a new catalog generation, recorded in the history used to serve deltas.
+    The binary catalog, mapped by processes on reload, is compiled right after.
+    """
+    current = catalog.get()
+    current.save_history(dictionaries)
+
+    file = constants.DICTIONARIES
+    tmp_file = file.with_suffix(f"{file.suffix}.tmp")
+    tmp_file.write_text(
         json.dumps(
             dictionaries,
             ensure_ascii=False,
             check_circular=False,
             indent=4,
             sort_keys=True,
-        )
+        ),
+        encoding=constants.ENCODING,
     )
+    tmp_file.replace(file)
+    current.save_binary(catalog.encode(dictionaries, catalog.signature(file.stat())))
+    current.invalidate()
 
 
 def load_orders() -> dict[str, Order]:
@@ -223,10 +269,13 @@ def locker(kind: str) -> Callable:
     return decorator
 
 
-def random_reviews(count: int) -> Reviews:
-    """Load `count` random reviews."""
-    all_reviews = json.loads(constants.REVIEWS.read_text(encoding=constants.ENCODING))
-    return sample(all_reviews, count)
+def parse_reviews(content: str) -> Reviews:
+    return create_dictionary_links(json.loads(content))
+
+
+def random_reviews(count: int, *, seed: int | None = None) -> Reviews:
+    """Pick `count` random reviews, with links to their dictionaries. The same `seed` picks the same reviews."""
+    return Random(seed).sample(load_data_file(constants.REVIEWS, parse_reviews), count)  # noqa: S311
 
 
 def send_email(order: Order) -> bool:
@@ -8,7 +8,7 @@
 	<meta name="viewport" content="width=device-width">
 
 	<meta property="og:description" content="{{ constants.HEADER_DESC }}">
-	<meta property="og:image" content="/asset/img/share-header.svg?v={{ version }}">
+	<meta property="og:image" content="{{ asset('img/share-header.svg') }}">
 	<meta property="og:locale" content="en_EN">
 	<meta property="og:site_name" content="{{ constants.PROJECT }}">
 	<meta property="og:title" content="{{ constants.PROJECT }} — {{ constants.HEADER_DESC }}">
@@ -18,25 +18,25 @@
 	<meta name="twitter:card" content="summary_large_image">
 	<meta name="twitter:title" content="{{ constants.PROJECT }} — {{ constants.HEADER_DESC }}">
 	<meta name="twitter:description" content="{{ constants.HEADER_DESC }}">
-	<meta name="twitter:image" content="/asset/img/share-header.svg?v={{ version }}">
+	<meta name="twitter:image" content="{{ asset('img/share-header.svg') }}">
 	<meta property="twitter:domain" content="{{ constants.WWW }}">
 	<meta property="twitter:url" content="{{ url_pure }}">
 
 	<link rel="author" href="/humans.txt" />
 	<link rel="canonical" href="{{ url_pure }}">
-	<link rel="icon" href="/asset/img/favicon.svg?v={{ version }}">
+	<link rel="icon" href="{{ asset('img/favicon.svg') }}">
 	<link rel="publisher" href="https://www.{{ constants.WWW }}" />
-	<link rel="stylesheet" href="/asset/style/common.css?v={{ version }}" />
-	{%- block styles -%}{%- endblock -%}
+	{{ stylesheet() }}
 	<title>{{ constants.PROJECT }} - {{ title }}</title>
 </head>
+{{ flush }}
 <body>
 	<header>
 		<div class="brand">
 			<a href="/" title="Back to home">
 				<picture>
-					<source srcset="/asset/img/header-logo-negative.svg?v={{ version }}" media="(prefers-color-scheme: dark)">
-					<img src="/asset/img/header-logo.svg?v={{ version }}" width="529" height="126" loading="lazy" alt="{{ constants.PROJECT }}"/>
+					<source srcset="{{ asset('img/header-logo-negative.svg') }}" media="(prefers-color-scheme: dark)">
+					<img src="{{ asset('img/header-logo.svg') }}" width="529" height="126" loading="lazy" alt="{{ constants.PROJECT }}"/>
 				</picture>
 			</a>
 		</div>
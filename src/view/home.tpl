@@ -1,10 +1,5 @@
 {%- extends "base.tpl" -%}
 
-{%- block styles -%}
-	<link rel="preload" href="/asset/style/home.css?v={{ version }}" as="style" onload="this.onload=null;this.rel='stylesheet'">
-	<noscript><link rel="stylesheet" href="/asset/style/home.css?v={{ version }}" /></noscript>
-{%- endblock -%}
-
 {%- block content -%}
 	<div class="center">
 		<h1 class="typo-4">{{ constants.HEADER_SLOGAN_SPLIT }}</h1>
@@ -16,12 +11,12 @@
 	<div class="space-4"></div>
 
 	<div class="brands">
-		<a href="https://read.amazon.com" target="_blank" rel="noopener noreferrer"><img width="134" height="29" loading="lazy" src="/asset/img/amazon-kindle.svg?v={{ version }}" alt="Amazon Kindle" title="Dictionaries for Amazon Kindle" /></a>
-		<a href="https://www.kobo.com" target="_blank" rel="noopener noreferrer"><img width="82" height="23" loading="lazy" src="/asset/img/rakuten-kobo.svg?v={{ version }}" alt="Rakuten Kobo" title="Dictionaries for Rakuten Kobo" /></a>
-		<a href="https://pocketbook.ch" target="_blank" rel="noopener noreferrer"><img width="136" height="21" loading="lazy" src="/asset/img/pocketbook.svg?v={{ version }}" alt="PocketBook" title="Dictionaries for PocketBook" /></a>
-		<a href="https://www.vivlio.com" target="_blank" rel="noopener noreferrer"><img width="135" height="31" loading="lazy" src="/asset/img/vivlio.svg?v={{ version }}" alt="Vivlio" title="Dictionaries for Vivlio" /></a>
-		<a href="https://www.boox.com" target="_blank" rel="noopener noreferrer"><img width="135" height="13" loading="lazy" src="/asset/img/onyx-boox.svg?v={{ version }}" alt="Onyx Boox" title="Dictionaries for Onyx Boox" /></a>
-		<a href="https://koreader.rocks" target="_blank" rel="noopener noreferrer"><img width="90" height="29" loading="lazy" src="/asset/img/koreader.svg?v={{ version }}" alt="KOReader" title="Dictionaries for KOReader" /></a>
+		<a href="https://read.amazon.com" target="_blank" rel="noopener noreferrer">{{ brand('amazon-kindle', 134, 29, alt='Amazon Kindle', title='Dictionaries for Amazon Kindle') }}</a>
+		<a href="https://www.kobo.com" target="_blank" rel="noopener noreferrer">{{ brand('rakuten-kobo', 82, 23, alt='Rakuten Kobo', title='Dictionaries for Rakuten Kobo') }}</a>
+		<a href="https://pocketbook.ch" target="_blank" rel="noopener noreferrer">{{ brand('pocketbook', 136, 21, alt='PocketBook', title='Dictionaries for PocketBook') }}</a>
+		<a href="https://www.vivlio.com" target="_blank" rel="noopener noreferrer">{{ brand('vivlio', 135, 31, alt='Vivlio', title='Dictionaries for Vivlio') }}</a>
+		<a href="https://www.boox.com" target="_blank" rel="noopener noreferrer">{{ brand('onyx-boox', 135, 13, alt='Onyx Boox', title='Dictionaries for Onyx Boox') }}</a>
+		<a href="https://koreader.rocks" target="_blank" rel="noopener noreferrer">{{ brand('koreader', 90, 29, alt='KOReader', title='Dictionaries for KOReader') }}</a>
 	</div>
 	<div class="space-2"></div>
 	<div class="compat typo-6">
@@ -52,27 +47,27 @@
 		<div>
 			<div class="typo-5">Multiple grammatical forms shown together</div>
 			<div class="typo-6 color-flint">When a word is both a plural form and a verb form, all relevant versions are displayed.</div>
-			<div class="example"><img width="486" height="376" loading="lazy" src="/asset/img/preview-multiple.svg?v={{ version }}" alt="Loading preview …" title="Example of a selected word that has multiple targets: all forms are shown." /></div>
+			<div class="example"><img width="486" height="376" loading="lazy" src="{{ asset('img/preview-multiple.svg') }}" alt="Loading preview …" title="Example of a selected word that has multiple targets: all forms are shown." /></div>
 		</div>
 		<div>
 			<div class="typo-5">Singular forms from plurals</div>
 			<div class="typo-6 color-flint">When selecting a plural word, its singular form is displayed.</div>
-			<div class="example"><img width="486" height="428" loading="lazy" src="/asset/img/preview-singular.svg?v={{ version }}" alt="Loading preview …" title="Example of a plural word selected: its singular form is displayed." /></div>
+			<div class="example"><img width="486" height="428" loading="lazy" src="{{ asset('img/preview-singular.svg') }}" alt="Loading preview …" title="Example of a plural word selected: its singular form is displayed." /></div>
 		</div>
 		<div>
 			<div class="typo-5">Infinitive forms from conjugated verbs</div>
 			<div class="typo-6 color-flint">When selecting a conjugated verb, the infinitive form is shown.</div>
-			<div class="example"><img width="486" height="392" loading="lazy" src="/asset/img/preview-infinitive.svg?v={{ version }}" alt="Loading preview …" title="Example of a conjugated word selected: its infinitive form is displayed." /></div>
+			<div class="example"><img width="486" height="392" loading="lazy" src="{{ asset('img/preview-infinitive.svg') }}" alt="Loading preview …" title="Example of a conjugated word selected: its infinitive form is displayed." /></div>
 		</div>
 		<div>
 			<div class="typo-5">Optimized rendering for scientific content</div>
 			<div class="typo-6 color-flint">Mathematical, and chemical, formulas are beautifully rendered.</div>
-			<div class="example"><img width="486" height="319" loading="lazy" src="/asset/img/preview-formula.svg?v={{ version }}" alt="Loading preview …" title="Example of a mathematical formula beautifully rendered." /></div>
+			<div class="example"><img width="486" height="319" loading="lazy" src="{{ asset('img/preview-formula.svg') }}" alt="Loading preview …" title="Example of a mathematical formula beautifully rendered." /></div>
 		</div>
 		<div>
 			<div class="typo-5">Tables support</div>
 			<div class="typo-6 color-flint">When a word entry includes any table, they are displayed correctly.</div>
-			<div class="example"><img width="486" height="359" loading="lazy" src="/asset/img/preview-table.svg?v={{ version }}" alt="Loading preview …" title="Example of a mathematical formula beautifully rendered." /></div>
+			<div class="example"><img width="486" height="359" loading="lazy" src="{{ asset('img/preview-table.svg') }}" alt="Loading preview …" title="Example of a mathematical formula beautifully rendered." /></div>
 		</div>
 	</div>
 
@@ -127,18 +122,12 @@
 				</div>
 			</div>
 			<div class="screen">
-                <picture>
-                    <source srcset="/asset/img/showcase-dark.png?v={{ version }}" media="(prefers-color-scheme: dark)">
-                    <img src="/asset/img/showcase.png?v={{ version }}" loading="lazy" alt="Loading preview …"/>
-                </picture>
+                {{ picture('img/showcase.png', dark='img/showcase-dark.png', sizes='645px', alt='Loading preview …') }}
 			</div>
 		</div>
 		<div class="medium color-1">
 			<div class="screen">
-                <picture>
-                    <source srcset="/asset/img/showcase-dark.png?v={{ version }}" media="(prefers-color-scheme: dark)">
-                    <img src="/asset/img/showcase.png?v={{ version }}" loading="lazy" alt="Loading preview …"/>
-                </picture>
+                {{ picture('img/showcase.png', dark='img/showcase-dark.png', sizes='368px', alt='Loading preview …') }}
 				<div class="bottom-bar color-3"></div>
 			</div>
 		</div>
@@ -147,16 +136,14 @@
                 <div class="button color-3"></div>
             </div>
 			<div class="screen">
-                <picture>
-                    <source srcset="/asset/img/showcase-dark.png?v={{ version }}" media="(prefers-color-scheme: dark)">
-                    <img src="/asset/img/showcase.png?v={{ version }}" loading="lazy" alt="Loading preview …"/>
-                </picture>
+                {{ picture('img/showcase.png', dark='img/showcase-dark.png', sizes='140px', alt='Loading preview …') }}
 			</div>
 			<div class="bottom-bar color-2"></div>
 		</div>
 	</div>
 
 	<div class="space-4"></div>
+	{{ flush }}
 
 	<div id="buy" class="center">
 		<h2 class="typo-4">One Price. Unlimited Dictionary Access.</h2>
@@ -237,7 +224,8 @@
 	</div>
 
 	<div class="space-4"></div>
-	
+	{{ flush }}
+
 	<div id="reviews" class="center">
 		<h2 class="typo-4">Trusted by Curious Readers Everywhere</h2>
 		<div class="typo-6 color-flint">
@@ -304,5 +292,5 @@
 {%- endblock -%}
 
 {%- block scripts -%}
-    <script defer src="/asset/script/home.js?v={{ version }}"></script>
+    <script defer src="{{ asset('script/home.js') }}"></script>
 {%- endblock -%}
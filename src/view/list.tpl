@@ -15,6 +15,7 @@
 		<div class="space-1"></div>
 		{%- endfor -%}
 	</ol>
+	{{ flush }}
 
 	<h2 id="universal" class="typo-5">Universal</h2>
 	<ol>
@@ -22,6 +23,7 @@
 			<li><a href="/#all-{{ lang_dst }}">{{ "Universal <b>%s</b> dictionary" % language(lang_dst) }}</a></li>
 		{%- endfor -%}
 	</ol>
+	{{ flush }}
 
 	<h2 class="space-1"></h2>
 
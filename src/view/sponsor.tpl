@@ -1,10 +1,5 @@
 {%- extends "base.tpl" -%}
 
-{% block styles %}
-	<link rel="preload" href="/asset/style/sponsor.css?v={{ version }}" as="style" onload="this.onload=null;this.rel='stylesheet'">
-	<noscript><link rel="stylesheet" href="/asset/style/sponsor.css?v={{ version }}" /></noscript>
-{% endblock %}
-
 {%- block content -%}
 	<h1 class="center typo-4">Our Awesome Sponsors</h1>
 
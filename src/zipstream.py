@@ -0,0 +1,151 @@
+"""ZIP archives generated while they are sent, without any temporary file.
+
+Dictionary files are already compressed: they are stored as-is, so that the archive size is known upfront.
+Files are opened first, and their size taken from the opened files, so that the archive is the one announced, even if
+a file is replaced in between. Their CRC-32 is written in the local header, as some readers (like Java
+`ZipInputStream`) do not support data descriptors for stored members: it is computed before the member is sent,
+and kept for the next archives.
+"""
+
+import os
+import struct
+import time
+import zlib
+from collections.abc import Generator
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from src import manifest
+
+BLOCK_SIZE = 64 * 1024
+# Archives, and their members, must fit without ZIP64 extensions
+LIMIT = 0xFFFFFFFF
+
+VERSION = 20  # 2.0: stored members in folders
+FLAGS = 0x0800  # UTF-8 names
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+END_OF_CENTRAL_DIRECTORY = struct.Struct("<IHHHHIIH")
+
+# (device, inode, size, modification time) -> CRC-32 of files already sent
+CRCS: dict[tuple[int, int, int, int], int] = {}
+CRCS_MAX = 1024
+
+
+@dataclass(frozen=True)
+class Member:
+    name: str
+    file: BinaryIO
+    stat: os.stat_result
+
+    @property
+    def size(self) -> int:
+        return self.stat.st_size
+
+
+def dos_time(mtime: float) -> tuple[int, int]:
+    """Modification time, and date, in the MS-DOS format."""
+    tm = time.localtime(mtime)
+    year = min(max(tm.tm_year, 1980), 2107)
+    return (tm.tm_hour << 11) | (tm.tm_min << 5) | (tm.tm_sec // 2), ((year - 1980) << 9) | (
+        tm.tm_mon << 5
+    ) | tm.tm_mday
+
+
+def open_members(entries: list[manifest.Entry]) -> list[Member]:
+    """Open the given files, the caller closing them (see `close()`)."""
+    members: list[Member] = []
+    try:
+        for entry in entries:
+            fh = entry.path.open(mode="rb")
+            members.append(Member(entry.path.name, fh, os.fstat(fh.fileno())))
+    except OSError:
+        close(members)
+        raise
+    return members
+
+
+def close(members: list[Member]) -> None:
+    for member in members:
+        member.file.close()
+
+
+def size(members: list[Member]) -> int:
+    """Size of the archive of the given files."""
+    total = sum(
+        LOCAL_HEADER.size + CENTRAL_HEADER.size + 2 * len(member.name.encode()) + member.size for member in members
+    )
+    return total + END_OF_CENTRAL_DIRECTORY.size
+
+
+def crc32(member: Member) -> int:
+    """CRC-32 of a member, read from its start if it is not known yet."""
+    key = (member.stat.st_dev, member.stat.st_ino, member.stat.st_size, member.stat.st_mtime_ns)
+    if (crc := CRCS.get(key)) is None:
+        crc = 0
+        member.file.seek(0)
+        while data := member.file.read(BLOCK_SIZE):
+            crc = zlib.crc32(data, crc)
+        if len(CRCS) >= CRCS_MAX:
+            CRCS.clear()
+        CRCS[key] = crc
+    return crc
+
+
+def generate(members: list[Member]) -> Generator[bytes]:
+    """Generate the archive of the given opened files."""
+    central_directory = []
+    offset = 0
+    for member in members:
+        name = member.name.encode()
+        mtime, mdate = dos_time(member.stat.st_mtime)
+        crc = crc32(member)
+        yield (
+            LOCAL_HEADER.pack(0x04034B50, VERSION, FLAGS, 0, mtime, mdate, crc, member.size, member.size, len(name), 0)
+            + name
+        )
+
+        member.file.seek(0)
+        remaining = member.size
+        while remaining and (data := member.file.read(min(BLOCK_SIZE, remaining))):
+            remaining -= len(data)
+            yield data
+        if remaining:
+            msg = f"{member.name} was truncated while it was sent"
+            raise ValueError(msg)
+
+        central_directory.append(
+            CENTRAL_HEADER.pack(
+                *(0x02014B50, VERSION, VERSION, FLAGS, 0, mtime, mdate, crc, member.size, member.size, len(name)),
+                *(0, 0, 0, 0, 0, offset),
+            )
+            + name
+        )
+        offset += LOCAL_HEADER.size + len(name) + member.size
+
+    directory = b"".join(central_directory)
+    yield directory
+    yield END_OF_CENTRAL_DIRECTORY.pack(0x06054B50, 0, 0, len(members), len(members), len(directory), offset, 0)
+
+
+class ZipStream:
+    """A file-like archive, generated while it is read."""
+
+    def __init__(self, members: list[Member]) -> None:
+        self.members = members
+        self.chunks = generate(members)
+        self.buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self.buffer) < size:
+            if (chunk := next(self.chunks, None)) is None:
+                break
+            self.buffer += chunk
+        size = len(self.buffer) if size < 0 else size
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def close(self) -> None:
+        self.chunks.close()
+        close(self.members)
+        self.buffer = b""
@@ -18,11 +18,15 @@ def isolate(tmp_path: Path) -> None:
     constants.FAQ = constants.ROOT / constants.FAQ.name
     constants.FILES = constants.ROOT / constants.FILES.name
     constants.FILES_CACHE = constants.ROOT / constants.FILES_CACHE.name
+    constants.TEMPLATES_CACHE = constants.FILES_CACHE / constants.TEMPLATES_CACHE.name
+    constants.ASSETS_MANIFEST = constants.FILES_CACHE / constants.ASSETS_MANIFEST.name
+    constants.STYLES_MANIFEST = constants.FILES_CACHE / constants.STYLES_MANIFEST.name
     constants.CERTS = constants.FILES / constants.CERTS.name
     constants.LOGS = constants.ROOT / constants.LOGS.name
     constants.METRICS = constants.DATA / constants.METRICS.name
     constants.ORDERS = constants.DATA / constants.ORDERS.name
     constants.SPONSORS = constants.DATA / constants.SPONSORS.name
+    constants.STATIC = constants.ROOT / constants.STATIC.name
 
     constants.DATA.mkdir()
     constants.FILES.mkdir()
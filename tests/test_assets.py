@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import bottle
+import pytest
+import rcssmin
+from webtest import TestApp
+
+from src import assets, constants, server
+
+
+@pytest.fixture(scope="session")
+def app() -> TestApp:
+    return TestApp(server.app)
+
+
+def test_url() -> None:
+    value = assets.fingerprint(constants.ASSET / "style" / "common.css")
+    assert assets.url("style/common.css") == f"/asset/style/common.css?v={value}"
+
+
+def test_url_missing() -> None:
+    assert assets.url("style/missing.css") == "/asset/style/missing.css"
+
+
+def test_save_manifest() -> None:
+    fingerprints = assets.save_manifest()
+    assert fingerprints["img/logo.svg"] == assets.fingerprint(constants.ASSET / "img" / "logo.svg")
+    assert json.loads(constants.ASSETS_MANIFEST.read_text()) == fingerprints
+
+    # Fingerprints come from the manifest (loaded again as the current one is known under another name)
+    constants.ASSETS_MANIFEST.write_text(json.dumps({"img/logo.svg": "0123"}))
+    assets.get().manifest = constants.ASSETS_MANIFEST.with_name("other")
+    assert assets.url("img/logo.svg") == "/asset/img/logo.svg?v=0123"
+
+    # Added since the manifest was built
+    assert assets.get().get("img/favicon.svg") == fingerprints["img/favicon.svg"]
+    assert "img/favicon.svg" in assets.get().fingerprints
+
+
+def test_debug(monkeypatch: pytest.MonkeyPatch) -> None:
+    constants.ASSETS_MANIFEST.write_text(json.dumps({"img/logo.svg": "0123"}))
+    monkeypatch.setattr(bottle, "DEBUG", True)
+    assert assets.get().get("img/logo.svg") == assets.fingerprint(constants.ASSET / "img" / "logo.svg")
+    assert assets.get().fingerprints["img/logo.svg"] == "0123"
+
+
+def test_rendered(app: TestApp) -> None:
+    assert assets.url("img/favicon.svg") in app.get("/enjoy")
+
+
+@pytest.mark.parametrize("path", ["style/common.css", "script/home.js", "img/logo.svg"])
+def test_cache_control(app: TestApp, path: str) -> None:
+    response = app.get(assets.url(path))
+    assert response.headers["Cache-Control"] == assets.CACHE_CONTROL_IMMUTABLE
+
+    response = app.get(f"/asset/{path}?v=outdated")
+    assert response.headers["Cache-Control"] == assets.CACHE_CONTROL_OUTDATED
+
+
+def test_minify(tmp_path: Path) -> None:
+    (tmp_path / "style").mkdir()
+    stylesheet = tmp_path / "style" / "page.css"
+    stylesheet.write_text("p {\n    color: red;\n}\n")
+    fingerprints = assets.Fingerprints(tmp_path, tmp_path / "assets.json")
+
+    variants = fingerprints.minify("style/page.css")
+    assert variants
+    assert variants.content == b"p{color:red}"
+    assert variants.encoded["br"]
+
+    # Minified once per content
+    with patch.object(rcssmin, "cssmin", side_effect=AssertionError):
+        assert fingerprints.minify("style/page.css") is variants
+
+    stylesheet.write_text("p {\n    color: blue;\n}\n")
+    fingerprints.fingerprints.clear()
+    assert fingerprints.minify("style/page.css").content == b"p{color:blue}"  # type: ignore[union-attr]
+
+    stylesheet.unlink()
+    fingerprints.fingerprints.clear()
+    assert fingerprints.minify("style/page.css") is None
+
+
+def test_minify_deleted(tmp_path: Path) -> None:
+    (tmp_path / "script").mkdir()
+    (tmp_path / "script" / "page.js").write_text("let a = 1;")
+    fingerprints = assets.Fingerprints(tmp_path, tmp_path / "assets.json")
+    (tmp_path / "script" / "page.js").unlink()
+    assert fingerprints.minify("script/page.js") is None
+
+
+def test_warm_up(app: TestApp) -> None:
+    paths = assets.warm_up()
+    assert "style/common.css" in paths
+    assert "script/home.js" in paths
+    assert sorted(assets.get().minified) == sorted(paths)
+
+    # Served from memory
+    with patch.dict(assets.MINIFIED, {"script": (Mock(side_effect=AssertionError), assets.MINIFIED["script"][1])}):
+        response = app.get(assets.url("script/home.js"))
+    assert not list(constants.FILES_CACHE.glob("*.min.*"))
+    assert response.body == assets.get().minified["script/home.js"][1].content
+    assert response.content_type == "text/javascript"
+    assert response.headers["Cache-Control"] == assets.CACHE_CONTROL_IMMUTABLE
+
+    etag = response.headers["ETag"]
+    app.get(assets.url("script/home.js"), headers={"If-None-Match": etag}, status=304)
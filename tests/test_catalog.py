@@ -0,0 +1,316 @@
+import json
+import mmap
+from unittest.mock import patch
+
+import pytest
+
+from src import catalog, constants, utils
+
+from .payloads import PLAN_ID
+
+
+def test_snapshot_is_reused() -> None:
+    snapshot = catalog.snapshot()
+    assert catalog.snapshot() is snapshot
+
+
+def test_snapshot_reloaded_after_save() -> None:
+    snapshot = catalog.snapshot()
+    raw = utils.get_dictionaries()
+    utils.save_dictionaries(raw | {"fr": {"fr": raw["eo"]["eo"]}})
+
+    new_snapshot = catalog.snapshot()
+    assert new_snapshot is not snapshot
+    assert new_snapshot.get("fr", "fr")
+
+
+def test_snapshot_reloaded_after_external_change() -> None:
+    assert catalog.snapshot().get("eo", "fr")
+    raw = utils.get_dictionaries()
+    del raw["eo"]["fr"]
+    tmp_file = constants.DICTIONARIES.with_suffix(".new")
+    tmp_file.write_text(json.dumps(raw))
+    tmp_file.replace(constants.DICTIONARIES)
+
+    assert not catalog.snapshot().get("eo", "fr")
+
+
+def test_disabled_dictionaries() -> None:
+    raw = utils.get_dictionaries()
+    raw["eo"]["fr"]["words"] = constants.MINIMUM_REQUIRED_WORDS - 1
+    raw["fr"] = {"fr": raw["eo"]["eo"] | {"uid": ""}}
+    utils.save_dictionaries(raw)
+
+    snapshot = catalog.snapshot()
+    assert [(lang_src, lang_dst) for lang_src, lang_dst, _ in snapshot.records()] == [("eo", "eo")]
+    assert snapshot.dictionaries(constants.DICTIONARY_KEYS_MINIMAL) == {
+        "eo": {"eo": {"formats": "df,dictorg,kobo,mobi,stardict", "updated": "2025-04-01", "words": 17066}},
+    }
+
+
+@pytest.mark.parametrize(
+    "keys",
+    [
+        constants.DICTIONARY_KEYS_MINIMAL,
+        constants.DICTIONARY_KEYS_DOWNLOAD,
+        constants.DICTIONARY_KEYS_ALL,
+        ["words"],
+    ],
+)
+def test_projections(keys: list[str]) -> None:
+    snapshot = catalog.snapshot()
+    assert sorted(snapshot.get("eo", "fr", keys=keys)) == sorted(keys)
+    assert sorted(snapshot.dictionaries(keys)["eo"]["fr"]) == sorted(keys)
+
+
+def test_dictionaries_are_copies() -> None:
+    snapshot = catalog.snapshot()
+    dictionaries = snapshot.dictionaries(constants.DICTIONARY_KEYS_ALL)
+    dictionaries["eo"]["fr"]["words"] = 0
+    dictionary = snapshot.get("eo", "fr")
+    dictionary["words"] = 0
+    assert snapshot.get("eo", "fr")["words"] == 151150
+
+
+@pytest.mark.parametrize(
+    ("key", "value"),
+    [
+        ("name", "eo-fr"),
+        ("plan_id", PLAN_ID),
+        ("uid", "01JR0WGRVP18RTFN6K57W42ZAX"),
+    ],
+)
+def test_find(key: str, value: str) -> None:
+    snapshot = catalog.snapshot()
+    assert snapshot.find(key, value) == snapshot.get("eo", "fr")
+
+
+def test_find_any_key() -> None:
+    snapshot = catalog.snapshot()
+    assert snapshot.find("updated", "2025-04-04")["name"] == "eo-fr"
+
+
+def test_find_unknown() -> None:
+    snapshot = catalog.snapshot()
+    assert not snapshot.find("name", "eo-zz")
+    assert not snapshot.find("name", "eo")
+    assert not snapshot.find("uid", "unknown")
+    assert not snapshot.find("unknown", "value")
+    assert not snapshot.get("zz", "eo")
+    assert not snapshot.get("eo", "zz")
+    assert not snapshot.get("fr", "eo")
+
+
+def test_find_first_enabled() -> None:
+    raw = utils.get_dictionaries()
+    raw["eo"]["eo"]["plan_id"] = PLAN_ID
+    raw["eo"]["eo"]["formats"] = ""
+    utils.save_dictionaries(raw)
+
+    assert catalog.snapshot().find("plan_id", PLAN_ID)["name"] == "eo-fr"
+
+
+def test_find_disabled() -> None:
+    raw = utils.get_dictionaries()
+    raw["eo"]["fr"]["formats"] = ""
+    # Without plan, indexed after
+    raw["fr"] = {"fr": {key: value for key, value in raw["eo"]["eo"].items() if key != "plan_id"}}
+    utils.save_dictionaries(raw)
+
+    assert not catalog.snapshot().find("plan_id", PLAN_ID)
+    assert catalog.snapshot().get("fr", "fr")
+
+
+def test_binary_mapped() -> None:
+    snapshot = catalog.snapshot()
+    assert catalog.get().path_binary.is_file()
+    assert isinstance(snapshot.view.obj, mmap.mmap)
+    assert snapshot.signature == catalog.signature(constants.DICTIONARIES.stat())
+
+
+def test_binary_compiled_on_load(caplog: pytest.LogCaptureFixture) -> None:
+    catalog.get().path_binary.unlink()
+    snapshot = catalog.get().load()
+    assert isinstance(snapshot.view.obj, mmap.mmap)
+    assert snapshot.get("eo", "fr")
+    assert any(message.startswith("Compiled the dictionaries catalog") for message in caplog.messages)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"",
+        b"RDCT",
+        b"XXXX" + bytes(catalog.BINARY_HEADER.size),
+        catalog.encode({"eo": {"eo": {"words": 1}}}, (0, 0, 0))[:-1],
+        catalog.encode({"eo": {"eo": {"words": 1}}}, (0, 0, 0))[: catalog.BINARY_HEADER.size + 4],
+    ],
+)
+def test_binary_invalid(content: bytes) -> None:
+    catalog.get().path_binary.write_bytes(content)
+    assert catalog.get().load().get("eo", "fr")
+    assert catalog.get().path_binary.read_bytes() != content
+
+
+@pytest.mark.parametrize("value", ["", "text", 'with "quotes"', "back\\slash", "ĉu", "42", 0, 42, -1, 5.49])
+def test_binary_values(value: float | str) -> None:
+    snapshot = catalog.Snapshot.from_dictionaries({"eo": {"eo": {"value": value}}})
+    assert snapshot.decode(0) == ("eo", "eo", {"value": value})
+
+
+def test_binary_replaced_in_between() -> None:
+    current = catalog.get()
+    current.path_binary.write_bytes(b"")
+    with patch.object(current, "save_binary"):
+        snapshot = current.load()
+    assert isinstance(snapshot.view.obj, bytes)
+    assert snapshot.get("eo", "fr")
+
+
+def test_diff() -> None:
+    previous = catalog.snapshot()
+    raw = utils.get_dictionaries()
+    raw["eo"]["fr"]["words"] = 42000
+    raw["eo"]["fr"]["price"] = "5.49"
+    raw["eo"]["eo"]["uid"] = ""
+    raw["fr"] = {"fr": raw["eo"]["fr"]}
+    utils.save_dictionaries(raw)
+
+    changes = catalog.diff(previous, catalog.snapshot())
+    assert changes.added == {"fr-fr"}
+    assert changes.changed == {"eo-fr": {"price", "words"}}
+    assert changes.removed == {"eo-eo"}
+    assert changes.affected(constants.DICTIONARY_KEYS_MINIMAL) == {"eo-eo", "eo-fr", "fr-fr"}
+    assert changes.affected(["price_purchase"]) == {"eo-eo", "fr-fr"}
+
+
+def test_diff_no_changes() -> None:
+    snapshot = catalog.snapshot()
+    assert not catalog.diff(snapshot, snapshot)
+
+
+def test_on_change() -> None:
+    notified: list[catalog.Changes] = []
+    catalog.snapshot()
+
+    with patch.object(catalog, "LISTENERS", new=[]):
+        catalog.on_change(notified.append)
+
+        # No changes, no notification
+        utils.save_dictionaries(utils.get_dictionaries())
+        catalog.snapshot()
+        assert not notified
+
+        raw = utils.get_dictionaries()
+        raw["eo"]["fr"]["updated"] = "2025-04-05"
+        utils.save_dictionaries(raw)
+        catalog.snapshot()
+
+    assert notified == [catalog.Changes(changed={"eo-fr": {"updated"}})]
+
+
+def test_on_change_error(caplog: pytest.LogCaptureFixture) -> None:
+    def listener(changes: catalog.Changes) -> None:
+        raise ValueError(changes)
+
+    catalog.snapshot()
+    raw = utils.get_dictionaries()
+    del raw["eo"]["fr"]
+
+    with patch.object(catalog, "LISTENERS", new=[listener]):
+        utils.save_dictionaries(raw)
+        assert not catalog.snapshot().get("eo", "fr")
+
+    assert f"Catalog change listener {listener!r} failed" in caplog.messages
+
+
+def save_words(lang_src: str, lang_dst: str, words: int) -> None:
+    raw = utils.get_dictionaries()
+    raw.setdefault(lang_src, {})[lang_dst] = raw["eo"]["fr"] | {"words": words}
+    utils.save_dictionaries(raw)
+
+
+def test_generation() -> None:
+    assert catalog.snapshot().generation == 1
+
+    save_words("eo", "fr", 42000)
+    assert catalog.snapshot().generation == 2
+
+    # Catalog history was written before the catalog file
+    assert [entry.generation for entry in catalog.read_history(catalog.get().path_history)] == [1, 2]
+
+
+def test_generation_history_size() -> None:
+    with patch.object(constants, "CATALOG_HISTORY_SIZE", 3):
+        for words in range(1000, 1005):
+            save_words("eo", "fr", words)
+
+    history = catalog.read_history(catalog.get().path_history)
+    assert [entry.generation for entry in history] == [4, 5, 6]
+    assert catalog.snapshot().generation == 6
+
+
+def test_generation_broken_chain() -> None:
+    raw = utils.get_dictionaries()
+    raw["eo"]["fr"]["words"] = 42000
+    constants.DICTIONARIES.write_text(json.dumps(raw))
+    assert not catalog.snapshot().generation
+
+    save_words("eo", "fr", 42001)
+    history = catalog.read_history(catalog.get().path_history)
+    assert [entry.generation for entry in history] == [2]
+    assert catalog.snapshot().generation == 2
+    assert not catalog.snapshot().delta(1)
+
+
+def test_generation_history_invalid(caplog: pytest.LogCaptureFixture) -> None:
+    current = catalog.get()
+    current.path_history.write_text("[{}]")
+    assert not current.load().generation
+    assert f"The catalog history {current.path_history} is invalid" in caplog.messages
+
+
+def test_delta() -> None:
+    save_words("eo", "fr", 42000)  # 2
+    raw = utils.get_dictionaries()
+    raw["eo"]["fr"]["price"] = "5.49"  # Not part of the minimal projection
+    utils.save_dictionaries(raw)  # 3
+    save_words("fr", "fr", 1000)  # 4
+    save_words("fr", "fr", 1001)  # 5
+    raw = utils.get_dictionaries()
+    del raw["eo"]["eo"]
+    utils.save_dictionaries(raw)  # 6
+
+    snapshot = catalog.snapshot()
+    assert snapshot.generation == 6
+    fr_fr = {"formats": "df,dictorg,kobo,mobi,stardict", "updated": "2025-04-04", "words": 1001}
+
+    delta = snapshot.delta(1)
+    assert delta
+    assert json.loads(delta.content) == {
+        "generation": 6,
+        "since": 1,
+        "added": {"fr": {"fr": fr_fr}},
+        "changed": {"eo": {"fr": fr_fr | {"words": 42000}}},
+        "removed": ["eo-eo"],
+    }
+
+    delta = snapshot.delta(4)
+    assert delta
+    assert json.loads(delta.content) == {
+        "generation": 6,
+        "since": 4,
+        "added": {},
+        "changed": {"fr": {"fr": fr_fr}},
+        "removed": ["eo-eo"],
+    }
+    assert snapshot.delta(4) is delta
+
+    delta = snapshot.delta(6)
+    assert delta
+    assert json.loads(delta.content) == {"generation": 6, "since": 6, "added": {}, "changed": {}, "removed": []}
+
+
+@pytest.mark.parametrize("since", [0, 2])
+def test_delta_unknown_generation(since: int) -> None:
+    assert not catalog.snapshot().delta(since)
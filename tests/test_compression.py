@@ -0,0 +1,235 @@
+import gzip
+import json
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import bottle
+import brotli
+import pytest
+import webob
+
+from src import compression, constants, server
+
+CONTENT = b"Lorem ipsum dolor sit amet. " * 100
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("", set()),
+        ("gzip", {"gzip"}),
+        ("gzip, deflate, br, zstd", {"br", "deflate", "gzip", "zstd"}),
+        ("br;q=1.0, gzip;q=0.8, *;q=0.1", {"*", "br", "gzip"}),
+        ("br;q=0, gzip", {"gzip"}),
+        ("GZIP ; q=0.000", set()),
+    ],
+)
+def test_accepted_encodings(accept_encoding: str, expected: set[str]) -> None:
+    assert compression.accepted_encodings(accept_encoding) == expected
+
+
+def test_variants() -> None:
+    variants = compression.Variants(CONTENT)
+    assert brotli.decompress(variants.encoded["br"]) == CONTENT
+    assert gzip.decompress(variants.encoded["gzip"]) == CONTENT
+
+    # Reproducible output
+    assert compression.Variants(CONTENT).encoded == variants.encoded
+
+
+def test_stored_variants(tmp_path: Path) -> None:
+    folder = tmp_path / "pages"
+    folder.mkdir()
+    file = folder / "page.cache"
+    variants = compression.stored_variants(file, CONTENT)
+    assert sorted(path.name for path in folder.iterdir()) == [
+        f"page.cache.{variants.digest}.br",
+        f"page.cache.{variants.digest}.gz",
+    ]
+
+    # Compressed once per content version
+    with patch.object(brotli, "compress", side_effect=AssertionError):
+        assert compression.stored_variants(file, CONTENT).encoded == variants.encoded
+
+    # Variants of previous versions are removed
+    other = compression.stored_variants(file, CONTENT * 2)
+    assert sorted(path.name for path in folder.iterdir()) == [
+        f"page.cache.{other.digest}.br",
+        f"page.cache.{other.digest}.gz",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("", ""),
+        ("identity", ""),
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("gzip, br;q=0", "gzip"),
+    ],
+)
+def test_variants_negotiate(accept_encoding: str, expected: str) -> None:
+    variants = compression.Variants(CONTENT)
+    encoding, body = variants.negotiate(accept_encoding)
+    assert encoding == expected
+    assert body == (variants.encoded[encoding] if encoding else CONTENT)
+
+
+def test_variants_negotiate_not_worth_it() -> None:
+    encoding, body = compression.Variants(b"a").negotiate("br, gzip")
+    assert not encoding
+    assert body == b"a"
+
+
+def test_variants_etag() -> None:
+    variants = compression.Variants(CONTENT)
+    assert variants.etag() == f'"{variants.digest}"'
+    assert variants.etag("br") == f'"{variants.digest}-br"'
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "expected"),
+    [
+        ("", False),
+        ("*", True),
+        ('"{digest}"', True),
+        ('W/"{digest}-gzip"', True),
+        ('"other", "{digest}-br"', True),
+        ('"other"', False),
+    ],
+)
+def test_variants_is_fresh(if_none_match: str, expected: bool) -> None:
+    variants = compression.Variants(CONTENT)
+    assert variants.is_fresh(if_none_match.format(digest=variants.digest)) is expected
+
+
+@pytest.fixture
+def middleware(tmp_path: Path) -> compression.Middleware:
+    app = bottle.Bottle()
+    (tmp_path / "file.txt").write_bytes(CONTENT * 2)
+
+    @app.get("/page")
+    def page() -> bytes:
+        return CONTENT
+
+    @app.get("/stream")
+    def stream() -> Iterator[bytes]:
+        bottle.response.set_header("ETag", '"stream"')
+        yield CONTENT
+        yield b""
+        yield CONTENT
+
+    @app.get("/tagged")
+    def tagged() -> bytes | bottle.HTTPResponse:
+        if bottle.request.get_header("If-None-Match") == '"tagged"':
+            return bottle.HTTPResponse(status=304)
+        bottle.response.set_header("ETag", '"tagged"')
+        return CONTENT
+
+    @app.get("/small")
+    def small() -> bytes:
+        return CONTENT[:10]
+
+    @app.get("/image")
+    def image() -> bytes:
+        bottle.response.content_type = "image/png"
+        return CONTENT
+
+    @app.get("/file")
+    def file() -> bottle.HTTPResponse:
+        return bottle.static_file("file.txt", root=tmp_path)
+
+    return compression.Middleware(app)
+
+
+def get(app: compression.Middleware, path: str, **headers: str) -> webob.Response:
+    return webob.Request.blank(
+        path, headers={key.replace("_", "-"): value for key, value in headers.items()}
+    ).get_response(app)
+
+
+@pytest.mark.parametrize(("encoding", "decompress"), [("br", brotli.decompress), ("gzip", gzip.decompress)])
+def test_middleware(middleware: compression.Middleware, encoding: str, decompress: Callable) -> None:
+    response = get(middleware, "/page", Accept_Encoding=encoding)
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert "Content-Length" not in response.headers
+    assert decompress(response.body) == CONTENT
+
+
+def test_middleware_identity(middleware: compression.Middleware) -> None:
+    response = get(middleware, "/page")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.body == CONTENT
+
+
+def test_middleware_streamed(middleware: compression.Middleware) -> None:
+    # Only precompressed content uses the highest levels
+    with patch.object(brotli, "compress", side_effect=AssertionError):
+        response = get(middleware, "/page", Accept_Encoding="br")
+    assert brotli.decompress(response.body) == CONTENT
+
+
+@pytest.mark.parametrize(("encoding", "decompress"), [("br", brotli.decompress), ("gzip", gzip.decompress)])
+def test_middleware_stream(middleware: compression.Middleware, encoding: str, decompress: Callable) -> None:
+    response = get(middleware, "/stream", Accept_Encoding=encoding)
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["ETag"] == f'"stream-{encoding}"'
+    assert decompress(response.body) == CONTENT * 2
+
+
+def test_middleware_stream_identity(middleware: compression.Middleware) -> None:
+    response = get(middleware, "/stream")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == '"stream"'
+    assert response.body == CONTENT * 2
+
+
+@pytest.mark.parametrize("path", ["/small", "/image", "/file"])
+def test_middleware_untouched(middleware: compression.Middleware, path: str) -> None:
+    response = get(middleware, path, Accept_Encoding="br")
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+
+
+def test_middleware_file_wrapper(middleware: compression.Middleware) -> None:
+    class FileWrapper:
+        def __init__(self, filelike: Any, block_size: int = 8192) -> None:  # noqa: ANN401
+            self.chunks = iter(lambda: filelike.read(block_size), b"")
+
+        def __iter__(self) -> Iterator[bytes]:
+            return self.chunks
+
+    request = webob.Request.blank("/file", headers={"Accept-Encoding": "br"})
+    request.environ["wsgi.file_wrapper"] = FileWrapper
+    response = request.get_response(middleware)
+    assert "Content-Encoding" not in response.headers
+    assert response.body == CONTENT * 2
+
+
+def test_middleware_etag(middleware: compression.Middleware) -> None:
+    response = get(middleware, "/tagged", Accept_Encoding="br")
+    assert response.headers["ETag"] == '"tagged-br"'
+    assert get(middleware, "/tagged", Accept_Encoding="br", If_None_Match=response.headers["ETag"]).status_code == 304
+
+    response = get(middleware, "/stream", Accept_Encoding="gzip", If_None_Match='"x-gzip", W/"y"')
+    assert response.status_code == 200
+
+
+def test_untag_etags() -> None:
+    assert compression.untag_etags('"a-br", W/"b-gzip",  "c", d-br') == '"a", W/"b", "c", d'
+
+
+@pytest.mark.parametrize(("etag", "expected"), [('"a"', '"a-br"'), ('W/"a"', 'W/"a-br"'), ("a", "a-br")])
+def test_tag_etag(etag: str, expected: str) -> None:
+    assert compression.tag_etag(etag, "br") == expected
+
+
+def test_middleware_already_negotiated() -> None:
+    response = get(server.application, constants.ROUTE_API_DICT, Accept_Encoding="gzip")
+    assert response.headers.getall("Vary") == ["Accept-Encoding"]
+    assert json.loads(gzip.decompress(response.body))
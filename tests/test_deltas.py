@@ -0,0 +1,151 @@
+import os
+import shutil
+import subprocess
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src import constants, deltas
+
+
+def make_zip(file: Path, members: dict[str, bytes]) -> None:
+    with zipfile.ZipFile(file, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in members.items():
+            zf.writestr(zipfile.ZipInfo(name, date_time=(2025, 1, 1, 0, 0, 0)), content)
+
+
+@pytest.fixture
+def members() -> dict[str, bytes]:
+    return {f"words-{idx}.html": os.urandom(100_000) for idx in range(10)}
+
+
+@pytest.mark.parametrize(
+    ("file_name", "expected"),
+    [
+        ("dicthtml-eo-fr.zip", True),
+        ("dicthtml-eo-fr-noetym.zip", True),
+        ("dict-eo-fr.zip", False),
+        ("dict-eo-fr.mobi.zip", False),
+        ("dictorg-eo-fr.zip", False),
+        ("dict-eo-fr.df.bz2", False),
+    ],
+)
+def test_is_patched(file_name: str, expected: bool) -> None:
+    assert deltas.is_patched(file_name) is expected
+
+
+def test_diff_apply(tmp_path: Path, members: dict[str, bytes]) -> None:
+    old, new, patch, output = (tmp_path / name for name in ["old.zip", "new.zip", "patch.zst", "output.zip"])
+    make_zip(old, members)
+    make_zip(new, members | {"words-3.html": os.urandom(100_000), "words-10.html": os.urandom(100_000)})
+
+    deltas.diff(old, new, patch)
+    assert patch.stat().st_size < new.stat().st_size / 4
+    assert deltas.target(patch) == deltas.file_sha256(new)
+
+    deltas.apply(old, patch, output)
+    assert output.read_bytes() == new.read_bytes()
+
+
+@pytest.mark.skipif(not shutil.which("zstd"), reason="The zstd tool is not installed")
+def test_diff_apply_zstd(tmp_path: Path, members: dict[str, bytes]) -> None:
+    old, new, patch, output = (tmp_path / name for name in ["old.zip", "new.zip", "patch.zst", "output.zip"])
+    make_zip(old, members)
+    make_zip(new, members | {"words-3.html": os.urandom(100_000)})
+    deltas.diff(old, new, patch)
+
+    # The documented client command
+    subprocess.run(  # noqa: S603
+        ["zstd", "-q", "-d", "--long=31", f"--patch-from={old}", str(patch), "-o", str(output)],  # noqa: S607
+        check=True,
+    )
+    assert output.read_bytes() == new.read_bytes()
+
+
+def test_apply_not_a_patch(tmp_path: Path) -> None:
+    (tmp_path / "old").write_bytes(b"old")
+    (tmp_path / "patch").write_bytes(b"not a patch")
+    with pytest.raises(ValueError, match="is not a patch"):
+        deltas.apply(tmp_path / "old", tmp_path / "patch", tmp_path / "output")
+
+
+def test_apply_wrong_base(tmp_path: Path, members: dict[str, bytes]) -> None:
+    old, new, patch = tmp_path / "old.zip", tmp_path / "new.zip", tmp_path / "patch.zst"
+    make_zip(old, members)
+    make_zip(new, members | {"words-3.html": b"changed"})
+    deltas.diff(old, new, patch)
+
+    make_zip(old, members | {"words-0.html": b"another generation"})
+    with pytest.raises(ValueError, match="is not a patch"):
+        deltas.apply(old, patch, tmp_path / "output.zip")
+
+
+def test_apply_wrong_target(tmp_path: Path, members: dict[str, bytes]) -> None:
+    old, new, patch = tmp_path / "old.zip", tmp_path / "new.zip", tmp_path / "patch.zst"
+    make_zip(old, members)
+    make_zip(new, members | {"words-3.html": b"changed"})
+    deltas.diff(old, new, patch)
+
+    deltas.sidecar(patch).write_text("ab" * 32)
+    with pytest.raises(ValueError, match="does not match the patch target"):
+        deltas.apply(old, patch, tmp_path / "output.zip")
+
+
+def test_release(tmp_path: Path, members: dict[str, bytes]) -> None:
+    folder = tmp_path / "eo" / "fr"
+    folder.mkdir(parents=True)
+    file = folder / "dicthtml-eo-fr.zip"
+    make_zip(file, members)
+    first = deltas.file_sha256(file)
+
+    # Nothing to diff with yet
+    assert deltas.release(folder) == []
+    assert (folder / "deltas" / "previous" / file.name).read_bytes() == file.read_bytes()
+
+    make_zip(file, members | {"words-3.html": b"changed"})
+    second = deltas.file_sha256(file)
+    patch = folder / "deltas" / f"{file.name}.{first}.patch.zst"
+    assert deltas.release(folder) == [patch]
+    assert deltas.target(patch) == second
+
+    # Still the same generation: the patch is kept
+    assert deltas.release(folder) == []
+    assert patch.is_file()
+
+    # Patches leading to an older generation are removed, with their sidecar file
+    make_zip(file, members | {"words-3.html": b"changed again"})
+    assert deltas.release(folder) == [folder / "deltas" / f"{file.name}.{second}.patch.zst"]
+    assert not patch.is_file()
+    assert not deltas.sidecar(patch).is_file()
+
+
+def test_release_not_worth_it(tmp_path: Path) -> None:
+    file = tmp_path / "dicthtml-eo-fr.zip"
+    file.write_bytes(os.urandom(10_000))
+    deltas.release(tmp_path)
+
+    file.write_bytes(os.urandom(10_000))
+    assert deltas.release(tmp_path) == []
+    assert not list((tmp_path / "deltas").glob("*.zst*"))
+
+
+def test_release_other_formats(tmp_path: Path, members: dict[str, bytes]) -> None:
+    file = tmp_path / "dict-eo-fr.zip"
+    make_zip(file, members)
+    deltas.release(tmp_path)
+
+    make_zip(file, members | {"words-3.html": b"changed"})
+    assert deltas.release(tmp_path) == []
+    assert not list((tmp_path / "deltas" / "previous").iterdir())
+
+
+def test_build(members: dict[str, bytes]) -> None:
+    assert deltas.build() == []
+
+    file = constants.FILES / "eo" / "fr" / "dicthtml-eo-fr.zip"
+    make_zip(file, members)
+    base = deltas.file_sha256(file)
+    deltas.build()
+    make_zip(file, members | {"words-10.html": b"new"})
+    assert deltas.build() == [file.parent / "deltas" / f"dicthtml-eo-fr.zip.{base}.patch.zst"]
@@ -0,0 +1,318 @@
+import hashlib
+import io
+from pathlib import Path
+from typing import Any, ClassVar
+
+import bottle
+import pytest
+import webob
+
+from src import constants, deltas, files, governor, manifest, server, zipstream
+
+
+class FileWrapper:
+    """Like a WSGI server `wsgi.file_wrapper`."""
+
+    wrapped: ClassVar[list[Any]] = []
+
+    def __init__(self, filelike: Any, block_size: int = 8192) -> None:  # noqa: ANN401, ARG002
+        self.filelike = filelike
+        self.wrapped.append(filelike)
+
+    def __iter__(self) -> Any:  # noqa: ANN401
+        yield from iter(lambda: self.filelike.read(8192), b"")
+
+
+def get(path: str, headers: dict[str, str] | None = None, method: str = "GET") -> webob.Response:
+    request = webob.Request.blank(path, headers=headers or {}, environ={"wsgi.file_wrapper": FileWrapper})
+    request.method = method
+    return request.get_response(server.app)
+
+
+@pytest.fixture
+def sha256() -> str:
+    checksum = hashlib.sha256(b"AwEsOmE DiCt!").hexdigest()
+    (constants.FILES / "eo" / "eo" / "dicthtml-eo-eo.zip.sha256").write_text(f"{checksum}  dicthtml-eo-eo.zip\n")
+    manifest.get().invalidate()
+    return checksum
+
+
+def test_file_range() -> None:
+    file_range = files.FileRange(io.BytesIO(b"0123456789"), 2, 5)
+    assert file_range.read(3) == b"234"
+    assert file_range.read() == b"56"
+    assert not file_range.read()
+    file_range.close()
+    assert file_range.file.closed
+
+
+def test_file_range_fileno(tmp_path: Path) -> None:
+    file = tmp_path / "data.bin"
+    file.write_bytes(b"0123456789")
+    with file.open(mode="rb") as fh:
+        file_range = files.FileRange(fh, 4, 2)
+        assert file_range.fileno() == fh.fileno()
+        assert fh.tell() == 4
+
+
+def test_send() -> None:
+    response = get("/file/eo/dicthtml-eo-eo.zip")
+    assert response.status_code == 200
+    assert response.body == b"AwEsOmE DiCt!"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert isinstance(FileWrapper.wrapped.pop().body, io.BufferedReader)
+
+
+@pytest.mark.parametrize(
+    ("range_header", "content_range", "body"),
+    [
+        ("bytes=0-4", "bytes 0-4/13", b"AwEsO"),
+        ("bytes=8-", "bytes 8-12/13", b"DiCt!"),
+        ("bytes=-3", "bytes 10-12/13", b"Ct!"),
+    ],
+)
+def test_send_range(range_header: str, content_range: str, body: bytes) -> None:
+    response = get("/file/eo/dicthtml-eo-eo.zip", {"Range": range_header})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == content_range
+    assert response.headers["Content-Length"] == str(len(body))
+    assert response.body == body
+    assert isinstance(FileWrapper.wrapped.pop().body, files.FileRange)
+
+
+def test_send_range_head() -> None:
+    response = get("/file/eo/dicthtml-eo-eo.zip", {"Range": "bytes=0-4"}, method="HEAD")
+    assert response.status_code == 206
+    assert response.headers["Content-Length"] == "5"
+    assert not response.body
+
+
+def test_send_range_not_satisfiable() -> None:
+    assert get("/file/eo/dicthtml-eo-eo.zip", {"Range": "bytes=100-"}).status_code == 416
+
+
+def test_send_asset() -> None:
+    response = get("/asset/font/InterVariable.woff2", {"Range": "bytes=0-3"})
+    assert response.status_code == 206
+    assert response.body == b"wOF2"
+
+
+def test_send_compressed_outside_root() -> None:
+    bottle.request.bind({})
+    with pytest.raises(bottle.HTTPError) as exc:
+        files.send_compressed("../sitemap.xml", constants.ASSET / "img")
+    assert exc.value.status_code == 403
+
+
+def test_send_compressed_missing() -> None:
+    assert get("/asset/img/missing.svg").status_code == 404
+
+
+def test_validators() -> None:
+    sha256 = "ab" * 32
+    assert files.validators(sha256) == {
+        "ETag": f'"{sha256}"',
+        "Repr-Digest": "sha-256=:q6urq6urq6urq6urq6urq6urq6urq6urq6urq6urq6s=:",
+    }
+    assert not files.validators("ok")
+    assert not files.validators("")
+
+
+def test_send_download_validators(sha256: str) -> None:
+    response = get("/file/eo/dicthtml-eo-eo.zip")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{sha256}"'
+    assert response.headers["Repr-Digest"] == "sha-256=:MqyIGaPSLdTl0gotWNm7FwuHX0PG40p5NXkoJCECrMk=:"
+
+
+def test_send_download_validators_missing() -> None:
+    # The fixture sidecar holds no valid checksum
+    response = get("/file/eo/dicthtml-eo-eo.zip")
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    assert "Repr-Digest" not in response.headers
+    assert "Last-Modified" in response.headers
+
+
+def test_send_download_validators_outdated(sha256: str) -> None:
+    # The file is replaced, but the manifest (and its sidecar) not yet refreshed
+    manifest.lookup("eo", "eo", "dicthtml-eo-eo.zip")
+    (constants.FILES / "eo" / "eo" / "dicthtml-eo-eo.zip").write_bytes(b"AwEsOmE DiCt! v2")
+    headers = {"Range": "bytes=8-", "If-Range": f'"{sha256}"', "If-None-Match": f'"{sha256}"'}
+    response = get("/file/eo/dicthtml-eo-eo.zip", headers)
+    assert response.status_code == 200
+    assert response.body == b"AwEsOmE DiCt! v2"
+    assert response.headers["Content-Length"] == "16"
+    assert "ETag" not in response.headers
+    assert "Repr-Digest" not in response.headers
+
+
+@pytest.mark.parametrize("if_none_match", ['"{sha256}"', 'W/"{sha256}"', '"other", "{sha256}"', "*"])
+def test_send_download_not_modified(sha256: str, if_none_match: str) -> None:
+    response = get("/file/eo/dicthtml-eo-eo.zip", {"If-None-Match": if_none_match.format(sha256=sha256)})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == f'"{sha256}"'
+    assert not response.body
+
+
+@pytest.mark.usefixtures("sha256")
+def test_send_download_modified() -> None:
+    headers = {"If-None-Match": '"other"', "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+    response = get("/file/eo/dicthtml-eo-eo.zip", headers)
+    assert response.status_code == 200
+    assert response.body == b"AwEsOmE DiCt!"
+
+
+@pytest.mark.parametrize(
+    ("if_range", "status", "body"),
+    [
+        ('"{sha256}"', 206, b"DiCt!"),
+        ('"other"', 200, b"AwEsOmE DiCt!"),
+        ('W/"{sha256}"', 200, b"AwEsOmE DiCt!"),
+        ("Fri, 01 Jan 2100 00:00:00 GMT", 200, b"AwEsOmE DiCt!"),
+    ],
+)
+def test_send_download_if_range(sha256: str, if_range: str, status: int, body: bytes) -> None:
+    headers = {"Range": "bytes=8-", "If-Range": if_range.format(sha256=sha256)}
+    response = get("/file/eo/dicthtml-eo-eo.zip", headers)
+    assert response.status_code == status
+    assert response.body == body
+
+
+def test_send_download_offloaded_validators(monkeypatch: pytest.MonkeyPatch, sha256: str) -> None:
+    monkeypatch.setattr(constants, "FILES_OFFLOAD", "x-accel-redirect")
+    response = get("/file/eo/dicthtml-eo-eo.zip")
+    assert response.headers["ETag"] == f'"{sha256}"'
+    assert "Repr-Digest" in response.headers
+    assert get("/file/eo/dicthtml-eo-eo.zip", {"If-None-Match": f'"{sha256}"'}).status_code == 304
+
+
+@pytest.fixture
+def patch(sha256: str) -> str:
+    """A patch of the monolingual Kobo file, from a previous generation."""
+    base = "cd" * 32
+    folder = constants.FILES / "eo" / "eo" / deltas.DELTAS
+    folder.mkdir()
+    patch = folder / deltas.delta_name("dicthtml-eo-eo.zip", base)
+    patch.write_bytes(b"PaTcH")
+    deltas.sidecar(patch).write_text(sha256)
+    return base
+
+
+def test_send_delta(sha256: str, patch: str) -> None:
+    response = get(f"/file/eo/dicthtml-eo-eo.zip?from={patch}", {"A-IM": "gzip, zstd-patch"})
+    assert response.status_code == 226
+    assert response.body == b"PaTcH"
+    assert response.headers["IM"] == deltas.IM
+    assert response.headers["Delta-Base"] == f'"{patch}"'
+    assert response.headers["ETag"] == f'"{sha256}"'
+    assert response.headers["Content-Type"] == "application/zstd"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="dicthtml-eo-eo.zip.patch.zst"'
+    assert "Repr-Digest" not in response.headers
+
+
+def test_send_delta_not_modified(sha256: str, patch: str) -> None:
+    headers = {"A-IM": "zstd-patch", "If-None-Match": f'"{sha256}"'}
+    response = get(f"/file/eo/dicthtml-eo-eo.zip?from={patch}", headers)
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize("a_im", ["", "gzip", "zstd-patches"])
+@pytest.mark.usefixtures("sha256")
+def test_send_delta_not_accepted(patch: str, a_im: str) -> None:
+    response = get(f"/file/eo/dicthtml-eo-eo.zip?from={patch}", {"A-IM": a_im})
+    assert response.status_code == 200
+    assert response.body == b"AwEsOmE DiCt!"
+
+
+def test_send_delta_other_target(patch: str) -> None:
+    # The patch leads to another generation than the current one
+    folder = constants.FILES / "eo" / "eo"
+    (folder / "dicthtml-eo-eo.zip").write_bytes(b"AwEsOmE DiCt! v2")
+    (folder / "dicthtml-eo-eo.zip.sha256").write_text(hashlib.sha256(b"AwEsOmE DiCt! v2").hexdigest())
+    manifest.get().invalidate()
+    response = get(f"/file/eo/dicthtml-eo-eo.zip?from={patch}", {"A-IM": "zstd-patch"})
+    assert response.status_code == 200
+    assert response.body == b"AwEsOmE DiCt! v2"
+
+
+@pytest.mark.parametrize("base", ["ef" * 32, "../../../../etc/passwd", ""])
+@pytest.mark.usefixtures("patch")
+def test_send_delta_unknown_base(base: str) -> None:
+    response = get(f"/file/eo/dicthtml-eo-eo.zip?from={base}", {"A-IM": "zstd-patch"})
+    assert response.status_code == 200
+    assert response.body == b"AwEsOmE DiCt!"
+
+
+@pytest.mark.parametrize(
+    ("mode", "header", "value"),
+    [
+        ("x-accel-redirect", "X-Accel-Redirect", "/protected-files/eo/eo/dicthtml-eo-eo.zip"),
+        ("x-sendfile", "X-Sendfile", "{files}/eo/eo/dicthtml-eo-eo.zip"),
+    ],
+)
+def test_send_download_offloaded(monkeypatch: pytest.MonkeyPatch, mode: str, header: str, value: str) -> None:
+    monkeypatch.setattr(constants, "FILES_OFFLOAD", mode)
+    FileWrapper.wrapped.clear()
+    response = get("/file/eo/dicthtml-eo-eo.zip")
+    assert response.status_code == 200
+    assert response.headers[header] == value.format(files=constants.FILES.resolve())
+    assert response.headers["Content-Type"] == "application/zip"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="dicthtml-eo-eo.zip"'
+    assert not response.body
+    assert not FileWrapper.wrapped
+
+
+def test_send_download_missing() -> None:
+    with pytest.raises(bottle.HTTPError) as exc:
+        files.send_download(manifest.Entry(constants.FILES / "eo" / "eo" / "missing.zip", 0, 0.0, ""))
+    assert exc.value.status_code == 404
+
+
+def test_send_download_offloaded_outside(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "FILES_OFFLOAD", "x-accel-redirect")
+    with pytest.raises(bottle.HTTPError) as exc:
+        files.send_download(manifest.Entry(Path("/etc/passwd"), 0, 0.0, ""))
+    assert exc.value.status_code == 403
+
+
+def test_send_download_offloaded_location(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "FILES_OFFLOAD", "x-accel-redirect")
+    monkeypatch.setattr(constants, "FILES_OFFLOAD_LOCATION", "/internal/")
+    file = constants.FILES / "eo" / "eo" / "dict eo.df.bz2"
+    file.write_bytes(b"BZh")
+    entry = manifest.Entry(file, 3, file.stat().st_mtime, "")
+    response = files.send_download(entry, headers={"File-Source": "purchase"})
+    assert response.headers["X-Accel-Redirect"] == "/internal/eo/eo/dict%20eo.df.bz2"
+    assert response.headers["Content-Type"] == "application/x-bzip2"
+    assert response.headers["File-Source"] == "purchase"
+
+
+def test_send_bundle_missing() -> None:
+    entry = manifest.Entry(constants.FILES / "eo" / "eo" / "missing.zip", 0, 0.0)
+    with pytest.raises(bottle.HTTPError) as exc:
+        files.send_bundle("all-formats-eo-eo.zip", [entry])
+    assert exc.value.status_code == 404
+
+
+def test_send_bundle_no_slot(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "DOWNLOADS_MAX", 1)
+    closed: list[zipstream.Member] = []
+    monkeypatch.setattr(zipstream, "close", closed.extend)
+    entries = list(manifest.scan_folder(constants.FILES / "eo" / "eo").values())
+    slots = governor.acquire("unknown")
+    with pytest.raises(bottle.HTTPError) as exc:
+        files.send_bundle("all-formats-eo-eo.zip", entries)
+    governor.release(slots)
+    assert exc.value.status_code == 503
+    assert len(closed) == len(entries)
+    for member in closed:
+        member.file.close()
+
+
+@pytest.mark.parametrize(
+    ("file_name", "expected"),
+    [("a.zip", "application/zip"), ("a.df.gz", "application/gzip"), ("a.unknown", "application/octet-stream")],
+)
+def test_content_type(file_name: str, expected: str) -> None:
+    assert files.content_type(file_name) == expected
@@ -0,0 +1,177 @@
+import io
+from pathlib import Path
+
+import bottle
+import pytest
+import webob
+
+from src import constants, governor, server, zipstream
+
+
+@pytest.fixture
+def limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "DOWNLOADS_MAX", 2)
+    monkeypatch.setattr(constants, "DOWNLOADS_MAX_PER_IP", 1)
+
+
+@pytest.mark.usefixtures("limits")
+def test_acquire() -> None:
+    slots = governor.acquire("1.2.3.4")
+    assert len(slots) == 2
+
+    # Per IP
+    with pytest.raises(bottle.HTTPError) as exc:
+        governor.acquire("1.2.3.4")
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == str(constants.DOWNLOADS_RETRY_AFTER_IN_SEC)
+
+    # Overall
+    other = governor.acquire("5.6.7.8")
+    with pytest.raises(bottle.HTTPError):
+        governor.acquire("9.10.11.12")
+
+    governor.release(slots)
+    governor.release(governor.acquire("1.2.3.4"))
+    governor.release(other)
+
+
+def test_acquire_unlimited(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "DOWNLOADS_MAX", 0)
+    monkeypatch.setattr(constants, "DOWNLOADS_MAX_PER_IP", 0)
+    assert governor.acquire("1.2.3.4") == []
+
+
+def test_take(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(governor.time, "time", lambda: 1000.0)
+    assert governor.take(50, 100) == 0.0
+    assert governor.take(50, 100) == 0.5
+    assert governor.take(100, 100) == 1.0
+
+
+@pytest.mark.usefixtures("limits")
+def test_transfer() -> None:
+    body = io.BytesIO(b"0123456789")
+    transfer = governor.Transfer(body, governor.acquire("1.2.3.4"))
+    assert transfer.read(4) == b"0123"
+    transfer.close()
+    assert body.closed
+    governor.release(governor.acquire("1.2.3.4"))
+
+
+def test_transfer_fileno(tmp_path: Path) -> None:
+    file = tmp_path / "data.bin"
+    file.write_bytes(b"0123456789")
+    with file.open(mode="rb") as fh:
+        assert governor.Transfer(fh, []).fileno() == fh.fileno()
+
+
+def test_transfer_fileno_not_a_file() -> None:
+    with pytest.raises(io.UnsupportedOperation):
+        governor.Transfer(zipstream.ZipStream([]), []).fileno()
+
+
+def test_transfer_paced(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "DOWNLOADS_RATE", 4)
+    monkeypatch.setattr(governor, "QUANTUM", 4)
+    monkeypatch.setattr(governor.time, "time", lambda: 1000.0)
+    delays: list[float] = []
+    monkeypatch.setattr(governor.time, "sleep", delays.append)
+
+    transfer = governor.Transfer(io.BytesIO(b"0123456789"), [])
+    assert transfer.read(4) == b"0123"
+    assert transfer.read(4) == b"4567"
+    assert transfer.read() == b"89"
+    assert not transfer.read()
+    assert delays == [1.0, 2.0]
+    with pytest.raises(io.UnsupportedOperation):
+        transfer.fileno()
+
+
+def test_transfer_quantum(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "DOWNLOADS_RATE", 4)
+    monkeypatch.setattr(governor, "QUANTUM", 8)
+    monkeypatch.setattr(governor.time, "time", lambda: 1000.0)
+    delays: list[float] = []
+    monkeypatch.setattr(governor.time, "sleep", delays.append)
+    taken: list[int] = []
+    take = governor.take
+
+    def counted_take(size: int, rate: int) -> float:
+        taken.append(size)
+        return take(size, rate)
+
+    monkeypatch.setattr(governor, "take", counted_take)
+
+    transfer = governor.Transfer(io.BytesIO(b"0123456789"), [])
+    assert transfer.read(4) == b"0123"
+    assert transfer.read(4) == b"4567"
+    assert transfer.read() == b"89"
+    # The shared budget is used once per quantum
+    assert taken == [8, 8]
+    assert delays == [2.0]
+
+
+@pytest.mark.usefixtures("limits")
+def test_govern_nothing_to_transfer() -> None:
+    response = governor.govern(bottle.HTTPResponse(status=304), governor.acquire("1.2.3.4"))
+    assert not isinstance(response.body, governor.Transfer)
+    governor.release(governor.acquire("1.2.3.4"))
+
+
+@pytest.mark.usefixtures("limits")
+def test_download_route() -> None:
+    slots = governor.acquire("1.2.3.4")
+    request = webob.Request.blank("/file/eo/dicthtml-eo-eo.zip", remote_addr="1.2.3.4")
+    response = request.get_response(server.app)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(constants.DOWNLOADS_RETRY_AFTER_IN_SEC)
+    assert "Too many downloads" in response.text
+
+    governor.release(slots)
+    response = request.get_response(server.app)
+    assert response.status_code == 200
+    assert response.body == b"AwEsOmE DiCt!"
+    # The slot is released once the body is sent
+    governor.release(governor.acquire("1.2.3.4"))
+
+
+@pytest.mark.usefixtures("limits")
+def test_download_route_spoofed_forwarded_for() -> None:
+    slots = governor.acquire("1.2.3.4")
+    request = webob.Request.blank(
+        "/file/eo/dicthtml-eo-eo.zip", remote_addr="1.2.3.4", headers={"X-Forwarded-For": "5.6.7.8"}
+    )
+    assert request.get_response(server.app).status_code == 503
+    governor.release(slots)
+
+
+@pytest.mark.usefixtures("limits")
+def test_download_route_head() -> None:
+    slots = governor.acquire("1.2.3.4")
+    request = webob.Request.blank("/file/eo/dicthtml-eo-eo.zip", method="HEAD", remote_addr="1.2.3.4")
+    response = request.get_response(server.app)
+    assert response.status_code == 200
+    assert response.content_length == len(b"AwEsOmE DiCt!")
+    governor.release(slots)
+
+
+@pytest.mark.parametrize(
+    ("proxies", "forwarded_for", "expected"),
+    [
+        (0, "5.6.7.8", "1.2.3.4"),
+        (1, "5.6.7.8", "5.6.7.8"),
+        (1, "9.9.9.9, 5.6.7.8", "5.6.7.8"),
+        (2, "9.9.9.9, 5.6.7.8, 10.0.0.1", "5.6.7.8"),
+        (2, "5.6.7.8", "1.2.3.4"),
+        (1, "", "1.2.3.4"),
+    ],
+)
+def test_client(monkeypatch: pytest.MonkeyPatch, proxies: int, forwarded_for: str, expected: str) -> None:
+    monkeypatch.setattr(constants, "DOWNLOADS_TRUSTED_PROXIES", proxies)
+    bottle.request.bind({"REMOTE_ADDR": "1.2.3.4", "HTTP_X_FORWARDED_FOR": forwarded_for})
+    assert governor.client() == expected
+
+
+def test_client_unknown() -> None:
+    bottle.request.bind({})
+    assert governor.client() == "unknown"
@@ -0,0 +1,141 @@
+import os
+from datetime import datetime, timedelta, tzinfo
+from email.utils import formatdate
+from pathlib import Path
+from typing import Self
+from unittest.mock import patch
+
+import bottle
+import pytest
+from webtest import TestApp
+
+from src import compression, constants, http_cache, server, styles
+
+
+@pytest.fixture(scope="session")
+def app() -> TestApp:
+    return TestApp(server.app)
+
+
+def test_policy_cache_control() -> None:
+    assert http_cache.Policy(max_age=60).cache_control == "public, max-age=60"
+    assert (
+        http_cache.Policy(max_age=0, stale_while_revalidate=10, private=True).cache_control
+        == "private, max-age=0, stale-while-revalidate=10"
+    )
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "if_modified_since", "expected"),
+    [
+        ("", "", False),
+        ('W/"abc"', "", True),
+        ('"other", "abc"', "", True),
+        ("*", "", True),
+        ('"other"', formatdate(2000, usegmt=True), False),
+        ("", formatdate(2000, usegmt=True), True),
+        ("", formatdate(999, usegmt=True), False),
+        ("", "not a date", False),
+    ],
+)
+def test_validators_is_fresh(if_none_match: str, if_modified_since: str, expected: bool) -> None:
+    validators = http_cache.Validators('W/"abc"', 1000.5)
+    assert validators.is_fresh(if_none_match, if_modified_since) is expected
+
+
+def test_page(app: TestApp) -> None:
+    response = app.get("/sponsors")
+    assert response.headers["Cache-Control"] == "public, max-age=300, stale-while-revalidate=86400"
+    assert response.headers["ETag"].startswith('W/"')
+    assert response.headers["Last-Modified"]
+
+    # Conditional requests are answered before rendering
+    with patch.object(server, "render", side_effect=AssertionError):
+        app.get("/sponsors", headers={"If-None-Match": response.headers["ETag"]}, status=304)
+        app.get("/sponsors", headers={"If-Modified-Since": response.headers["Last-Modified"]}, status=304)
+
+    # A data file the page depends on changed
+    stat = constants.SPONSORS.stat()
+    os.utime(constants.SPONSORS, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    app.get("/sponsors", headers={"If-None-Match": response.headers["ETag"]}, status=200)
+
+
+def test_page_today(app: TestApp, monkeypatch: pytest.MonkeyPatch) -> None:
+    response = app.get("/sponsors")
+    app.get("/sponsors", headers={"If-None-Match": response.headers["ETag"]}, status=304)
+
+    # Monthly sponsors amounts grow with the current date
+    class Tomorrow(datetime):
+        @classmethod
+        def now(cls, tz: tzinfo | None = None) -> Self:
+            return cls.fromtimestamp((datetime.now(tz=tz) + timedelta(days=1)).timestamp(), tz=tz)
+
+    monkeypatch.setattr(http_cache, "datetime", Tomorrow)
+    app.get("/sponsors", headers={"If-None-Match": response.headers["ETag"]}, status=200)
+    app.get("/sponsors", headers={"If-Modified-Since": response.headers["Last-Modified"]}, status=200)
+
+
+def test_page_catalog_changed(app: TestApp) -> None:
+    etag = app.get("/list").headers["ETag"]
+    assert app.get("/get/eo/fr").headers["ETag"] != etag
+
+    dictionaries = server.utils.get_dictionaries()
+    dictionaries["eo"]["fr"]["words"] = 42
+    server.utils.save_dictionaries(dictionaries)
+    assert app.get("/list").headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("path", ["/get/eo/zz", "/download/zz"])
+@pytest.mark.parametrize(
+    "headers", [{"If-None-Match": "*"}, {"If-Modified-Since": formatdate(4_102_444_800, usegmt=True)}]
+)
+def test_page_not_found(app: TestApp, path: str, headers: dict[str, str]) -> None:
+    # Validators do not tell whether the page exists
+    app.get(path, headers=headers, status=404)
+
+
+def test_page_exists(app: TestApp) -> None:
+    app.get("/get/eo/fr", headers={"If-None-Match": "*"}, status=304)
+    app.get("/download/eo", headers={"If-None-Match": "*"}, status=304)
+
+
+def test_page_last_modified_deploy(app: TestApp, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(http_cache, "deployed_at", lambda: 4_102_444_800.0)
+    response = app.get("/sponsors")
+    assert response.headers["Last-Modified"] == "Fri, 01 Jan 2100 00:00:00 GMT"
+
+
+def test_page_missing_dependency(app: TestApp) -> None:
+    constants.SPONSORS.unlink()
+    response = app.get("/sponsors", expect_errors=True)
+    # Only the content ETag of a cached page, if any
+    assert not response.headers.get("ETag", "").startswith("W/")
+    assert "Last-Modified" not in response.headers
+
+
+def test_page_debug(app: TestApp, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(bottle, "DEBUG", True)
+    assert "Cache-Control" not in app.get("/enjoy").headers
+
+
+def test_page_private(app: TestApp) -> None:
+    response = app.get("/download/eo/fr", status=400)
+    assert "Cache-Control" not in response.headers
+
+
+def test_text_file(app: TestApp) -> None:
+    response = app.get("/robots.txt")
+    assert response.headers["Cache-Control"] == "public, max-age=86400"
+    assert response.headers["ETag"] == compression.Variants((constants.ASSET / "robots.txt").read_bytes()).etag()
+    app.get("/robots.txt", headers={"If-None-Match": response.headers["ETag"]}, status=304)
+
+
+def test_text_file_missing(app: TestApp, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    styles.save_manifest()  # The error page needs stylesheets
+    monkeypatch.setattr(constants, "ASSET", tmp_path)
+    app.get("/humans.txt", status=404)
+
+
+def test_api(app: TestApp) -> None:
+    response = app.get(constants.ROUTE_API_DICT)
+    assert response.headers["Cache-Control"] == "public, max-age=300, stale-while-revalidate=86400"
@@ -0,0 +1,174 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+from webtest import TestApp
+
+from src import assets, constants, images, server
+
+INKSCAPE_SVG = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<svg
+   width="10"
+   height="10"
+   version="1.1"
+   id="svg1"
+   inkscape:version="1.4"
+   xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+   xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+   xmlns="http://www.w3.org/2000/svg">
+  <defs
+     id="defs1" />
+  <sodipodi:namedview
+     id="namedview1"
+     inkscape:zoom="0.9010989" />
+  <g
+     id="g1"
+     clip-path="url(#clip1)"
+     transform="translate(-88.0000,-24)">
+    <path
+       d="M 113.4614,112.7031 112.469,116 h -8.664 l 0.117,-0.516"
+       id="path1" />
+  </g>
+  <clipPath id="clip1"><rect x="0.5" y="0" width="10" height="10" /></clipPath>
+</svg>
+"""
+
+
+SOURCES = constants.ASSET
+
+
+@pytest.fixture(scope="session")
+def app() -> TestApp:
+    return TestApp(server.app)
+
+
+@pytest.fixture
+def asset(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A copy of assets, to run the pipeline on."""
+    root = tmp_path / "asset"
+    shutil.copytree(SOURCES, root)
+    monkeypatch.setattr(constants, "ASSET", root)
+    images.intrinsic_width.cache_clear()
+    return root
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("M 113.4614,112.7031 112.469,116 h -8.664 l 0.117,-0.516", "M113.461,112.703 112.469,116h-8.664l.117-.516"),
+        ("translate(-88.0000,  -24)", "translate(-88, -24)"),
+        ("0.0001 -0.5", "0 -.5"),
+    ],
+)
+def test_compact(value: str, expected: str) -> None:
+    assert images.compact(value, path=value.startswith("M")) == expected
+
+
+def test_optimize() -> None:
+    optimized = images.optimize(INKSCAPE_SVG)
+    assert optimized == (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10">'
+        '<g clip-path="url(#clip1)" transform="translate(-88,-24)">'
+        '<path d="M113.461,112.703 112.469,116h-8.664l.117-.516"/></g>'
+        '<clipPath id="clip1"><rect x=".5" y="0" width="10" height="10"/></clipPath></svg>'
+    )
+    assert images.optimize(optimized) == optimized
+
+
+def test_sprite() -> None:
+    sprite = images.sprite(
+        {
+            "one": '<svg xmlns="http://www.w3.org/2000/svg" width="4" height="2" fill="none"><path d="M0 0h4"/></svg>',
+            "two": images.optimize(INKSCAPE_SVG),
+        }
+    )
+    assert '<symbol id="one" viewBox="0 0 4 2" fill="none"><path d="M0 0h4"/></symbol>' in sprite
+    assert '<symbol id="two" viewBox="0 0 10 10"><g clip-path="url(#two-clip1)"' in sprite
+    assert '<clipPath id="two-clip1">' in sprite
+
+
+def test_png_size() -> None:
+    assert images.png_size(constants.ASSET / "img" / "showcase.png") == (1264, 1680)
+
+
+def test_build(asset: Path) -> None:
+    (asset / "img" / "editor.svg").write_text(INKSCAPE_SVG)
+    written = images.build()
+    assert asset / "img" / "editor.svg" in written
+    assert asset / "img" / images.SPRITE in written
+    assert "inkscape" not in (asset / "img" / "editor.svg").read_text()
+
+    # Current assets are optimized already
+    assert images.build() == [asset / "img" / images.SPRITE]
+    assert (asset / "img" / images.SPRITE).read_text() == (SOURCES / "img" / images.SPRITE).read_text()
+
+
+def test_resize_without_pillow(asset: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture) -> None:
+    monkeypatch.setitem(sys.modules, "PIL", None)
+    assert images.resize(asset / "img" / "showcase.png") == []
+    assert "Pillow is not installed" in caplog.text
+
+
+def remove_variants(asset: Path) -> None:
+    for file in (asset / "img").glob("showcase*"):
+        if file.name not in images.SCREENSHOTS:
+            file.unlink()
+
+
+def test_resize(asset: Path) -> None:
+    image = pytest.importorskip("PIL.Image")
+    remove_variants(asset)
+
+    created = images.resize(asset / "img" / "showcase.png")
+    assert [file.name for file in created] == [
+        "showcase.webp",
+        "showcase-280.png",
+        "showcase-280.webp",
+        "showcase-736.png",
+        "showcase-736.webp",
+    ]
+    for file in created:
+        with image.open(file) as variant:
+            assert variant.width in {*images.WIDTHS, 1264}
+        # Committed variants are up to date
+        assert file.read_bytes() == (SOURCES / "img" / file.name).read_bytes()
+    assert images.png_size(asset / "img" / "showcase-280.png") == (280, 372)
+    assert (asset / "img" / "showcase-280.webp").stat().st_size < (asset / "img" / "showcase-280.png").stat().st_size
+
+    # Variants are only written when they changed
+    assert images.resize(asset / "img" / "showcase.png") == []
+
+
+def test_picture(asset: Path) -> None:
+    html = images.picture("img/showcase.png", dark="img/showcase-dark.png", sizes="368px", alt="Preview")
+    webp = ", ".join(
+        f"{assets.url(f'img/{name}')} {width}w"
+        for name, width in [("showcase-280.webp", 280), ("showcase-736.webp", 736), ("showcase.webp", 1264)]
+    )
+    assert f'<source type="image/webp" srcset="{webp}" sizes="368px">' in html
+    assert f'<source type="image/webp" srcset="{assets.url("img/showcase-dark-280.webp")} 280w' in html
+    assert f'<source srcset="{assets.url("img/showcase-dark-280.png")} 280w' in html
+    assert f'srcset="{assets.url("img/showcase-280.png")} 280w, {assets.url("img/showcase-736.png")} 736w' in html
+
+
+def test_picture_without_variants(asset: Path) -> None:
+    remove_variants(asset)
+    html = images.picture("img/showcase.png", alt="Preview")
+    assert "image/webp" not in html
+    assert f'<img src="{assets.url("img/showcase.png")}" srcset="{assets.url("img/showcase.png")} 1264w"' in html
+    assert "prefers-color-scheme" not in html
+
+
+def test_brand() -> None:
+    html = images.brand("koreader", 90, 29, alt="KOReader", title="Dictionaries for KOReader")
+    assert html.startswith('<svg width="90" height="29" viewBox="0 0 90 29" role="img" aria-label="KOReader">')
+    assert f'<use href="{assets.url("img/brands.svg")}#koreader"/>' in html
+
+
+def test_home(app: TestApp, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "HOME_VARIANTS", 1)
+    html = app.get("/").text
+    assert html.count(assets.url("img/brands.svg")) == len(images.BRANDS)
+    assert html.count(assets.url("img/showcase-dark.png")) == 3
+    assert "img/koreader.svg" not in html
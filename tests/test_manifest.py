@@ -0,0 +1,96 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from src import constants, manifest, utils
+
+
+def test_lookup() -> None:
+    entry = manifest.lookup("eo", "fr", "dicthtml-eo-fr.zip")
+    assert entry
+    assert entry.path == constants.FILES / "eo" / "fr" / "dicthtml-eo-fr.zip"
+    assert entry.size == 13
+    assert entry.mtime == entry.path.stat().st_mtime
+    assert entry.sha256 == "ok"
+
+
+def test_lookup_no_checksum() -> None:
+    entry = manifest.lookup("eo", "fr", "dict-eo-fr.zip")
+    assert entry
+    assert not entry.sha256
+
+
+@pytest.mark.parametrize(
+    ("lang_src", "lang_dst", "file_name"),
+    [
+        ("eo", "fr", "dicthtml-eo-fr-noetym.zip"),
+        ("eo", "fr", "dicthtml-eo-fr.zip.sha256"),
+        ("eo", "zz", "dicthtml-eo-zz.zip"),
+        ("eo", "..", "dicthtml-eo-fr.zip"),
+    ],
+)
+def test_lookup_missing(lang_src: str, lang_dst: str, file_name: str) -> None:
+    assert not manifest.lookup(lang_src, lang_dst, file_name)
+
+
+def test_ignored_files() -> None:
+    (constants.FILES / "README.md").touch()
+    (constants.FILES / "eo" / "README.md").touch()
+    manifest.get().refresh()
+    assert set(manifest.get().folders) == {("eo", "eo"), ("eo", "fr")}
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        ("", ""),
+        ("ABCDEF\n", "abcdef"),
+        ("abcdef  dicthtml-eo-fr.zip\n", "abcdef"),
+    ],
+)
+def test_read_checksum(content: str, expected: str) -> None:
+    file = constants.FILES / "file.sha256"
+    file.write_text(content)
+    assert manifest.read_checksum(file) == expected
+
+
+def test_read_checksum_missing() -> None:
+    assert not manifest.read_checksum(constants.FILES / "missing.sha256")
+
+
+def test_no_syscalls_until_outdated() -> None:
+    assert manifest.lookup("eo", "fr", "dicthtml-eo-fr.zip")
+
+    new_file = constants.FILES / "eo" / "fr" / "dicthtml-eo-fr-noetym.zip"
+    new_file.write_bytes(b"new")
+    with patch.object(os, "scandir", side_effect=AssertionError):
+        assert not manifest.lookup("eo", "fr", new_file.name)
+
+    with patch.object(constants, "FILES_MANIFEST_TTL_IN_SEC", 0):
+        entry = manifest.lookup("eo", "fr", new_file.name)
+    assert entry
+    assert entry.size == 3
+
+
+def test_incremental_refresh() -> None:
+    current = manifest.get()
+    current.refresh()
+
+    (constants.FILES / "eo" / "fr" / "dict-eo-fr-noetym.zip").touch()
+    with patch.object(manifest, "scan_folder", wraps=manifest.scan_folder) as mocked:
+        current.refresh()
+    mocked.assert_called_once_with(constants.FILES / "eo" / "fr")
+
+
+def test_invalidated_on_catalog_change() -> None:
+    current = manifest.get()
+    assert current.get("eo", "fr", "dict-eo-fr.zip")
+    assert not current.is_outdated()
+
+    dictionaries = utils.get_dictionaries()
+    dictionaries["eo"]["fr"]["updated"] = "2025-04-05"
+    utils.save_dictionaries(dictionaries)
+    utils.get_dictionary_metadata("eo", "fr")
+
+    assert current.is_outdated()
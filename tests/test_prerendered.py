@@ -0,0 +1,130 @@
+import json
+import os
+from unittest.mock import patch
+
+import bottle
+import pytest
+import webob
+
+import prerender
+from src import constants, manifest, prerendered, server, templates, utils
+
+
+def get(path: str, headers: dict[str, str] | None = None) -> webob.Response:
+    return webob.Request.blank(path, headers=headers or {}).get_response(server.app)
+
+
+def prerendered_page(path: str) -> bytes:
+    digest = json.loads((constants.STATIC / prerendered.MANIFEST).read_text())["pages"][path]["digest"]
+    return prerendered.page_file(constants.STATIC, digest).read_bytes()
+
+
+def test_prerender() -> None:
+    pages = prerender.prerender()
+    assert sorted(pages) == ["/download/eo", "/enjoy", "/hall-of-fame", "/legal-mentions", "/list"]
+
+    for path, (html, page) in pages.items():
+        assert prerendered_page(path) == html.encode()
+        assert prerendered.get().get(path) is not None
+        assert page.catalog or path not in {"/list", "/download/eo"}
+    assert pages["/download/eo"][1].files == {
+        "eo/eo/dict-eo-eo.zip": (constants.FILES / "eo" / "eo" / "dict-eo-eo.zip").stat().st_mtime
+    }
+
+    # Stale files are removed on the next build
+    (constants.STATIC / "0123.html").write_text("old")
+    prerender.prerender()
+    assert not (constants.STATIC / "0123.html").is_file()
+
+
+def test_serve() -> None:
+    prerender.prerender()
+    with patch.object(server, "render", side_effect=AssertionError):
+        response = get("/enjoy", {"Accept-Encoding": "br"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.content_type == "text/html"
+    assert response.headers["Content-Security-Policy"]
+
+    response = get("/download/eo")
+    assert response.body == prerendered_page("/download/eo")
+
+    etag = response.headers["ETag"]
+    assert get("/download/eo", {"If-None-Match": etag}).status_code == 304
+
+
+def test_serve_missing() -> None:
+    assert prerendered.get().get("/enjoy") is None
+    assert get("/enjoy").status_code == 200
+
+
+def test_serve_debug(monkeypatch: pytest.MonkeyPatch) -> None:
+    prerender.prerender()
+    monkeypatch.setattr(bottle, "DEBUG", True)
+    with patch.object(prerendered.Store, "get", side_effect=AssertionError):
+        assert get("/hall-of-fame").status_code == 200
+
+
+def test_stale_catalog() -> None:
+    prerender.prerender()
+    assert prerendered.get().get("/list") is not None
+
+    dictionaries = utils.load_dictionaries()
+    dictionaries["eo"]["fr"]["words"] = 42
+    utils.save_dictionaries(dictionaries)
+    assert prerendered.get().get("/list") is None
+    assert prerendered.get().get("/enjoy") is not None
+
+
+def test_stale_data_file() -> None:
+    stat = constants.SPONSORS.stat()
+    page = prerendered.Page("0123", data={"SPONSORS": stat.st_mtime_ns})
+    assert page.is_fresh()
+
+    os.utime(constants.SPONSORS, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert not page.is_fresh()
+
+    constants.SPONSORS.unlink()
+    assert not page.is_fresh()
+
+
+def test_stale_dictionary_file() -> None:
+    prerender.prerender()
+    assert prerendered.get().get("/download/eo") is not None
+
+    # A new generation of the dictionary, and its last update date
+    file = constants.FILES / "eo" / "eo" / "dict-eo-eo.zip"
+    stat = file.stat()
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    manifest.get().invalidate()
+    assert prerendered.get().get("/download/eo") is None
+    assert prerendered.get().get("/enjoy") is not None
+
+    file.unlink()
+    manifest.get().invalidate()
+    assert prerendered.get().get("/download/eo") is None
+
+
+def test_stale_templates() -> None:
+    prerender.prerender()
+    with patch.object(templates, "digest", return_value="other"):
+        assert prerendered.get().get("/enjoy") is None
+
+
+def test_store_rebuilt() -> None:
+    prerender.prerender()
+    store = prerendered.get()
+    assert store.get("/enjoy") is not None
+    store.variants.clear()
+
+    for file in constants.STATIC.glob("*.html"):
+        file.unlink()
+    assert store.get("/enjoy") is None
+
+
+def test_store_root_changed(tmp_path_factory: pytest.TempPathFactory) -> None:
+    store = prerendered.get()
+    assert prerendered.get() is store
+
+    constants.STATIC = tmp_path_factory.mktemp("static")
+    assert prerendered.get() is not store
@@ -1,14 +1,20 @@
+import gzip
+import io
 import json
-from collections.abc import Generator
+import zipfile
+from collections.abc import Callable, Generator
 from copy import deepcopy
+from unittest.mock import patch
 
 import bottle
 import bottle_file_cache
+import brotli
 import pytest
 import responses
+import webob
 from webtest import TestApp
 
-from src import constants, server, utils
+from src import constants, server, utils, zipstream
 
 from .payloads import (
     ORDER_P,
@@ -33,18 +39,84 @@ def checkpoint_good(order_id: str) -> str:
     return utils.load_orders()[order_id].checkpoint
 
 
+def get_raw(path: str, headers: dict[str, str]) -> webob.Response:
+    """Unlike `TestApp`, the response content is not decoded."""
+    return webob.Request.blank(path, headers=headers).get_response(server.app)
+
+
 def test_client_ip() -> None:
     assert server.client_ip() == "unknown"
 
 
 def test_api_dictionary_get(app: TestApp) -> None:
-    for should_be_cached in [False, True]:
-        response = app.get(constants.ROUTE_API_DICT)
-        assert json.loads(response.body) == utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_MINIMAL)
-        if should_be_cached:
-            assert bottle_file_cache.CONFIG.header_name in response.headers
-        else:
-            assert bottle_file_cache.CONFIG.header_name not in response.headers
+    response = app.get(constants.ROUTE_API_DICT)
+    assert json.loads(response.body) == utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_MINIMAL)
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert "Content-Encoding" not in response.headers
+    etag = response.headers["ETag"]
+
+    # Conditional request
+    response = app.get(constants.ROUTE_API_DICT, headers={"If-None-Match": etag}, status=304)
+    assert not response.body
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize(
+    ("encoding", "decompress"),
+    [
+        ("br", brotli.decompress),
+        ("gzip", gzip.decompress),
+    ],
+)
+def test_api_dictionary_get_compressed(encoding: str, decompress: Callable[[bytes], bytes], app: TestApp) -> None:
+    response = get_raw(constants.ROUTE_API_DICT, {"Accept-Encoding": encoding})
+    assert response.headers["Content-Encoding"] == encoding
+    assert json.loads(decompress(response.body)) == utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_MINIMAL)
+
+    # Any variant ETag validates the response
+    app.get(constants.ROUTE_API_DICT, headers={"If-None-Match": response.headers["ETag"]}, status=304)
+
+
+def test_api_dictionary_get_delta(app: TestApp) -> None:
+    dictionaries = utils.get_dictionaries()
+    dictionaries["eo"]["fr"]["words"] = 151151
+    utils.save_dictionaries(dictionaries)
+
+    response = app.get(constants.ROUTE_API_DICT, params={"since": "1"})
+    assert response.headers["Catalog-Generation"] == "2"
+    assert response.headers["Catalog-Delta"] == "1"
+    assert json.loads(response.body) == {
+        "generation": 2,
+        "since": 1,
+        "added": {},
+        "changed": {
+            "eo": {"fr": {"formats": "df,dictorg,kobo,mobi,stardict", "updated": "2025-04-04", "words": 151151}}
+        },
+        "removed": [],
+    }
+    app.get(
+        constants.ROUTE_API_DICT, params={"since": "1"}, headers={"If-None-Match": response.headers["ETag"]}, status=304
+    )
+
+
+@pytest.mark.parametrize("since", ["", "0", "3", "-1", "abc"])
+def test_api_dictionary_get_delta_full(since: str, app: TestApp) -> None:
+    response = app.get(constants.ROUTE_API_DICT, params={"since": since})
+    assert response.headers["Catalog-Generation"] == "1"
+    assert "Catalog-Delta" not in response.headers
+    assert json.loads(response.body) == utils.load_dictionaries(keys=constants.DICTIONARY_KEYS_MINIMAL)
+
+
+def test_api_dictionary_get_catalog_updated(app: TestApp) -> None:
+    etag = app.get(constants.ROUTE_API_DICT).headers["ETag"]
+
+    dictionaries = utils.get_dictionaries()
+    dictionaries["eo"]["fr"]["words"] = int(dictionaries["eo"]["fr"]["words"]) + 1
+    utils.save_dictionaries(dictionaries)
+
+    response = app.get(constants.ROUTE_API_DICT, headers={"If-None-Match": etag})
+    assert response.headers["ETag"] != etag
+    assert json.loads(response.body)["eo"]["fr"]["words"] == 151151
 
 
 @responses.activate()
@@ -348,10 +420,31 @@ def test_downloads_monolingual_unknown_dictionary(app: TestApp, caplog: pytest.L
     )
 
 
+@responses.activate()
+def test_downloads_bilingual_layout_cached(app: TestApp, mock_responses: Generator) -> None:
+    utils.store_order(ORDER_P)
+    server.render_download_layout.cache_clear()
+    params = {"checkpoint": checkpoint_good(PURCHASE_ID), "order": PURCHASE_ID}
+
+    # The layout is rendered once, the links block on each request
+    for _ in range(2):
+        bottle_file_cache.delete(
+            bottle_file_cache.compute_key(f"/download/eo/fr-{PURCHASE_ID}-{params['checkpoint']}-")
+        )
+        response = app.get("/download/eo/fr", params=params)
+        assert "Esperanto - French Dictionary" in response
+        assert "151,150" in response
+        assert "/file/" in response
+        assert server.DOWNLOAD_LINKS not in response
+    info = server.render_download_layout.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
 def test_downloads_monolingual(app: TestApp) -> None:
     for should_be_cached in [False, True]:
         response = app.get("/download/eo")
         assert "Esperanto Dictionary" in response
+        assert "/file/eo/all-formats-eo-eo.zip" in response
         if should_be_cached:
             assert bottle_file_cache.CONFIG.header_name in response.headers
         else:
@@ -417,6 +510,61 @@ def test_file_download_bilingual_inexistant(app: TestApp) -> None:
     app.get(f"/file/{links['kobo'][4]}", status=404)
 
 
+@responses.activate()
+def test_file_download_bilingual_bundle(app: TestApp, mock_responses: Generator) -> None:
+    order = deepcopy(ORDER_P)
+    order.dictionary = "eo-fr"
+    utils.store_order(order)
+
+    bundle = utils.craft_bundle_url(
+        utils.load_dictionaries()["eo"]["fr"],
+        order_type="purchase",
+        order_id=PURCHASE_ID,
+    )
+    assert bundle
+    response = app.get(f"/file/{bundle[3]}")
+    assert response.headers["File-Source"] == "purchase"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="all-formats-eo-fr.zip"'
+    assert response.headers["Content-Length"] == str(len(response.body))
+    with zipfile.ZipFile(io.BytesIO(response.body)) as zf:
+        assert zf.namelist() == ["dict-eo-fr.zip", "dicthtml-eo-fr.zip"]
+
+    # No etymology-free files
+    app.get(f"/file/{bundle[4]}", status=404)
+
+
+def test_file_download_monolingual_bundle(app: TestApp) -> None:
+    response = app.get("/file/eo/all-formats-eo-eo.zip")
+    assert response.headers["Content-Type"] == "application/zip"
+    assert response.headers["Accept-Ranges"] == "none"
+    with zipfile.ZipFile(io.BytesIO(response.body)) as zf:
+        assert zf.namelist() == ["dict-eo-eo.zip", "dicthtml-eo-eo.zip"]
+        assert zf.read("dicthtml-eo-eo.zip") == b"AwEsOmE DiCt!"
+
+
+def test_file_download_monolingual_bundle_formats(app: TestApp) -> None:
+    response = app.get("/file/eo/all-formats-eo-eo.zip", params={"formats": "kobo,mobi"})
+    with zipfile.ZipFile(io.BytesIO(response.body)) as zf:
+        assert zf.namelist() == ["dicthtml-eo-eo.zip"]
+
+    app.get("/file/eo/all-formats-eo-eo.zip", params={"formats": "mobi"}, status=404)
+
+
+def test_file_download_monolingual_bundle_head(app: TestApp) -> None:
+    expected = app.get("/file/eo/all-formats-eo-eo.zip").headers["Content-Length"]
+    response = app.head("/file/eo/all-formats-eo-eo.zip")
+    assert response.headers["Content-Length"] == expected
+    assert not response.body
+
+
+def test_file_download_monolingual_bundle_too_large(
+    app: TestApp, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(zipstream, "LIMIT", 100)
+    app.get("/file/eo/all-formats-eo-eo.zip", status=404)
+    assert "too large" in caplog.text
+
+
 def test_file_download_monolingual(app: TestApp) -> None:
     response = app.get("/file/eo/dicthtml-eo-eo.zip")
     assert response.body == b"AwEsOmE DiCt!"
@@ -434,7 +582,8 @@ def test_hall_of_fame(app: TestApp) -> None:
     app.get("/hall-of-fame")
 
 
-def test_home(app: TestApp) -> None:
+def test_home(app: TestApp, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "HOME_VARIANTS", 1)
     for should_be_cached in [False, True]:
         response = app.get("/")
         assert f"<title>{constants.PROJECT}" in response
@@ -444,6 +593,26 @@ def test_home(app: TestApp) -> None:
             assert bottle_file_cache.CONFIG.header_name not in response.headers
 
 
+def test_home_variants(app: TestApp) -> None:
+    bodies = set()
+    for variant in range(2):
+        with patch.object(server.random, "randrange", return_value=variant):
+            for _ in range(2):
+                bodies.add(app.get("/").text)
+    assert len(bodies) == 2
+
+
+@pytest.mark.parametrize("path", ["/", "/list"])
+def test_streamed(path: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(bottle, "DEBUG", True)
+    parts = list(server.app(webob.Request.blank(path).environ, lambda *_: None))
+
+    # The <head> is sent first, before running dictionaries loops
+    assert len(parts) > 1
+    assert parts[0].endswith(b"</title>")
+    assert b"<body>" in parts[1]
+
+
 def test_legal_mentions(app: TestApp) -> None:
     response = app.get("/legal-mentions")
     assert "Legal Mentions" in response
@@ -498,6 +667,81 @@ def test_sitemap(app: TestApp) -> None:
     assert urls_count > len(server.SUPPORTED_LOCALES) + 2
 
 
+@pytest.mark.parametrize(("encoding", "decompress"), [("br", brotli.decompress), ("gzip", gzip.decompress)])
+def test_sitemap_compressed(encoding: str, decompress: Callable[[bytes], bytes], app: TestApp) -> None:
+    response = get_raw("/sitemap.xml", {"Accept-Encoding": "gzip, br" if encoding == "br" else "gzip"})
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert decompress(response.body) == (constants.ASSET / "sitemap.xml").read_bytes()
+
+    # Compressed once per file modification
+    with patch.object(brotli, "compress", side_effect=AssertionError):
+        assert get_raw("/sitemap.xml", {"Accept-Encoding": encoding}).body == response.body
+    app.get("/sitemap.xml", headers={"If-None-Match": response.headers["ETag"]}, status=304)
+
+
+def test_asset_svg_compressed(app: TestApp) -> None:
+    response = get_raw("/asset/img/favicon.svg", {"Accept-Encoding": "br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.headers["Content-Type"] == "image/svg+xml"
+    assert response.headers["Cache-Control"] == "public, no-cache"
+    assert brotli.decompress(response.body) == (constants.ASSET / "img" / "favicon.svg").read_bytes()
+
+
+def test_cached_page_compressed(app: TestApp) -> None:
+    first = get_raw("/enjoy", {"Accept-Encoding": "br"})
+    assert first.headers["Content-Encoding"] == "br"
+
+    # The cached page is sent with its stored variants, compressed once
+    with patch.object(brotli, "compress", side_effect=AssertionError):
+        response = get_raw("/enjoy", {"Accept-Encoding": "br"})
+    assert bottle_file_cache.CONFIG.header_name in response.headers
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.body == first.body
+
+
+def test_cached_streamed_page_compressed(monkeypatch: pytest.MonkeyPatch, app: TestApp) -> None:
+    monkeypatch.setattr(constants, "HOME_VARIANTS", 1)
+    content = app.get("/").body
+    response = get_raw("/", {"Accept-Encoding": "gzip"})
+    assert bottle_file_cache.CONFIG.header_name in response.headers
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.body) == content
+
+
+def test_catalog_changes_invalidate_cached_pages(app: TestApp, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(constants, "HOME_VARIANTS", 1)
+    paths = ["/", "/list", "/download/eo", "/get/eo/fr"]
+    for path in paths * 2:
+        app.get(path)
+    for path in paths:
+        assert bottle_file_cache.CONFIG.header_name in app.get(path).headers
+
+    dictionaries = utils.get_dictionaries()
+    dictionaries["eo"]["fr"]["words"] = 151151
+    utils.save_dictionaries(dictionaries)
+
+    response = app.get("/get/eo/fr")
+    assert bottle_file_cache.CONFIG.header_name not in response.headers
+    assert "151,151" in response
+    for path in ["/", "/list", "/download/eo"]:
+        assert bottle_file_cache.CONFIG.header_name in app.get(path).headers
+
+    # A dictionary is removed
+    del dictionaries["eo"]["eo"]
+    utils.save_dictionaries(dictionaries)
+    for path in ["/", "/list"]:
+        assert bottle_file_cache.CONFIG.header_name not in app.get(path).headers
+    app.get("/download/eo", status=404)
+    assert bottle_file_cache.CONFIG.header_name in app.get("/get/eo/fr").headers
+
+
+def test_catalog_missing(app: TestApp) -> None:
+    constants.DICTIONARIES.unlink()
+    app.get("/robots.txt")
+
+
 #
 # Obsolete, to remove when relevant orders will be ended.
 #
@@ -0,0 +1,122 @@
+import json
+import re
+
+import bottle
+import pytest
+from webtest import TestApp
+
+from src import assets, constants, server, styles, templates
+
+
+@pytest.fixture(scope="session")
+def app() -> TestApp:
+    return TestApp(server.app)
+
+
+def inlined(html: str) -> str:
+    match = re.search(r"<style>(.*?)</style>", html)
+    assert match
+    return match[1]
+
+
+def test_bundle() -> None:
+    css = styles.bundle(["common.css", "home.css"])
+    assert "#showcase" in css
+    assert "url('/asset/font/InterVariable.woff2" in css
+    assert "../" not in css
+
+
+@pytest.mark.parametrize(
+    ("selector", "expected"),
+    [
+        ("header .brand img", True),
+        ("a:not(.button):visited", True),
+        ("input[type=email]", True),
+        ("dd div:not(:last-child)", False),
+        ("#showcase .screen", False),
+        ("::selection", True),
+    ],
+)
+def test_matches(selector: str, expected: bool) -> None:
+    assert styles.matches(selector, {"a", "header", "img", "input", ".brand"}) is expected
+
+
+def test_critical() -> None:
+    css = "@font-face{src:url(a.woff2)}@font-face{src:url(data:font/woff;base64,AAAA)}@keyframes x{0%{top:0}}"
+    css += "p,.missing{color:red}.missing{color:blue}@media (max-width:700px){p{margin:0}.missing{margin:0}}"
+    assert (
+        styles.critical(css, {"p"}) == "@font-face{src:url(a.woff2)}p{color:red}@media (max-width:700px){p{margin:0}}"
+    )
+
+
+def test_tokens() -> None:
+    found = styles.tokens('<div class="center {{ extra }} typo-4" id="buy"><a href="/">{{ "<b>" }}</a></div>')
+    assert {"div", "a", ".center", ".typo-4", "#buy"} <= found
+    assert "b" not in found
+
+
+def test_build() -> None:
+    content = styles.save_manifest()
+    assert json.loads(constants.STYLES_MANIFEST.read_text()) == content
+    assert sorted(content["bundles"]) == sorted(styles.BUNDLES)
+    assert "error.tpl" in content["critical"]
+
+    # Only what is above the fold
+    home = content["critical"]["home.tpl"]
+    assert "header .brand img" in home
+    assert "#showcase" in home
+    assert "footer" not in home
+    assert len(home) < len(content["bundles"]["home"]) / 2
+
+    # Loaded from the manifest
+    constants.STYLES_MANIFEST.write_text(json.dumps({"bundles": {"common": "p{}"}, "critical": {}}))
+    styles.get().manifest = constants.STYLES_MANIFEST.with_name("other")
+    assert styles.get().get("common") == styles.Bundle("common", "p{}")
+    assert styles.get().get("home") is None
+
+
+@pytest.mark.parametrize(
+    ("path", "template", "bundle"),
+    [("/", "home.tpl", "home"), ("/enjoy", "enjoy.tpl", "common"), ("/sponsors", "sponsor.tpl", "sponsor")],
+)
+def test_rendered(app: TestApp, path: str, template: str, bundle: str) -> None:
+    html = app.get(path).text
+    css = inlined(html)
+    assert css == styles.get().critical[template]
+    assert styles.csp_source(css) in server.secure_headers.headers["Content-Security-Policy"]
+    assert html.count(styles.get().bundles[bundle].url) == 2  # Preloaded, and linked for browsers without JavaScript
+    assert "/asset/style/" not in html
+
+
+def test_stylesheet_template_added_later() -> None:
+    constants.STYLES_MANIFEST.write_text(json.dumps({"bundles": {"common": "p{}"}, "critical": {}}))
+    html = templates.get().from_string("{{ stylesheet() }}").render()
+    assert html == f'<link rel="stylesheet" href="{styles.Bundle("common", "p{}").url}" />'
+
+
+def test_stylesheet_debug(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(bottle, "DEBUG", True)
+    html = templates.get().from_string("{{ stylesheet() }}").render()
+    assert html == '<link rel="stylesheet" href="/asset/bundle/common.css" />'
+
+
+def test_asset_bundle(app: TestApp) -> None:
+    bundle = styles.get().bundles["home"]
+    response = app.get(bundle.url)
+    assert response.text == bundle.css
+    assert response.content_type == "text/css"
+    assert response.headers["Cache-Control"] == assets.CACHE_CONTROL_IMMUTABLE
+
+    etag = response.headers["ETag"]
+    assert app.get(bundle.url, headers={"If-None-Match": etag}, status=304).headers["ETag"] == etag
+
+    response = app.get("/asset/bundle/home.css?v=outdated")
+    assert response.headers["Cache-Control"] == assets.CACHE_CONTROL_OUTDATED
+
+    app.get("/asset/bundle/missing.css", status=404)
+
+
+def test_asset_bundle_debug(app: TestApp, monkeypatch: pytest.MonkeyPatch) -> None:
+    constants.STYLES_MANIFEST.write_text(json.dumps({"bundles": {"home": "p{}"}, "critical": {}}))
+    monkeypatch.setattr(bottle, "DEBUG", True)
+    assert app.get("/asset/bundle/home.css").text == styles.bundle(styles.BUNDLES["home"])
@@ -0,0 +1,30 @@
+from unittest.mock import patch
+
+import jinja2
+
+from src import constants, templates
+
+
+def test_render() -> None:
+    assert "Whoopsy" in templates.render("error", constants=constants, msg="Some message", title="Error")
+
+
+def test_render_reload() -> None:
+    env = templates.get()
+    templates.render("enjoy", constants=constants)
+    assert env.cache
+    with patch.object(env.cache, "clear", wraps=env.cache.clear) as mocked:
+        templates.render("enjoy", constants=constants, reload=True)
+    mocked.assert_called_once()
+
+
+def test_warm_up() -> None:
+    names = templates.warm_up()
+    assert "base.tpl" in names
+    assert "home.tpl" in names
+    assert len(list(constants.TEMPLATES_CACHE.glob("*.cache"))) == len(names)
+
+    # A new worker does not compile templates again, they are loaded from the bytecode cache
+    templates.create_env.cache_clear()
+    with patch.object(jinja2.Environment, "compile", side_effect=AssertionError):
+        assert templates.warm_up() == names
@@ -0,0 +1,44 @@
+import pytest
+from freezegun import freeze_time
+
+from src import constants, tokens
+
+
+def test_create_verify() -> None:
+    token = tokens.create("purchase", "order-id", "eo", "fr", "dicthtml-eo-fr.zip", "kobo")
+    assert tokens.verify(token) == ["purchase", "order-id", "eo", "fr", "dicthtml-eo-fr.zip", "kobo"]
+    # Usable as is in URLs
+    assert all(char.isalnum() or char in "-_." for char in token)
+
+
+def test_expiration() -> None:
+    with freeze_time("2025-04-04 12:00:00"):
+        token = tokens.create("", "", "eo", "fr", "dicthtml-eo-fr.zip", "kobo")
+
+    with freeze_time("2025-04-04 12:00:00") as frozen:
+        frozen.tick(constants.DELAY_BEFORE_EXPIRATION_IN_SEC - 1)
+        assert tokens.verify(token)
+        frozen.tick(1)
+        with pytest.raises(tokens.TokenExpiredError):
+            tokens.verify(token)
+
+
+@pytest.mark.parametrize("token", ["", "uid", "not.base64!", "YQ.YQ"])
+def test_invalid(token: str) -> None:
+    with pytest.raises(tokens.TokenInvalidError):
+        tokens.verify(token)
+
+
+def test_tampered() -> None:
+    token = tokens.create("", "", "eo", "fr", "dicthtml-eo-fr.zip", "kobo")
+    signature = token.split(".")[1]
+    other = tokens.create("", "", "eo", "fr", "dict-eo-fr.zip", "stardict").split(".")[0]
+    with pytest.raises(tokens.TokenInvalidError):
+        tokens.verify(f"{other}.{signature}")
+
+
+def test_pepper(monkeypatch: pytest.MonkeyPatch) -> None:
+    token = tokens.create("", "", "eo", "fr", "dicthtml-eo-fr.zip", "kobo")
+    monkeypatch.setattr(constants, "PEPPER", "another pepper")
+    with pytest.raises(tokens.TokenInvalidError):
+        tokens.verify(token)
@@ -1,12 +1,12 @@
 import imaplib
+import os
 import smtplib
 from unittest.mock import MagicMock, patch
 
 import pytest
-import ulid
 from freezegun import freeze_time
 
-from src import constants, utils
+from src import constants, manifest, tokens, utils
 from src.models import Order, Sponsor
 
 from .payloads import PLAN_ID
@@ -21,9 +21,9 @@ def test_craft_tmp_downloads_url() -> None:
     assert links["stardict"][:3] == ("StarDict", "dict-eo-fr.zip", "dict-eo-fr-noetym.zip")
     assert links["df"][:3] == ("DictFile", "dict-eo-fr.df.bz2", "dict-eo-fr-noetym.df.bz2")
     assert links["dictorg"][:3] == ("DICT.org", "dictorg-eo-fr.zip", "dictorg-eo-fr-noetym.zip")
-    for link in links.values():
-        for idx in [3, 4]:
-            assert ulid.ULID.from_hex(link[idx]).hex == link[idx]
+    for fmt, link in links.items():
+        assert tokens.verify(link[3]) == ["", "", "eo", "fr", link[1], fmt]
+        assert tokens.verify(link[4]) == ["", "", "eo", "fr", link[2], fmt]
 
 
 def test_craft_tmp_downloads_url_missing_format() -> None:
@@ -34,6 +34,27 @@ def test_craft_tmp_downloads_url_missing_format() -> None:
     assert "mobi" not in links
 
 
+def test_craft_bundle_url() -> None:
+    dictionary = utils.load_dictionaries()["eo"]["eo"]
+    assert utils.craft_bundle_url(dictionary) == (
+        "All formats",
+        "all-formats-eo-eo.zip",
+        "all-formats-eo-eo-noetym.zip",
+        "eo/all-formats-eo-eo.zip",
+        "eo/all-formats-eo-eo-noetym.zip",
+    )
+
+
+def test_craft_bundle_url_single_format() -> None:
+    dictionary = utils.load_dictionaries()["eo"]["fr"]
+    dictionary["formats"] = "kobo"
+    assert utils.craft_bundle_url(dictionary) is None
+
+
+def test_get_format_from_file_name_bundle() -> None:
+    assert utils.get_format_from_file_name("eo", "all-formats-eo-eo-noetym.zip") == "bundle"
+
+
 def test_get_dictionary_from_langs() -> None:
     assert utils.get_dictionary_from_langs("eo-fr")
 
@@ -47,6 +68,10 @@ def test_get_dictionary_from_key() -> None:
     assert utils.get_dictionary_from_key("plan_id", PLAN_ID)["name"] == "eo-fr"
 
 
+def test_get_dictionary_from_key_uid() -> None:
+    assert utils.get_dictionary_from_key("uid", "01JRG0YZ81APV0ZTCNTHXYSRK9")["name"] == "eo-eo"
+
+
 def test_get_dictionary_from_key_unknown() -> None:
     assert not utils.get_dictionary_from_key("plan_id", "unknown")
 
@@ -87,6 +112,14 @@ def test_get_format_from_file_name_bad(lang: str, name: str) -> None:
         utils.get_format_from_file_name(lang, name)
 
 
+def test_get_last_modification_time_missing_file() -> None:
+    dictionary = utils.get_dictionary_metadata("eo", "fr")
+    (constants.FILES / "eo" / "fr" / "dict-eo-fr.zip").unlink()
+    manifest.get().invalidate()
+    with pytest.raises(FileNotFoundError):
+        utils.get_last_modification_time(dictionary)
+
+
 @freeze_time("2025-09-16T07:36:42Z")
 def test_get_sponsors() -> None:
     assert utils.get_sponsors() == {
@@ -138,6 +171,17 @@ def test_load_dictionaries() -> None:
         assert sorted(details.keys()) == sorted(constants.DICTIONARY_KEYS_ALL)
 
 
+def test_load_data_file() -> None:
+    faq = utils.get_faq()
+    assert utils.get_faq() is faq
+
+    # Parsed again once changed
+    stat = constants.FAQ.stat()
+    os.utime(constants.FAQ, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert utils.get_faq() is not faq
+    assert utils.get_faq() == faq
+
+
 @freeze_time("2025-09-16T07:36:42Z")
 def test_load_sponsors() -> None:
     assert utils.load_sponsors() == {
@@ -294,3 +338,10 @@ def test_language() -> None:
 
 def test_language_missing() -> None:
     assert utils.language("unknown") == "unknown"
+
+
+def test_random_reviews() -> None:
+    reviews = utils.random_reviews(2, seed=0)
+    assert utils.random_reviews(2, seed=0) == reviews
+    assert sorted(review["reader"] for review in reviews) == ["Alice B.", "Bob C."]
+    assert all(review["dictionaries"][0].startswith("<a href=") for review in reviews)
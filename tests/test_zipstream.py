@@ -0,0 +1,136 @@
+import io
+import time
+import zipfile
+import zlib
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from src import manifest, zipstream
+
+
+@pytest.fixture
+def entries(tmp_path: Path) -> list[manifest.Entry]:
+    files = {"dicthtml-eo-fr.zip": b"AwEsOmE DiCt!", "dict-eo-fr.df.bz2": bytes(range(256)) * 1000, "empty.zip": b""}
+    for name, content in files.items():
+        (tmp_path / name).write_bytes(content)
+    return [manifest.scan_folder(tmp_path)[name] for name in files]
+
+
+@pytest.fixture
+def members(entries: list[manifest.Entry]) -> Generator[list[zipstream.Member]]:
+    members = zipstream.open_members(entries)
+    yield members
+    zipstream.close(members)
+
+
+def archive(entries: list[manifest.Entry]) -> bytes:
+    members = zipstream.open_members(entries)
+    try:
+        return b"".join(zipstream.generate(members))
+    finally:
+        zipstream.close(members)
+
+
+def test_generate(entries: list[manifest.Entry], members: list[zipstream.Member]) -> None:
+    data = b"".join(zipstream.generate(members))
+    assert len(data) == zipstream.size(members)
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == [entry.path.name for entry in entries]
+        for entry, info in zip(entries, zf.infolist(), strict=True):
+            assert info.compress_type == zipfile.ZIP_STORED
+            assert not info.flag_bits & 0x0008
+            assert zf.read(info) == entry.path.read_bytes()
+
+
+def test_generate_local_headers(entries: list[manifest.Entry], members: list[zipstream.Member]) -> None:
+    # Readers going through local headers only (like Java `ZipInputStream`) get the CRC, and sizes
+    data = b"".join(zipstream.generate(members))
+    offset = 0
+    for entry in entries:
+        fields = zipstream.LOCAL_HEADER.unpack_from(data, offset)
+        content = entry.path.read_bytes()
+        assert fields[6:9] == (zlib.crc32(content), len(content), len(content))
+        offset += zipstream.LOCAL_HEADER.size + fields[9] + len(content)
+
+
+def test_generate_replaced(tmp_path: Path, entries: list[manifest.Entry], members: list[zipstream.Member]) -> None:
+    # Files opened are sent, with their own size, even when replaced in between
+    replacement = tmp_path / "new"
+    replacement.write_bytes(b"Another generation")
+    replacement.replace(entries[0].path)
+    with zipfile.ZipFile(io.BytesIO(b"".join(zipstream.generate(members)))) as zf:
+        assert zf.read("dicthtml-eo-fr.zip") == b"AwEsOmE DiCt!"
+
+
+def test_generate_truncated(entries: list[manifest.Entry], members: list[zipstream.Member]) -> None:
+    entries[1].path.write_bytes(b"truncated")
+    with pytest.raises(ValueError, match="truncated"):
+        b"".join(zipstream.generate(members))
+
+
+def test_crc32_cached(monkeypatch: pytest.MonkeyPatch, members: list[zipstream.Member]) -> None:
+    monkeypatch.setattr(zipstream, "CRCS", {})
+    monkeypatch.setattr(zipstream, "CRCS_MAX", 2)
+    crcs = [zipstream.crc32(member) for member in members]
+    assert len(zipstream.CRCS) == 1
+    assert [zipstream.crc32(member) for member in members[-1:]] == crcs[-1:]
+    assert crcs[0] == zlib.crc32(b"AwEsOmE DiCt!")
+
+
+def test_open_members_missing(entries: list[manifest.Entry]) -> None:
+    entries[1].path.unlink()
+    with pytest.raises(FileNotFoundError):
+        zipstream.open_members(entries)
+
+
+def test_zip_stream(entries: list[manifest.Entry]) -> None:
+    stream = zipstream.ZipStream(zipstream.open_members(entries))
+    chunks = []
+    while chunk := stream.read(1000):
+        assert len(chunk) <= 1000
+        chunks.append(chunk)
+    stream.close()
+    assert b"".join(chunks) == archive(entries)
+    assert all(member.file.closed for member in stream.members)
+
+
+def test_zip_stream_read_all(entries: list[manifest.Entry]) -> None:
+    stream = zipstream.ZipStream(zipstream.open_members(entries))
+    assert len(stream.read()) == zipstream.size(stream.members)
+    assert not stream.read()
+    stream.close()
+
+
+def test_zip_stream_close(entries: list[manifest.Entry]) -> None:
+    stream = zipstream.ZipStream(zipstream.open_members(entries))
+    stream.read(10)
+    stream.close()
+    assert not stream.read()
+    assert all(member.file.closed for member in stream.members)
+
+
+@pytest.fixture
+def utc(monkeypatch: pytest.MonkeyPatch) -> Generator:
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.usefixtures("utc")
+@pytest.mark.parametrize(
+    ("mtime", "expected"),
+    [
+        # 2001-09-09 01:46:40
+        (1_000_000_000.0, ((1 << 11) | (46 << 5) | 20, (21 << 9) | (9 << 5) | 9)),
+        # 1970-01-01 00:00:00, years before 1980 cannot be represented
+        (0.0, (0, (1 << 5) | 1)),
+    ],
+)
+def test_dos_time(mtime: float, expected: tuple[int, int]) -> None:
+    assert zipstream.dos_time(mtime) == expected